@@ -0,0 +1,235 @@
+"""Batched speaker embedding for many recordings.
+
+``embed_utterance`` runs the encoder once per file on that file's handful
+of partial windows, so embedding an archive in series leaves most cores
+idle. Here decoding, resampling, trimming and the mel spectrograms run in
+a thread pool (librosa and NumPy release the GIL for the heavy parts),
+the partial windows of many files are packed into large encoder batches,
+and each file's embedding is assembled once all its windows are scored.
+
+Results are identical to ``speaker_recognition.embed_file()`` and share
+its embedding cache, so files embedded here are free for the live tools
+and vice versa.
+
+Usage::
+
+    python batch_embed.py recordings/ --output embeddings.npz
+    python batch_embed.py enroll/ --enroll --by-folder
+"""
+
+import os
+import glob
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from embedding_cache import file_content_hash
+from speaker_recognition import (
+    SPEAKER_DB_PATH,
+    embed_mel_partials,
+    embedding_params,
+    get_embedding_cache,
+    preprocess,
+)
+from speaker_store import SpeakerStore, normalize
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg", ".m4a")
+BATCH_PARTIALS = 256  # partial windows per encoder forward pass
+
+
+def collect_audio_files(inputs):
+    """Expand files, directories (recursively) and glob patterns."""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                files.extend(
+                    os.path.join(root, n) for n in sorted(names)
+                    if n.lower().endswith(AUDIO_EXTENSIONS)
+                )
+        elif os.path.isfile(item):
+            files.append(item)
+        else:
+            files.extend(sorted(glob.glob(item)))
+    return files
+
+
+def _prepare(path):
+    """Decode ``path`` and cut it into mel partial windows (thread pool)."""
+    from resemblyzer import VoiceEncoder
+    from resemblyzer.audio import wav_to_mel_spectrogram
+
+    wav = preprocess(path)
+    params = embedding_params()
+    wav_slices, mel_slices = VoiceEncoder.compute_partial_slices(
+        len(wav), rate=params["rate"], min_coverage=params["min_coverage"]
+    )
+    # Same padding as VoiceEncoder.embed_utterance
+    max_wave_length = wav_slices[-1].stop
+    if max_wave_length >= len(wav):
+        wav = np.pad(wav, (0, max_wave_length - len(wav)), "constant")
+    mel = wav_to_mel_spectrogram(wav)
+    mels = np.array([mel[s] for s in mel_slices], dtype=np.float32)
+    splits = np.array([[s.start, s.stop] for s in wav_slices], dtype=np.int64)
+    return mels, splits
+
+
+def _lookup(path, cache):
+    key = cache.key(file_content_hash(path), embedding_params())
+    return key, cache.get(key)
+
+
+def embed_files(paths, workers=None, batch_partials=BATCH_PARTIALS, use_cache=True,
+                return_partials=False):
+    """Embed every file in ``paths``; returns a list in input order.
+
+    Each item is the utterance embedding, or ``(embed, partials, splits)``
+    with ``return_partials``. Files that fail to load give ``None`` and a
+    warning.
+    """
+    workers = workers or os.cpu_count() or 1
+    cache = get_embedding_cache() if use_cache else None
+    results = [None] * len(paths)
+    keys = [None] * len(paths)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        todo = list(range(len(paths)))
+        if cache is not None:
+            todo = []
+            for i, (key, entry) in enumerate(pool.map(lambda p: _lookup(p, cache), paths)):
+                keys[i] = key
+                if entry is None:
+                    todo.append(i)
+                else:
+                    results[i] = (entry["embed"], entry["partials"], entry["splits"])
+
+        # Partial windows waiting for a forward pass: (file index, mels)
+        pending = []
+        pending_count = 0
+        # Per-file scored windows until all of them are in
+        scored = {}
+        splits_of = {}
+
+        def flush():
+            nonlocal pending, pending_count
+            if not pending:
+                return
+            embeds = embed_mel_partials(np.concatenate([mels for _, mels in pending]))
+            offset = 0
+            for i, mels in pending:
+                scored[i].append(embeds[offset:offset + len(mels)])
+                offset += len(mels)
+            pending, pending_count = [], 0
+            for i in [i for i in scored if sum(map(len, scored[i])) == len(splits_of[i])]:
+                partials = np.concatenate(scored.pop(i))
+                raw = partials.mean(axis=0)
+                embed = raw / np.linalg.norm(raw, 2)
+                results[i] = (embed, partials, splits_of.pop(i))
+                if cache is not None:
+                    cache.put(keys[i], *results[i])
+
+        # Keep a bounded number of decoded files in flight so memory stays
+        # flat however many files are queued
+        ahead = 2 * workers
+        futures = {i: pool.submit(_prepare, paths[i]) for i in todo[:ahead]}
+        for n, i in enumerate(todo):
+            if n + ahead < len(todo):
+                nxt = todo[n + ahead]
+                futures[nxt] = pool.submit(_prepare, paths[nxt])
+            try:
+                mels, splits = futures.pop(i).result()
+            except Exception as e:
+                print(f"[WARNING] Could not embed {paths[i]}: {e}")
+                continue
+            splits_of[i] = splits
+            scored[i] = []
+            # Large files are split over several batches
+            for start in range(0, len(mels), batch_partials):
+                chunk = mels[start:start + batch_partials]
+                pending.append((i, chunk))
+                pending_count += len(chunk)
+                if pending_count >= batch_partials:
+                    flush()
+        flush()
+
+    if return_partials:
+        return results
+    return [None if r is None else r[0] for r in results]
+
+
+def enroll(paths, embeddings, by_folder=False):
+    """Add speakers to the store in one update; returns the enrolled names.
+
+    Names are file stems, or parent folder names with ``by_folder`` (the
+    normalized embeddings of all files in a folder are averaged).
+    """
+    grouped = {}
+    for path, embed in zip(paths, embeddings):
+        if embed is None:
+            continue
+        if by_folder:
+            name = os.path.basename(os.path.dirname(os.path.abspath(path)))
+        else:
+            name = os.path.splitext(os.path.basename(path))[0]
+        grouped.setdefault(name, []).append(embed)
+    names = sorted(grouped)
+    if names:
+        vectors = [normalize(np.stack(grouped[n])).mean(axis=0) for n in names]
+        SpeakerStore(SPEAKER_DB_PATH).add_many(names, vectors)
+    return names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch speaker embedding extraction")
+    parser.add_argument("inputs", nargs="+", help="Audio files, folders or glob patterns")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Decode/preprocess threads (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_PARTIALS,
+                        help="Partial windows per encoder forward pass")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Torch intra-op threads for the encoder (default: torch's choice)")
+    parser.add_argument("--output", help="Save embeddings to this .npz (paths + matrix)")
+    parser.add_argument("--enroll", action="store_true",
+                        help="Enroll each file as a speaker named after the file")
+    parser.add_argument("--by-folder", action="store_true",
+                        help="With --enroll, name speakers after their folder and average their files")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the embedding cache")
+    args = parser.parse_args(argv)
+
+    paths = collect_audio_files(args.inputs)
+    if not paths:
+        print("[FATAL] No audio files found.")
+        return 1
+    if args.threads:
+        import torch
+
+        torch.set_num_threads(args.threads)
+
+    print(f"[INFO] Embedding {len(paths)} file(s)...")
+    start = time.perf_counter()
+    embeddings = embed_files(paths, workers=args.workers, batch_partials=args.batch_size,
+                             use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - start
+    done = sum(e is not None for e in embeddings)
+    print(f"[+] Embedded {done}/{len(paths)} file(s) in {elapsed:.1f}s "
+          f"({done / max(elapsed, 1e-9):.1f} files/s)")
+
+    if args.output:
+        ok = [i for i, e in enumerate(embeddings) if e is not None]
+        np.savez(
+            args.output,
+            paths=np.array([paths[i] for i in ok], dtype=str),
+            embeddings=np.stack([embeddings[i] for i in ok]).astype(np.float32)
+            if ok else np.zeros((0, 256), np.float32),
+        )
+        print(f"[+] Saved embeddings to {args.output}")
+    if args.enroll:
+        names = enroll(paths, embeddings, by_folder=args.by_folder)
+        print(f"[+] Enrolled {len(names)} speaker(s) into {SPEAKER_DB_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
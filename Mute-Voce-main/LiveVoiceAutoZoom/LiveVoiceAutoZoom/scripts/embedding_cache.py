@@ -0,0 +1,104 @@
+"""On-disk cache of speaker embeddings keyed by audio content.
+
+Entries are ``.npz`` files named after a SHA-256 over the audio content and
+the encoder/preprocessing parameters, so the same recording embedded with
+the same settings is read back instead of recomputed, whatever its file
+name. Each entry stores the utterance embedding, the partial embeddings and
+the partial window bounds (in 16 kHz samples of the preprocessed audio).
+
+The cache is bounded by ``max_bytes``; reads refresh an entry's mtime and
+the least recently used entries are evicted first.
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+import numpy as np
+
+CACHE_DIR = "cache/embeddings"
+MAX_BYTES = 256 * 1024 * 1024
+
+
+def file_content_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def array_content_hash(audio, sample_rate):
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    digest = hashlib.sha256(audio.tobytes())
+    digest.update(str(int(sample_rate)).encode("ascii"))
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._total = sum(
+            entry.stat().st_size for entry in os.scandir(path) if entry.name.endswith(".npz")
+        )
+
+    @staticmethod
+    def key(content_hash, params):
+        """Combine an audio hash with encoder/preprocessing ``params``."""
+        blob = json.dumps(params, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(content_hash.encode("ascii") + blob).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, f"{key}.npz")
+
+    def get(self, key):
+        """Return ``{"embed", "partials", "splits"}`` or ``None`` on a miss."""
+        path = self._entry_path(key)
+        try:
+            with np.load(path) as data:
+                entry = {name: data[name] for name in data.files}
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, key, embed, partials=None, splits=None):
+        path = self._entry_path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        arrays = {"embed": np.asarray(embed, dtype=np.float32)}
+        if partials is not None:
+            arrays["partials"] = np.asarray(partials, dtype=np.float32)
+        if splits is not None:
+            arrays["splits"] = np.asarray(splits, dtype=np.int64)
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        size = os.path.getsize(tmp)
+        with self._lock:
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp, path)
+            self._total += size - previous
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(
+            (entry for entry in os.scandir(self.path) if entry.name.endswith(".npz")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        total = sum(entry.stat().st_size for entry in entries)
+        # Shrink to 90% so a full cache does not evict on every write
+        target = int(self.max_bytes * 0.9)
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                pass
+        self._total = total
@@ -0,0 +1,279 @@
+"""Single-pass speaker and voice feature extraction.
+
+The enhanced session file is decoded once, in chunks. Each chunk is
+resampled once to 16 kHz by one continuous ``resampling.StreamResampler``
+(no artefacts at chunk edges), and that copy feeds every consumer:
+
+* ``PartialEmbedder`` – brought towards -30 dBFS by one running gain (see
+  ``PartialEmbedder._level``), cut into the encoder's partial windows (1.3
+  per second, as ``VoiceEncoder.embed_utterance``) and embedded as soon as
+  a window is complete.
+* ``VoiceFeatures`` – spectral centroid ("voice colour") on the 16 kHz
+  chunk, and pitch (YIN) on a copy decimated to 8 kHz, restricted to the
+  frames webrtcvad marks as speech.
+
+``StreamingSession`` feeds both with the same 16 kHz audio while recording.
+Once the partials are clustered, ``speaker_features`` measures pitch and
+colour again per speaker.
+
+Peak memory is one chunk's working set (about 50 MB for a 30 s chunk at
+44.1 kHz without embedding) whatever the session length, instead of a
+float64 copy of the whole file per decode.
+"""
+
+import numpy as np
+import soundfile as sf
+
+from embedding_cache import file_content_hash
+from resampling import MODEL_RATE, StreamResampler, resample
+from speaker_recognition import embed_mel_partials, embedding_params, get_embedding_cache
+from vad_frames import FRAME_DURATION, VAD_MODE, frame_runs, voiced_frame_mask
+
+CHUNK_SECONDS = 30
+EMBED_RATE = MODEL_RATE
+PARTIALS_PER_SECOND = 1.3  # same window rate as VoiceEncoder.embed_utterance
+MIN_TAIL_COVERAGE = 0.75  # embed a final short window if it is this full
+TARGET_DBFS = -30  # preprocess_wav's volume normalization target
+PITCH_RATE = 8000  # webrtcvad supports 8 kHz; plenty for a 50-500 Hz pitch
+PITCH_FRAME = 512  # YIN frame at PITCH_RATE (64 ms, ~2048 at 44.1 kHz)
+FMIN = 50
+FMAX = 500
+
+
+class PartialEmbedder:
+    """Incremental version of ``embed_utterance`` for audio that arrives in pieces."""
+
+    def __init__(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._offset = 0  # 16 kHz samples consumed before _pending
+        self._partials = []
+        self._windows = []
+        self._resampler = None
+        self._energy = 0.0  # sum of squares of the 16 kHz audio so far
+        self._samples = 0
+
+    @property
+    def partial_count(self):
+        return sum(len(p) for p in self._partials)
+
+    @property
+    def windows(self):
+        """``(n, 2)`` ``[start, stop)`` of each partial, in 16 kHz input samples."""
+        if not self._windows:
+            return np.zeros((0, 2), dtype=np.int64)
+        return np.concatenate(self._windows)
+
+    def add(self, wav, sample_rate):
+        """Append audio; returns ``(partials, windows)`` completed by it, or ``None``."""
+        if len(wav) == 0:
+            return None
+        if self._resampler is None:
+            self._resampler = StreamResampler(sample_rate, EMBED_RATE)
+        return self._append(self._level(self._resampler.process(wav)))
+
+    def _level(self, wav):
+        """Apply the increase-only gain to ``TARGET_DBFS`` of the audio so far.
+
+        ``preprocess_wav`` normalizes the whole file; normalizing each chunk
+        on its own would give every chunk a different gain. The running
+        level converges to the file's and only changes slowly between chunks.
+        """
+        self._energy += float(np.dot(wav, wav))
+        self._samples += len(wav)
+        if self._energy == 0.0:
+            return wav
+        change = TARGET_DBFS - 10 * np.log10(self._energy / self._samples)
+        return wav * np.float32(10 ** (change / 20)) if change > 0 else wav
+
+    def _append(self, wav):
+        self._pending = np.concatenate([self._pending, wav.astype(np.float32)])
+        return self._embed_ready()
+
+    def _embed_ready(self, final=False):
+        from resemblyzer.audio import wav_to_mel_spectrogram
+        from resemblyzer.hparams import mel_window_step, partials_n_frames
+
+        samples_per_frame = int(EMBED_RATE * mel_window_step / 1000)
+        frame_step = int(round((EMBED_RATE / PARTIALS_PER_SECOND) / samples_per_frame))
+        # Stay clear of the last frames, whose centred STFT windows would
+        # still change when more audio arrives
+        n_frames = len(self._pending) // samples_per_frame - 1
+        n_windows = max(0, (n_frames - partials_n_frames) // frame_step + 1)
+        if final and n_windows == 0 and len(self._pending) and (
+            not self._partials or n_frames >= MIN_TAIL_COVERAGE * partials_n_frames
+        ):
+            # Pad the last short stretch to one full window
+            needed = (partials_n_frames + 1) * samples_per_frame
+            self._pending = np.pad(self._pending, (0, max(0, needed - len(self._pending))))
+            n_windows = 1
+        if n_windows == 0:
+            return None
+
+        mel = wav_to_mel_spectrogram(self._pending)
+        mels = np.stack([
+            mel[i * frame_step:i * frame_step + partials_n_frames] for i in range(n_windows)
+        ])
+        partials = embed_mel_partials(mels)
+        starts = self._offset + np.arange(n_windows) * frame_step * samples_per_frame
+        windows = np.stack([starts, starts + partials_n_frames * samples_per_frame], axis=1)
+        self._partials.append(partials)
+        self._windows.append(windows.astype(np.int64))
+        consumed = n_windows * frame_step * samples_per_frame
+        self._pending = self._pending[consumed:]
+        self._offset += consumed
+        return partials, windows
+
+    def finish(self):
+        """Return ``(embed, partials)``, or ``(None, None)`` if there was no audio."""
+        if self._resampler is not None:
+            tail = self._resampler.flush()
+            self._resampler = None
+            if len(tail):
+                self._append(self._level(tail))
+        self._embed_ready(final=True)
+        if not self._partials:
+            return None, None
+        partials = np.concatenate(self._partials)
+        raw = partials.mean(axis=0)
+        return raw / np.linalg.norm(raw, 2), partials
+
+
+class VoiceFeatures:
+    """Running mean pitch and spectral centroid."""
+
+    def __init__(self):
+        self._f0_sum = 0.0
+        self._f0_frames = 0
+        self._centroid_sum = 0.0
+        self._centroid_frames = 0
+        self._vad = None
+
+    @property
+    def mean_f0(self):
+        return self._f0_sum / max(self._f0_frames, 1)
+
+    @property
+    def centroid(self):
+        return self._centroid_sum / max(self._centroid_frames, 1)
+
+    def _voiced_runs(self, audio):
+        import webrtcvad
+
+        if self._vad is None:
+            self._vad = webrtcvad.Vad(VAD_MODE)
+        frame_len = PITCH_RATE * FRAME_DURATION // 1000
+        mask = voiced_frame_mask(audio, PITCH_RATE, detector=self._vad)
+        return [(first * frame_len, stop * frame_len) for first, stop in frame_runs(mask)]
+
+    def update(self, chunk, sample_rate):
+        import librosa
+
+        if len(chunk) == 0:
+            return
+        centroid = librosa.feature.spectral_centroid(y=chunk, sr=sample_rate)
+        self._centroid_sum += float(centroid.sum())
+        self._centroid_frames += centroid.size
+
+        low = resample(chunk, sample_rate, PITCH_RATE)
+        for start, end in self._voiced_runs(low):
+            if end - start < PITCH_FRAME:
+                continue
+            f0 = librosa.yin(
+                low[start:end], fmin=FMIN, fmax=FMAX, sr=PITCH_RATE,
+                frame_length=PITCH_FRAME, center=False,
+            )
+            f0 = f0[np.isfinite(f0)]
+            self._f0_sum += float(f0.sum())
+            self._f0_frames += len(f0)
+
+
+def iter_chunks(path, chunk_seconds=CHUNK_SECONDS):
+    """Yield ``(mono_float32_chunk, sample_rate)`` from one decode of ``path``."""
+    info = sf.info(path)
+    frames = int(info.samplerate * chunk_seconds)
+    for block in sf.blocks(path, blocksize=frames, dtype="float32", always_2d=True):
+        yield block.mean(axis=1), info.samplerate
+
+
+def extract_features(path, embed=True, use_cache=True):
+    """Decode ``path`` once and return its embedding and voice features.
+
+    Returns ``{"embed", "partials", "windows", "mean_f0", "centroid",
+    "seconds"}`` where ``windows`` are the partial bounds in 16 kHz samples;
+    the embedding entries are ``None`` when ``embed=False`` or the file is
+    silent. Embeddings are read from / stored in the embedding cache, in
+    which case the decode only serves the voice features.
+    """
+    cache = get_embedding_cache() if embed and use_cache else None
+    cached = None
+    if cache is not None:
+        key = cache.key(file_content_hash(path), {**embedding_params(), "pipeline": "chunked"})
+        cached = cache.get(key)
+        if cached is not None and "splits" not in cached:
+            cached = None  # written before window bounds were cached
+    embedder = PartialEmbedder() if embed and cached is None else None
+    features = VoiceFeatures()
+    seconds = 0.0
+    resampler = None
+    for chunk, sample_rate in iter_chunks(path):
+        seconds += len(chunk) / sample_rate
+        if resampler is None:
+            resampler = StreamResampler(sample_rate, MODEL_RATE)
+        low = resampler.process(chunk)
+        features.update(low, MODEL_RATE)
+        if embedder is not None:
+            embedder.add(low, MODEL_RATE)
+    if resampler is not None and embedder is not None:
+        # A few samples; too short to change the features
+        embedder.add(resampler.flush(), MODEL_RATE)
+
+    embedding = partials = windows = None
+    if cached is not None:
+        embedding, partials, windows = cached["embed"], cached["partials"], cached["splits"]
+    elif embedder is not None:
+        embedding, partials = embedder.finish()
+        windows = embedder.windows
+        if cache is not None and embedding is not None:
+            cache.put(key, embedding, partials, windows)
+    return {
+        "embed": embedding,
+        "partials": partials,
+        "windows": windows,
+        "mean_f0": features.mean_f0,
+        "centroid": features.centroid,
+        "seconds": seconds,
+    }
+
+
+def speaker_features(path, windows, labels):
+    """Mean pitch and spectral centroid per speaker, ``{label: VoiceFeatures}``.
+
+    ``windows`` are the partial bounds from ``extract_features`` (16 kHz
+    samples of ``path``) and ``labels`` the speaker of each partial. Each
+    sample belongs to the partial whose window centre is nearest, and every
+    speaker's audio is measured separately. ``path`` is decoded once more,
+    without embedding.
+    """
+    labels = np.asarray(labels)
+    if len(labels) == 0:
+        return {}
+    centres = np.asarray(windows, dtype=np.float64).mean(axis=1)
+    # Sample positions where the speaker changes, and who speaks from there
+    change = np.flatnonzero(labels[1:] != labels[:-1])
+    bounds = ((centres[change] + centres[change + 1]) / 2).astype(np.int64)
+    speakers = np.concatenate([labels[:1], labels[change + 1]]).tolist()
+    features = {label: VoiceFeatures() for label in set(speakers)}
+
+    pos = 0
+    resampler = None
+    for chunk, sample_rate in iter_chunks(path):
+        if resampler is None:
+            resampler = StreamResampler(sample_rate, MODEL_RATE)
+        low = resampler.process(chunk)
+        cuts = bounds[(bounds > pos) & (bounds < pos + len(low))] - pos
+        edges = [0, *cuts.tolist(), len(low)]
+        first = int(np.searchsorted(bounds, pos, side="right"))
+        for run, (start, end) in enumerate(zip(edges, edges[1:]), start=first):
+            features[speakers[run]].update(low[start:end], MODEL_RATE)
+        pos += len(low)
+    return features
@@ -1,27 +1,45 @@
-
 import tkinter as tk
 from tkinter import messagebox
-import numpy as np
+import queue
 import threading
-import time
-import sounddevice as sd
+import numpy as np
+import soundfile as sf
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
-
- main
-from recorder import (
-    record_audio,
-    save_audio,
-    find_input_device,
-    list_input_devices,
+from live_identification import ID_WINDOW, LiveIdentifier
+from recorder import SAMPLE_RATE, LatestAudio, RingBufferRecorder, save_audio, list_input_devices
+from vad_enhancer import detect_voiced, enhance_audio
+from speaker_recognition import (
+    extract_embedding,
+    load_known_speakers,
+    recognize_speaker,
+    warm_up,
 )
 
-from recorder import record_audio, save_audio, find_input_device
-main
- main
-from vad_enhancer import detect_voiced, enhance_audio
-from speaker_recognition import extract_embedding, load_known_speakers, recognize_speaker
+RAW_PATH = "scripts/temp_raw.wav"
+ENHANCED_PATH = "scripts/temp_enhanced.wav"
+DISPLAY_SECONDS = 5  # width of the scrolling waveform
+DISPLAY_FPS = 30
+DISPLAY_COLUMNS = 800  # min/max envelope points, about one per pixel
+BLOCK_SECONDS = 0.05  # recorder drain size; bounds the display latency
+
+
+def peak_envelope(audio, columns=DISPLAY_COLUMNS):
+    """Interleaved min/max of ``audio`` over ``columns`` equal slices.
+
+    Plotting the result against each column's x value twice draws one
+    vertical stroke per column, so every peak stays visible however many
+    samples fall into a pixel.
+    """
+    per = max(1, len(audio) // columns)
+    frames = audio[len(audio) - per * columns:] if len(audio) >= columns else audio
+    frames = frames.reshape(-1, per)
+    envelope = np.empty(2 * len(frames), dtype=np.float32)
+    envelope[0::2] = frames.min(axis=1)
+    envelope[1::2] = frames.max(axis=1)
+    return envelope
+
 
 class VoiceRecorderGUI:
     def __init__(self, root):
@@ -29,9 +47,22 @@ class VoiceRecorderGUI:
         self.root.title("Live Voice Recorder")
         self.root.geometry("800x600")
 
+        # The waveform is one persistent line on fixed axes. Each frame only
+        # replaces its data and blits it over a cached background, instead of
+        # clearing and redrawing the whole figure.
         self.plot_fig, self.ax = plt.subplots(figsize=(8, 3))
+        self.ax.set_title("Live Waveform")
+        self.ax.set_xlim(-DISPLAY_SECONDS, 0)
+        self.ax.set_ylim(-1, 1)
+        self.ax.set_xlabel("Seconds")
+        columns = np.linspace(-DISPLAY_SECONDS, 0, DISPLAY_COLUMNS)
+        self.line, = self.ax.plot(
+            np.repeat(columns, 2), np.zeros(2 * DISPLAY_COLUMNS), lw=1, animated=True
+        )
         self.canvas = FigureCanvasTkAgg(self.plot_fig, master=self.root)
         self.canvas.get_tk_widget().pack(pady=20)
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
 
         self.speaker_label = tk.Label(root, text="Detected Speaker: ---", font=("Arial", 14))
         self.speaker_label.pack()
@@ -40,8 +71,11 @@ class VoiceRecorderGUI:
         self.log.pack(pady=10)
 
         self.recording = False
-        self.stream = None
- main
+        self.recorder = None
+        self.live = None
+        # Worker threads never touch Tk; they queue (callable, args) for the
+        # display timer to run on the main thread.
+        self.ui_queue = queue.Queue()
         devices = list_input_devices()
         if not devices:
             raise RuntimeError("No input devices available")
@@ -53,61 +87,106 @@ class VoiceRecorderGUI:
         tk.OptionMenu(root, self.device_var, *choices).pack()
         self.device_index = devices[0][0]
 
-
-        self.device_index = find_input_device()
- main
-
-
         self.start_button = tk.Button(root, text="Start Recording", command=self.start_recording)
         self.start_button.pack(side=tk.LEFT, padx=20)
 
         self.stop_button = tk.Button(root, text="Stop", command=self.stop_recording)
         self.stop_button.pack(side=tk.RIGHT, padx=20)
 
+        # Load the speaker encoder in the background so the window opens
+        # immediately and identification is ready by the time a take ends.
+        warm_up(background=True)
+        self.root.after(0, self.refresh)
+
+    # -------------------------------------------------------------- main thread
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+
+    def refresh(self):
+        """Display timer: apply queued UI updates and redraw the waveform."""
+        while True:
+            try:
+                func, args = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            func(*args)
+        if self.live is not None and self.background is not None:
+            frames = DISPLAY_SECONDS * SAMPLE_RATE
+            audio = self.live.latest(frames)
+            audio = np.pad(audio, (frames - len(audio), 0))
+            self.line.set_ydata(peak_envelope(audio))
+            self.canvas.restore_region(self.background)
+            self.ax.draw_artist(self.line)
+            self.canvas.blit(self.ax.bbox)
+        self.root.after(int(1000 / DISPLAY_FPS), self.refresh)
+
+    def post(self, func, *args):
+        self.ui_queue.put((func, args))
+
+    def write_log(self, text):
+        self.post(self.log.insert, tk.END, text)
+
+    def show_live_match(self, name, score):
+        text = name if name else "Unknown"
+        self.post(self.speaker_label.config, {"text": f"Detected Speaker: {text} ({score:.2f}, live)"})
+
     def start_recording(self):
+        if self.recording:
+            return
         self.device_index = int(self.device_var.get().split(":", 1)[0])
+        # The ring serves both the waveform and the live identification window
+        self.live = LatestAudio(max(DISPLAY_SECONDS, ID_WINDOW), SAMPLE_RATE)
+        self.recorder = RingBufferRecorder(
+            RAW_PATH, samplerate=SAMPLE_RATE, device=self.device_index,
+            block_duration=BLOCK_SECONDS, on_block=self.live.push,
+        )
+        known_speakers = load_known_speakers()
+        identifier = LiveIdentifier(self.live, known_speakers, self.show_live_match)
         self.recording = True
-        threading.Thread(target=self.record_stream).start()
+        threading.Thread(
+            target=self.record_stream, args=(self.recorder, identifier, known_speakers),
+            daemon=True,
+        ).start()
 
     def stop_recording(self):
+        if not self.recording:
+            return
         self.recording = False
+        self.recorder.stop()
         self.log.insert(tk.END, "[INFO] Recording stopped.\n")
 
-    def record_stream(self):
-        buffer = []
-        known_speakers = load_known_speakers()
-        self.log.insert(tk.END, "[INFO] Recording started...\n")
-
-        def callback(indata, frames, time_info, status):
-            if not self.recording:
-                raise sd.CallbackStop()
-            mono = indata[:, 0]
-            buffer.extend(mono)
-            self.ax.clear()
-            self.ax.plot(mono)
-            self.ax.set_title("Live Waveform")
-            self.canvas.draw()
-
-        with sd.InputStream(device=self.device_index, channels=1,
-                            samplerate=44100, dtype='float32', callback=callback):
-            while self.recording:
-                time.sleep(0.1)
-
-        audio_np = np.array(buffer, dtype=np.float32)
-        save_audio("scripts/temp_raw.wav", audio_np)
-
+    # ------------------------------------------------------------ worker thread
+    def record_stream(self, recorder, identifier, known_speakers):
+        self.write_log("[INFO] Recording started...\n")
+        identifier.start()
+        try:
+            stats = recorder.record()
+        except Exception as e:
+            self.recording = False
+            self.post(messagebox.showerror, "Recording failed", str(e))
+            return
+        finally:
+            identifier.stop()
+        if stats["dropped_frames"] or stats["input_overflows"]:
+            self.write_log(
+                f"[WARNING] {stats['dropped_frames']} frame(s) dropped, "
+                f"{stats['input_overflows']} input overflow(s)\n"
+            )
+
+        audio_np, _ = sf.read(RAW_PATH, dtype="float32")
         voiced = detect_voiced(audio_np)
         enhanced = enhance_audio(voiced)
-        save_audio("scripts/temp_enhanced.wav", enhanced)
+        save_audio(ENHANCED_PATH, enhanced)
 
-        emb = extract_embedding("scripts/temp_enhanced.wav")
+        emb = extract_embedding(ENHANCED_PATH)
         match = recognize_speaker(emb, known_speakers)
         if match:
-            self.speaker_label.config(text=f"Detected Speaker: {match}")
-            self.log.insert(tk.END, f"[MATCH] Speaker identified as: {match}\n")
+            self.post(self.speaker_label.config, {"text": f"Detected Speaker: {match}"})
+            self.write_log(f"[MATCH] Speaker identified as: {match}\n")
         else:
-            self.speaker_label.config(text="Detected Speaker: Unknown")
-            self.log.insert(tk.END, "[UNKNOWN] Speaker not recognized\n")
+            self.post(self.speaker_label.config, {"text": "Detected Speaker: Unknown"})
+            self.write_log("[UNKNOWN] Speaker not recognized\n")
 
 if __name__ == "__main__":
     root = tk.Tk()
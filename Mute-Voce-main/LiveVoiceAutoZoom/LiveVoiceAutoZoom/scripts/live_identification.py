@@ -0,0 +1,90 @@
+"""Rolling speaker identification while a take is still being recorded.
+
+``LiveIdentifier`` wakes up every ``interval`` seconds and takes the newest
+``window`` seconds from a ``recorder.LatestAudio`` ring. It embeds them in
+memory and matches the result against the known speakers. The embedding
+is smoothed across updates (an exponential moving average of the unit
+vectors), so one noisy window does not flip the reported speaker.
+Windows with no new audio or too little speech are skipped.
+"""
+
+import threading
+
+import numpy as np
+
+from speaker_recognition import embed_audio, match_speakers
+from speaker_store import normalize
+
+ID_INTERVAL = 2.0  # seconds between identifications
+ID_WINDOW = 4.0  # seconds of audio embedded each time
+ID_SMOOTHING = 0.6  # weight of the previous smoothed embedding
+ID_THRESHOLD = 0.3  # cosine distance, as recognize_speaker()
+SILENCE_RMS = 1e-3
+
+
+class LiveIdentifier:
+    """Identify the current speaker from a live audio ring in a worker thread.
+
+    ``on_update(name, score)`` is called from the worker thread after each
+    identification; ``name`` is ``None`` when the best match is further
+    than ``threshold`` away.
+    """
+
+    def __init__(self, live, known_speakers, on_update, interval=ID_INTERVAL,
+                 window=ID_WINDOW, smoothing=ID_SMOOTHING, threshold=ID_THRESHOLD):
+        self.live = live
+        self.known_speakers = known_speakers
+        self.on_update = on_update
+        self.interval = interval
+        self.window = window
+        self.smoothing = smoothing
+        self.threshold = threshold
+        self.smoothed = None
+        self.error = None
+        self._last_frames = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.identify()
+            except Exception as e:
+                self.error = e
+                print(f"[WARNING] Live identification stopped: {e}")
+                return
+
+    def identify(self):
+        """Embed the newest window and report the smoothed best match."""
+        frames = self.live.total_frames
+        if frames == self._last_frames:
+            return None
+        self._last_frames = frames
+        audio = self.live.latest(int(self.window * self.live.samplerate))
+        if len(audio) == 0 or np.sqrt(np.mean(audio ** 2)) < SILENCE_RMS:
+            return None
+        embedding = embed_audio(audio, self.live.samplerate)
+        if embedding is None:
+            return None
+        if self.smoothed is None:
+            self.smoothed = normalize(embedding)
+        else:
+            self.smoothed = normalize(
+                self.smoothing * self.smoothed + (1.0 - self.smoothing) * normalize(embedding)
+            )
+        best = match_speakers(self.smoothed, self.known_speakers, k=1)
+        if not best:
+            return None
+        name, score = best[0]
+        if 1.0 - score >= self.threshold:
+            name = None
+        self.on_update(name, score)
+        return name, score
@@ -2,11 +2,9 @@ import os
 import sys
 import time
 import argparse
-import csv
 
 import warnings
 import numpy as np
-import sounddevice as sd
 import soundfile as sf
 
 # Suppress pkg_resources deprecation warnings triggered by webrtcvad
@@ -15,39 +13,51 @@ warnings.filterwarnings(
     message="pkg_resources is deprecated as an API",
     category=UserWarning,
 )
-from speaker_recognition import cluster_unknown_embeddings
-from vad_enhancer import detect_voiced, enhance_audio as vad_enhance
-
-from resemblyzer import VoiceEncoder, preprocess_wav
-
-from recorder import find_input_device, list_input_devices, select_input_device
-from speaker_recognition import cluster_unknown_embeddings
-from vad_enhancer import detect_voiced, enhance_audio as vad_enhance
-
-
-
-    raise RuntimeError("No input device with recording channels available.")
+from recorder import (
+    RingBufferRecorder,
+    find_input_device,
+    list_input_devices,
+    select_input_device,
+)
+from recording_sink import (
+    DEFAULT_FORMAT,
+    DEFAULT_SEGMENT_SECONDS,
+    FORMATS,
+    SegmentedSink,
+    session_segments,
+)
+from session_catalog import CATALOG_PATH, connect, record_session, recorded_at_of
+from session_pipeline import StreamingSession
+from feature_extraction import extract_features, speaker_features
+from online_diarization import OnlineDiarizer, VoicedMap, save_timeline, talk_time
+from speaker_recognition import cluster_unknown_embeddings, warm_up
+from vad_enhancer import FRAME_DURATION as VAD_FRAME_DURATION, detect_voiced, enhance_audio as vad_enhance
+from voiceprint_index import INDEX_PATH, VoiceprintIndex
 
 
 RECORD_SECONDS = 74 * 60  # 4440 seconds
 SAMPLE_RATE = 44100
 CHANNELS = 1
 SESSION_ID = time.strftime("%Y%m%d_%H%M%S")
-RECORD_PATH = f"recordings/session_{SESSION_ID}.wav"
+RECORD_BASE = f"recordings/session_{SESSION_ID}"
 ENHANCE_PATH = f"enhanced/session_{SESSION_ID}_enhanced.wav"
 FINGERPRINT_PATH = f"fingerprints/voiceprint_{SESSION_ID}.npy"
-LOG_PATH = f"logs/session_{SESSION_ID}.log"
-CSV_LOG_PATH = "logs/fingerprints.csv"
-SPEAKER_SUMMARY_CSV = "logs/speaker_summary.csv"
+TIMELINE_PATH = f"logs/timeline_{SESSION_ID}.json"
 
 
-def record_audio(filename, duration, samplerate, channels, device_idx, block_duration=10):
+def record_audio(base, duration, samplerate, channels, device_idx, block_duration=10,
+                 on_block=None, fmt=DEFAULT_FORMAT, segment_seconds=DEFAULT_SEGMENT_SECONDS):
     """Record audio directly to disk to avoid large memory use.
 
+    The audio callback only fills a ring buffer; a writer thread does the
+    disk writes (see ``recorder.RingBufferRecorder``) into rotating segment
+    files (see ``recording_sink.SegmentedSink``).
+
     Parameters
     ----------
-    filename : str
-        Path to output WAV file.
+    base : str
+        Output path without extension; segments are ``<base>_NNNN.<ext>``
+        and the session index is ``<base>.json``.
     duration : int or float
         Recording duration in seconds.
     samplerate : int
@@ -58,129 +68,181 @@ def record_audio(filename, duration, samplerate, channels, device_idx, block_dur
         Index of the input device.
     block_duration : float, optional
         Duration of blocks written to disk in seconds.
+    on_block : callable, optional
+        Called from the writer thread with each block written to disk
+        (e.g. ``StreamingSession.feed``).
+    fmt : str, optional
+        ``"flac"``, ``"pcm24"`` or ``"float"`` (32-bit float WAV).
+    segment_seconds : float, optional
+        Length of each segment file; 0 writes a single file.
+
+    Returns
+    -------
+    tuple
+        ``(index_path, frames)``: the session index and the number of
+        frames actually recorded (0 if no audio arrived).
     """
 
     print(f"[+] Recording {duration}s from Zoom H6 (Device {device_idx})...")
-    block_frames = int(samplerate * block_duration)
-
-    with sf.SoundFile(
-        filename, mode="w", samplerate=samplerate, channels=channels, subtype="FLOAT"
-    ) as f:
-
-        def callback(indata, frames, time_info, status):
-            if status:
-                print(f"[WARNING] Input status: {status}")
-            f.write(indata.copy())
-
-        with sd.InputStream(
-            samplerate=samplerate,
-            channels=channels,
-            device=device_idx,
-            dtype="float32",
-            blocksize=block_frames,
-            callback=callback,
-        ):
-            sd.sleep(int(duration * 1000))
-
-
-
-def record_audio(filename, duration, samplerate, channels, device_idx):
-    print(f"[+] Recording {duration}s from device {device_idx}...")
-    audio = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=channels, device=device_idx)
-    sd.wait()
-    sf.write(filename, audio, samplerate)
-
-    print(f"[+] Saved to {filename}")
+    sink = SegmentedSink(
+        base,
+        samplerate,
+        channels,
+        fmt=fmt,
+        segment_seconds=segment_seconds,
+        on_segment_closed=lambda path, entry: print(f"[+] Segment saved to {path}"),
+    )
+    recorder = RingBufferRecorder(
+        samplerate=samplerate,
+        channels=channels,
+        device=device_idx,
+        block_duration=block_duration,
+        on_block=on_block,
+        sink=sink,
+    )
+    recorder.record(duration)
+    recorder.report()
 
+    print(f"[+] Saved to {sink.index_path}")
+    return sink.index_path, sink.total_frames
 
-def enhance_audio(input_file, output_file):
-    """Apply VAD-based enhancement with mid-range boost."""
-    data, sr = sf.read(input_file)
-    voiced = detect_voiced(data, sr)
-    enhanced = vad_enhance(voiced, sr)
 
-    sf.write(output_file, enhanced.astype("float32"), sr, subtype="FLOAT")
+def enhance_audio(input_files, output_file, voiced_map=None):
+    """Apply VAD-based enhancement with mid-range boost.
 
-    sf.write(output_file, enhanced.astype('float32'), sr, subtype='FLOAT')
+    ``input_files`` is a single recording or the ordered segment files of a
+    session; segments are enhanced one at a time and appended to
+    ``output_file``. If given, ``voiced_map`` (an
+    ``online_diarization.VoicedMap``) records where the kept audio came from.
+    """
+    if isinstance(input_files, str):
+        input_files = [input_files]
+    out = None
+    offset = 0
+    try:
+        for input_file in input_files:
+            data, sr = sf.read(input_file)
+            voiced, mask = detect_voiced(data, sr, return_mask=True)
+            if voiced_map is not None:
+                voiced_map.add_block(offset, mask, int(sr * VAD_FRAME_DURATION / 1000))
+            offset += len(data)
+            enhanced = vad_enhance(voiced, sr)
+            if out is None:
+                out = sf.SoundFile(
+                    output_file, mode="w", samplerate=sr, channels=1, subtype="FLOAT"
+                )
+            out.write(enhanced.astype("float32"))
+    finally:
+        if out is not None:
+            out.close()
 
     print(f"[+] Enhanced audio saved to {output_file}")
     return output_file
 
 
-def fingerprint_audio(file_path):
-    """Create embeddings and log per-speaker fingerprints."""
-    wav = preprocess_wav(file_path)
-    encoder = VoiceEncoder()
-    embed, partials, _ = encoder.embed_utterance(wav, return_partials=True)
-    np.save(FINGERPRINT_PATH, embed)
-    print(f"[+] Fingerprint saved to {FINGERPRINT_PATH}")
-
-    # Log acoustic features
-    try:
-        import librosa
-
-        y, _ = librosa.load(file_path, sr=SAMPLE_RATE)
-        f0 = librosa.yin(y, fmin=50, fmax=500, sr=SAMPLE_RATE)
-        mean_f0 = float(np.nanmean(f0))
-        centroid = float(
-            np.mean(librosa.feature.spectral_centroid(y=y, sr=SAMPLE_RATE))
-        )
-        row = {
-            "session_id": SESSION_ID,
-            "fingerprint_file": os.path.basename(FINGERPRINT_PATH),
-            "samplerate": SAMPLE_RATE,
-            "format": "float32",
-            "mean_freq": round(mean_f0, 2),
-            "voice_color": round(centroid, 2),
-        }
-        exists = os.path.exists(CSV_LOG_PATH)
-        with open(CSV_LOG_PATH, "a", newline="") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=row.keys())
-            if not exists:
-                writer.writeheader()
-            writer.writerow(row)
-    except Exception as e:
-        print(f"[WARNING] Failed to log fingerprint details: {e}")
-
-
+def fingerprint_audio(file_path, voiced_map=None):
+    """Create embeddings and log per-speaker fingerprints.
 
-    # Cluster partial embeddings to separate speakers
-
-    n_clusters = min(5, len(partials)) or 1
-    labels = cluster_unknown_embeddings(partials, n_clusters=n_clusters)
-    speaker_files = []
+    The file is decoded once; the embedder and the acoustic features share
+    each chunk (see ``feature_extraction``). ``voiced_map`` from
+    ``enhance_audio`` places the speaker timeline on the recording clock.
+    """
+    result = extract_features(file_path)
+    if result["embed"] is None:
+        raise RuntimeError(f"No speech found in {file_path}")
+    if voiced_map is None:
+        voiced_map = VoicedMap(SAMPLE_RATE)
+    diarizer = OnlineDiarizer()
+    diarizer.update(result["partials"], voiced_map.window_spans(result["windows"]))
+    result["diarizer"] = diarizer
+    return fingerprint_session(result)
+
+
+def fingerprint_session(result):
+    """Save fingerprints from ``extract_features`` or ``StreamingSession`` results.
+
+    Returns a summary (voiceprints, features, timeline) for the session
+    catalog. Features are listed for the whole session and for each
+    speaker, measured on ``ENHANCE_PATH``.
+    """
+    np.save(FINGERPRINT_PATH, result["embed"])
+    print(f"[+] Fingerprint saved to {FINGERPRINT_PATH}")
+    labels, voiceprints = save_speaker_fingerprints(result["partials"])
+    turns = result["diarizer"].finish(labels)
+    save_timeline(TIMELINE_PATH, SESSION_ID, turns)
+    print(f"[+] Speaker timeline ({len(turns)} turns) saved to {TIMELINE_PATH}")
+
+    talk = talk_time(turns)
+    for voiceprint in voiceprints:
+        voiceprint["talk_time"] = round(talk.get(voiceprint["speaker"], 0.0), 2)
+    features = [{
+        "speaker": None,
+        "mean_f0": round(float(result["mean_f0"]), 2),
+        "voice_color": round(float(result["centroid"]), 2),
+    }]
+    for label, voice in sorted(speaker_features(ENHANCE_PATH, result["windows"], labels).items()):
+        features.append({
+            "speaker": int(label) + 1,
+            "mean_f0": round(voice.mean_f0, 2),
+            "voice_color": round(voice.centroid, 2),
+        })
+    voiceprints.insert(0, {
+        "file": os.path.basename(FINGERPRINT_PATH),
+        "speaker": None,
+        "talk_time": round(sum(talk.values()), 2),
+        "embedding": result["embed"],
+    })
+    return {
+        "embed": result["embed"],
+        "voiceprints": voiceprints,
+        "features": features,
+        "turns": turns,
+    }
+
+
+def save_speaker_fingerprints(partials):
+    """Cluster partial embeddings into speakers and save one voiceprint each.
+
+    Returns the per-partial labels and the saved voiceprints.
+    """
+    # The number of speakers is estimated from the data
+    labels = cluster_unknown_embeddings(partials)
+    voiceprints = []
     for idx in sorted(set(labels)):
         speaker_embedding = partials[labels == idx].mean(axis=0)
 
         out_file = f"fingerprints/voiceprint_{SESSION_ID}_speaker{idx + 1}.npy"
         np.save(out_file, speaker_embedding)
-        speaker_files.append(os.path.basename(out_file))
-
-        out_file = f"fingerprints/voiceprint_{SESSION_ID}_speaker{idx+1}.npy"
-        np.save(out_file, speaker_embedding)
-        speaker_files.append(os.path.basename(out_file))
+        voiceprints.append({
+            "file": os.path.basename(out_file),
+            "speaker": int(idx) + 1,
+            "embedding": speaker_embedding,
+        })
+    print(f"[+] {len(voiceprints)} speaker voiceprint(s) saved to fingerprints/")
+    return labels, voiceprints
 
-    # Log speaker summary
 
-    exists = os.path.exists(SPEAKER_SUMMARY_CSV)
-    with open(SPEAKER_SUMMARY_CSV, "a", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        if not exists:
-            writer.writerow(["session_id", "num_speakers", "speaker_files"])
-        writer.writerow([SESSION_ID, len(set(labels)), ";".join(speaker_files)])
+def compare_with_existing(voiceprints):
+    """Match this session's voiceprints against those of earlier sessions.
 
-    return embed
-
-
-def compare_with_existing(embed):
-    match_log = []
-    for f in os.listdir("fingerprints"):
-        if f.endswith(".npy") and SESSION_ID not in f:
-            ref = np.load(os.path.join("fingerprints", f))
-            similarity = np.inner(embed, ref)
-            if similarity > 0.75:
-                match_log.append(f"Match with {f}: similarity {similarity:.2f}")
-    return match_log
+    Uses the persistent ANN index in ``fingerprints/``; voiceprints saved
+    since the last run (including this session's) are added to it first.
+    Returns match dicts for the session catalog.
+    """
+    index = VoiceprintIndex.load(INDEX_PATH)
+    if index.sync_directory("fingerprints"):
+        index.save(INDEX_PATH)
+    matches = []
+    for voiceprint in voiceprints:
+        for f, similarity in index.search(
+            voiceprint["embedding"], threshold=0.75, exclude=lambda f: SESSION_ID in f
+        ):
+            matches.append({
+                "voiceprint": voiceprint["file"],
+                "matched_file": f,
+                "similarity": round(similarity, 4),
+            })
+    return matches
 
 
 if __name__ == "__main__":
@@ -211,6 +273,23 @@ if __name__ == "__main__":
         default=10.0,
         help="Duration of blocks written to disk",
     )
+    parser.add_argument(
+        "--format",
+        choices=sorted(FORMATS),
+        default=DEFAULT_FORMAT,
+        help="Recording format: flac, pcm24 (24-bit WAV) or float (32-bit float WAV)",
+    )
+    parser.add_argument(
+        "--segment-seconds",
+        type=float,
+        default=DEFAULT_SEGMENT_SECONDS,
+        help="Length of each recording segment file (0 = one file)",
+    )
+    parser.add_argument(
+        "--no-streaming",
+        action="store_true",
+        help="Analyze the recording after it ends instead of while recording",
+    )
     args = parser.parse_args()
 
     if args.list_devices:
@@ -231,36 +310,66 @@ if __name__ == "__main__":
         else:
             device_index = find_input_device(args.device_name)
 
-
-        record_audio(
-            RECORD_PATH,
+        # Load the speaker encoder while the session is being recorded
+        warm_up(background=True)
+        session = None
+        if not args.no_streaming:
+            session = StreamingSession(SAMPLE_RATE, ENHANCE_PATH).start()
+        index_path, frames = record_audio(
+            RECORD_BASE,
             args.duration,
             SAMPLE_RATE,
             CHANNELS,
             device_index,
             args.block_duration,
+            on_block=session.feed if session else None,
+            fmt=args.format,
+            segment_seconds=args.segment_seconds,
         )
-
-        record_audio(RECORD_PATH, RECORD_SECONDS, SAMPLE_RATE, CHANNELS, device_index)
-
-        if args.device is not None:
-            try:
-                device_index = int(args.device)
-            except ValueError:
-                device_index = find_input_device(args.device)
+        if frames == 0:
+            if session is not None:
+                session.finish()
+                if os.path.exists(ENHANCE_PATH):
+                    os.remove(ENHANCE_PATH)
+            print("[ERROR] No audio recorded; check the input device")
+            sys.exit(1)
+
+        result = None
+        if session is not None:
+            print(f"[INFO] Finishing streaming analysis ({session.backlog} block(s) queued)...")
+            result = session.finish()
+            if result is None:
+                print("[WARNING] Streaming analysis unavailable, processing the recording instead")
+        if result is not None:
+            print(f"[+] Enhanced audio saved to {ENHANCE_PATH}")
+            summary = fingerprint_session(result)
         else:
-            device_index = find_input_device()
-
-        record_audio(RECORD_PATH, args.duration, SAMPLE_RATE, CHANNELS, device_index, args.block_duration)
-
-        enhance_audio(RECORD_PATH, ENHANCE_PATH)
-        embedding = fingerprint_audio(ENHANCE_PATH)
-        matches = compare_with_existing(embedding)
-
-        with open(LOG_PATH, "w") as f:
-            f.write(f"Session: {SESSION_ID}\n")
-            f.write("\n".join(matches))
-            print(f"[+] Log written to {LOG_PATH}")
+            voiced_map = VoicedMap(SAMPLE_RATE)
+            enhance_audio(session_segments(index_path), ENHANCE_PATH, voiced_map)
+            summary = fingerprint_audio(ENHANCE_PATH, voiced_map)
+        matches = compare_with_existing(summary["voiceprints"])
+        for match in matches:
+            print(f"[MATCH] {match['voiceprint']} ~ {match['matched_file']}: "
+                  f"similarity {match['similarity']:.2f}")
+
+        conn = connect(CATALOG_PATH)
+        try:
+            record_session(
+                conn,
+                SESSION_ID,
+                recorded_at=recorded_at_of(SESSION_ID),
+                duration=frames / SAMPLE_RATE,
+                sample_rate=SAMPLE_RATE,
+                recording=index_path,
+                enhanced=ENHANCE_PATH,
+                voiceprints=summary["voiceprints"],
+                features=summary["features"],
+                matches=matches,
+                turns=summary["turns"],
+            )
+        finally:
+            conn.close()
+        print(f"[+] Session catalogued in {CATALOG_PATH}")
     except Exception as e:
         print(f"[ERROR] {e}")
 
@@ -11,8 +11,9 @@ def run_gui():
 def run_cli():
     from recorder import record_audio, save_audio
     from vad_enhancer import detect_voiced, enhance_audio
-    from speaker_recognition import extract_embedding, load_known_speakers, recognize_speaker
+    from speaker_recognition import extract_embedding, load_known_speakers, recognize_speaker, warm_up
 
+    warm_up(background=True)
     print("[CLI MODE] Recording 10 seconds...")
     audio = record_audio(10)
     save_audio("scripts/temp_raw.wav", audio)
@@ -0,0 +1,212 @@
+"""Online speaker-change detection and per-session turn timelines.
+
+Partial embeddings are computed on the voiced-only (enhanced) audio.
+``VoicedMap`` remembers where each voiced run came from in the recording,
+so a partial window can be placed on the session clock.
+
+``OnlineDiarizer`` takes the partials in order as they are produced. It
+compares each one with a rolling centroid of the current turn and, after
+``CHANGE_PATIENCE`` consecutive partials below ``CHANGE_THRESHOLD``,
+closes the turn where the change began. At the end of the session,
+``finish()`` labels each turn with the majority of the session clustering
+labels (so speaker numbers match the ``voiceprint_<session>_speakerN.npy``
+files) and merges neighbouring turns of the same speaker. The confidence
+is the mean cosine similarity of the turn's partials to that speaker's
+centroid.
+
+Timelines are written as JSON::
+
+    {"session_id": "...", "turns": [
+        {"start": 12.3, "end": 20.1, "speaker": 1, "confidence": 0.82}, ...]}
+
+Run ``python online_diarization.py logs/timeline_<session>.json`` to print a
+timeline or per-speaker talk time without touching the audio.
+"""
+
+import os
+import json
+import argparse
+from collections import deque
+
+import numpy as np
+
+from resampling import MODEL_RATE
+from speaker_store import normalize
+
+CHANGE_THRESHOLD = 0.60  # similarity to the current turn below which a change is suspected
+CHANGE_PATIENCE = 2  # consecutive suspect partials that confirm a change
+TURN_CONTEXT = 8  # partials in the rolling turn centroid
+
+
+class VoicedMap:
+    """Map positions in the voiced-only stream back to session time."""
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self._voiced_starts = []
+        self._session_starts = []
+        self.voiced_samples = 0
+
+    def add_block(self, session_offset, frame_mask, frame_len):
+        """Record the voiced frames of a block starting at ``session_offset``."""
+        edges = np.diff(np.concatenate([[0], np.asarray(frame_mask, dtype=int), [0]]))
+        for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+            self._voiced_starts.append(self.voiced_samples)
+            self._session_starts.append(session_offset + int(start) * frame_len)
+            self.voiced_samples += int(end - start) * frame_len
+
+    def to_session(self, voiced_positions):
+        """Convert voiced-stream sample positions to session seconds."""
+        positions = np.asarray(voiced_positions, dtype=np.float64)
+        if not self._voiced_starts:
+            return positions / self.sample_rate
+        voiced_starts = np.asarray(self._voiced_starts)
+        run = np.clip(np.searchsorted(voiced_starts, positions, side="right") - 1, 0, None)
+        session = np.asarray(self._session_starts)[run] + (positions - voiced_starts[run])
+        return session / self.sample_rate
+
+    def window_spans(self, windows):
+        """``(n, 3)`` session-time start/centre/end for 16 kHz partial windows."""
+        windows = np.asarray(windows, dtype=np.float64) * (self.sample_rate / MODEL_RATE)
+        centre = windows.mean(axis=1)
+        # The end of a window is mapped from its last sample so a run
+        # boundary at the very end does not jump to the next run
+        return np.stack([
+            self.to_session(windows[:, 0]),
+            self.to_session(centre),
+            self.to_session(np.maximum(windows[:, 1] - 1, windows[:, 0])),
+        ], axis=1)
+
+
+class OnlineDiarizer:
+    def __init__(self, threshold=CHANGE_THRESHOLD, patience=CHANGE_PATIENCE,
+                 context=TURN_CONTEXT):
+        self.threshold = threshold
+        self.patience = patience
+        self._partials = []
+        self._spans = []
+        self._window = deque(maxlen=context)
+        self._suspect = 0
+        self._turn_start = 0
+        self.boundaries = []  # partial index where each new turn begins
+
+    def __len__(self):
+        return len(self._partials)
+
+    def update(self, partials, spans):
+        """Add partial embeddings with their ``(start, centre, end)`` session times."""
+        for partial, span in zip(normalize(np.atleast_2d(partials)), np.atleast_2d(spans)):
+            index = len(self._partials)
+            self._partials.append(partial)
+            self._spans.append(span)
+            if self._window:
+                similarity = float(normalize(np.sum(self._window, axis=0)) @ partial)
+                if similarity < self.threshold:
+                    self._suspect += 1
+                    if self._suspect < self.patience:
+                        continue  # keep suspects out of the turn centroid
+                    change = index - self.patience + 1
+                    self.boundaries.append(change)
+                    self._turn_start = change
+                    self._window.clear()
+                    self._window.extend(self._partials[change:])
+                    self._suspect = 0
+                    continue
+                self._suspect = 0
+            self._window.append(partial)
+
+    @property
+    def current_turn_start(self):
+        """Session time where the current (open) turn began, or ``None``."""
+        if not self._spans:
+            return None
+        return float(self._spans[self._turn_start][0])
+
+    def finish(self, labels=None):
+        """Return the turn timeline as a list of dicts.
+
+        ``labels`` gives a speaker label (0-based) per partial; without it
+        every turn is its own provisional speaker.
+        """
+        if not self._partials:
+            return []
+        partials = np.stack(self._partials)
+        spans = np.stack(self._spans)
+        if labels is None:
+            labels = np.zeros(len(partials), dtype=np.int64)
+            for number, start in enumerate(self.boundaries, 1):
+                labels[start:] = number
+        labels = np.asarray(labels)
+        centroids = {
+            label: normalize(partials[labels == label].mean(axis=0))
+            for label in np.unique(labels)
+        }
+
+        bounds = [0] + self.boundaries + [len(partials)]
+        turns = []
+        for first, stop in zip(bounds[:-1], bounds[1:]):
+            if stop <= first:
+                continue
+            values, counts = np.unique(labels[first:stop], return_counts=True)
+            speaker = values[np.argmax(counts)]
+            if turns and turns[-1]["label"] == speaker:
+                turns[-1]["stop"] = stop
+            else:
+                turns.append({"label": speaker, "first": first, "stop": stop})
+
+        timeline = []
+        for i, turn in enumerate(turns):
+            first, stop = turn["first"], turn["stop"]
+            start = spans[first][0] if i == 0 else timeline[-1]["end"]
+            if i + 1 < len(turns):
+                # Windows overlap; split at the midpoint between the turns
+                end = (spans[stop - 1][1] + spans[turns[i + 1]["first"]][1]) / 2
+            else:
+                end = spans[stop - 1][2]
+            confidence = float(np.mean(partials[first:stop] @ centroids[turn["label"]]))
+            timeline.append({
+                "start": round(float(start), 2),
+                "end": round(float(max(end, start)), 2),
+                "speaker": int(turn["label"]) + 1,
+                "confidence": round(confidence, 3),
+            })
+        return timeline
+
+
+def save_timeline(path, session_id, turns):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"session_id": session_id, "turns": turns}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def load_timeline(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def talk_time(turns):
+    """Return ``{speaker: seconds}`` for a timeline."""
+    totals = {}
+    for turn in turns:
+        totals[turn["speaker"]] = totals.get(turn["speaker"], 0.0) + turn["end"] - turn["start"]
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show a session speaker timeline")
+    parser.add_argument("timeline", help="logs/timeline_<session>.json")
+    parser.add_argument("--speaker", type=int, help="Only show turns of this speaker")
+    parser.add_argument("--summary", action="store_true", help="Show talk time per speaker")
+    args = parser.parse_args()
+
+    data = load_timeline(args.timeline)
+    turns = data["turns"]
+    if args.summary:
+        for speaker, seconds in sorted(talk_time(turns).items()):
+            print(f"speaker{speaker}: {seconds:8.1f}s")
+    else:
+        for turn in turns:
+            if args.speaker is None or turn["speaker"] == args.speaker:
+                print(f"{turn['start']:9.2f} - {turn['end']:9.2f}  speaker{turn['speaker']}  "
+                      f"({turn['confidence']:.2f})")
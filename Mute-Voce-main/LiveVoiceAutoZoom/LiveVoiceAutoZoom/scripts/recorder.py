@@ -1,11 +1,17 @@
 """Utility functions for recording audio from any connected microphone."""
 
+import time
+import threading
+
+import numpy as np
 import sounddevice as sd
 import soundfile as sf
 
 SAMPLE_RATE = 44100
 CHANNELS = 1
 BIT_DEPTH = "FLOAT"
+CALLBACK_FRAMES = 2048  # PortAudio block size used by RingBufferRecorder
+RING_SECONDS = 60  # minimum ring capacity
 
 
 def list_input_devices():
@@ -89,6 +95,195 @@ def record_audio(duration_sec=10, device_index=None, device_name=None):
     return audio
 
 
+class RingBufferRecorder:
+    """Record to disk without touching the filesystem in the audio callback.
+
+    The PortAudio callback only copies each block into a preallocated ring
+    buffer. A writer thread drains the ring in ``block_duration`` chunks
+    (split only where the ring wraps), writes them to ``filename`` (or to
+    ``sink``, e.g. a ``recording_sink.SegmentedSink``, in which case
+    ``filename`` is not needed) and hands
+    them to ``on_block`` (the array is a view into the ring, so copy it if
+    it is kept after the call). If the writer falls so far behind that the ring
+    fills up, new audio is dropped and counted rather than blocking the
+    callback.
+
+    After ``record()`` the ``stats`` dict holds ring overruns and dropped
+    frames, PortAudio input overflow/underflow counts, the ring high-water
+    mark and the slowest disk write.
+    """
+
+    def __init__(self, filename=None, samplerate=SAMPLE_RATE, channels=CHANNELS,
+                 device=None, block_duration=10, subtype=BIT_DEPTH, on_block=None,
+                 ring_seconds=RING_SECONDS, sink=None):
+        if filename is None and sink is None:
+            raise ValueError("RingBufferRecorder needs a filename or a sink")
+        self.filename = filename
+        self.sink = sink
+        self.samplerate = samplerate
+        self.channels = channels
+        self.device = device
+        self.subtype = subtype
+        self.on_block = on_block
+        self.write_frames = max(1, int(samplerate * block_duration))
+        capacity = max(int(samplerate * ring_seconds), 4 * self.write_frames)
+        self._ring = np.zeros((capacity, channels), dtype=np.float32)
+        # Monotonic frame counters; only the callback advances _written and
+        # only the writer thread advances _read
+        self._written = 0
+        self._read = 0
+        self._stopping = False
+        self._stop_requested = threading.Event()
+        self.stats = {
+            "ring_overruns": 0,
+            "dropped_frames": 0,
+            "input_overflows": 0,
+            "input_underflows": 0,
+            "high_water_frames": 0,
+            "slowest_write": 0.0,
+            "frames_written": 0,
+        }
+
+    @property
+    def capacity(self):
+        return len(self._ring)
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            if status.input_overflow:
+                self.stats["input_overflows"] += 1
+            if status.input_underflow:
+                self.stats["input_underflows"] += 1
+        fill = self._written - self._read
+        n = min(frames, self.capacity - fill)
+        if n < frames:
+            self.stats["ring_overruns"] += 1
+            self.stats["dropped_frames"] += frames - n
+        start = self._written % self.capacity
+        first = min(n, self.capacity - start)
+        self._ring[start:start + first] = indata[:first]
+        self._ring[:n - first] = indata[first:n]
+        self._written += n
+        if fill + n > self.stats["high_water_frames"]:
+            self.stats["high_water_frames"] = fill + n
+
+    def _drain(self, f, minimum):
+        while self._written - self._read >= minimum and self._written > self._read:
+            n = min(self._written - self._read, self.write_frames)
+            start = self._read % self.capacity
+            n = min(n, self.capacity - start)
+            block = self._ring[start:start + n]
+            began = time.perf_counter()
+            f.write(block)
+            self.stats["slowest_write"] = max(
+                self.stats["slowest_write"], time.perf_counter() - began
+            )
+            if self.on_block is not None:
+                self.on_block(block)
+            self._read += n
+            self.stats["frames_written"] += n
+
+    def _writer(self, f):
+        poll = min(0.25, self.write_frames / self.samplerate / 4)
+        while not self._stopping:
+            self._drain(f, self.write_frames)
+            time.sleep(poll)
+        self._drain(f, 1)
+
+    def stop(self):
+        """End a ``record()`` in progress (safe to call from any thread)."""
+        self._stop_requested.set()
+
+    def record(self, duration=None):
+        """Record ``duration`` seconds, or until ``stop()``; returns ``stats``."""
+        if self.sink is None:
+            self.sink = sf.SoundFile(
+                self.filename, mode="w", samplerate=self.samplerate,
+                channels=self.channels, subtype=self.subtype,
+            )
+        with self.sink as f:
+            writer = threading.Thread(target=self._writer, args=(f,), daemon=True)
+            writer.start()
+            try:
+                with sd.InputStream(
+                    samplerate=self.samplerate,
+                    channels=self.channels,
+                    device=self.device,
+                    dtype="float32",
+                    blocksize=CALLBACK_FRAMES,
+                    callback=self._callback,
+                ):
+                    self._stop_requested.wait(duration)
+            finally:
+                self._stopping = True
+                writer.join()
+        return self.stats
+
+    def report(self):
+        stats = self.stats
+        high_water = stats["high_water_frames"]
+        print(
+            f"[INFO] Recorder: ring high-water {high_water / self.samplerate:.2f}s "
+            f"of {self.capacity / self.samplerate:.0f}s "
+            f"({100 * high_water / self.capacity:.1f}%), "
+            f"slowest write {stats['slowest_write'] * 1000:.1f} ms"
+        )
+        print(
+            f"[INFO] Recorder: {stats['ring_overruns']} ring overrun(s) "
+            f"({stats['dropped_frames']} frames dropped), "
+            f"{stats['input_overflows']} input overflow(s), "
+            f"{stats['input_underflows']} input underflow(s)"
+        )
+        if stats["ring_overruns"] or stats["input_overflows"]:
+            print("[WARNING] Audio was lost during recording")
+
+
+class LatestAudio:
+    """The most recent ``seconds`` of mono audio, for live displays.
+
+    ``push`` is called by a single producer (e.g. as a recorder's
+    ``on_block``) and ``latest`` returns a copy, so readers on other threads
+    never see a half-written block.
+    """
+
+    def __init__(self, seconds, samplerate=SAMPLE_RATE):
+        self.samplerate = samplerate
+        self._ring = np.zeros(int(seconds * samplerate), dtype=np.float32)
+        self._written = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return len(self._ring)
+
+    @property
+    def total_frames(self):
+        return self._written
+
+    def push(self, block):
+        block = np.asarray(block, dtype=np.float32)
+        if block.ndim > 1:
+            block = block.mean(axis=1)
+        with self._lock:
+            if len(block) > self.capacity:
+                self._written += len(block) - self.capacity
+                block = block[-self.capacity:]
+            start = self._written % self.capacity
+            first = min(len(block), self.capacity - start)
+            self._ring[start:start + first] = block[:first]
+            self._ring[:len(block) - first] = block[first:]
+            self._written += len(block)
+
+    def latest(self, frames=None):
+        """Return up to ``frames`` of the newest audio (default: the whole ring)."""
+        with self._lock:
+            n = min(self.capacity if frames is None else frames, self.capacity, self._written)
+            end = self._written % self.capacity
+            if n <= end:
+                return self._ring[end - n:end].copy()
+            return np.concatenate([self._ring[self.capacity - (n - end):], self._ring[:end]])
+
+
 def save_audio(filename, audio_data):
     sf.write(filename, audio_data.astype("float32"), SAMPLE_RATE, subtype=BIT_DEPTH)
     print(f"[Saved] Audio to {filename}")
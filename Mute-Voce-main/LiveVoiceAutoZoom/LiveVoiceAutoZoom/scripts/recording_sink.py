@@ -0,0 +1,133 @@
+"""Session recording sink: compressed formats and rotating segment files.
+
+``SegmentedSink`` is what ``RingBufferRecorder`` writes to. Audio goes to
+``<base>_0001.flac``, ``<base>_0002.flac``, ... each ``segment_seconds``
+long (or a single ``<base>.<ext>`` when ``segment_seconds`` is 0), and a
+session index ``<base>.json`` is rewritten atomically every time a segment
+closes::
+
+    {"samplerate": 44100, "channels": 1, "format": "flac",
+     "segment_seconds": 300, "complete": false,
+     "segments": [{"path": "session_X_0001.flac", "start_frame": 0,
+                   "frames": 13230000}, ...]}
+
+If the process dies, every segment listed in the index is intact and at
+most the open segment is lost. ``on_segment_closed(path, entry)`` is called
+for each finished segment so later stages can start on it immediately.
+"""
+
+import os
+import json
+
+import numpy as np
+import soundfile as sf
+
+# name: (container, subtype, extension)
+FORMATS = {
+    "flac": ("FLAC", "PCM_24", "flac"),
+    "pcm24": ("WAV", "PCM_24", "wav"),
+    "float": ("WAV", "FLOAT", "wav"),
+}
+DEFAULT_FORMAT = "flac"
+DEFAULT_SEGMENT_SECONDS = 300
+
+
+class SegmentedSink:
+    def __init__(self, base, samplerate, channels=1, fmt=DEFAULT_FORMAT,
+                 segment_seconds=DEFAULT_SEGMENT_SECONDS, on_segment_closed=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown recording format '{fmt}' (choose from {', '.join(FORMATS)})")
+        self.base = base
+        self.samplerate = samplerate
+        self.channels = channels
+        self.format = fmt
+        self.segment_seconds = segment_seconds
+        self.segment_frames = int(segment_seconds * samplerate) if segment_seconds else 0
+        self.on_segment_closed = on_segment_closed
+        self.index_path = f"{base}.json"
+        self.segments = []
+        self._file = None
+        self._path = None
+        self._start_frame = 0
+        self._frames = 0
+
+    @property
+    def total_frames(self):
+        return self._start_frame + self._frames
+
+    def _segment_path(self, number):
+        ext = FORMATS[self.format][2]
+        if not self.segment_frames:
+            return f"{self.base}.{ext}"
+        return f"{self.base}_{number:04d}.{ext}"
+
+    def _open_segment(self):
+        container, subtype, _ = FORMATS[self.format]
+        self._path = self._segment_path(len(self.segments) + 1)
+        self._file = sf.SoundFile(
+            self._path, mode="w", samplerate=self.samplerate,
+            channels=self.channels, format=container, subtype=subtype,
+        )
+        self._frames = 0
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        entry = {
+            "path": os.path.basename(self._path),
+            "start_frame": self._start_frame,
+            "frames": self._frames,
+        }
+        self.segments.append(entry)
+        self._start_frame += self._frames
+        self._write_index(complete=False)
+        if self.on_segment_closed is not None:
+            self.on_segment_closed(self._path, entry)
+
+    def _write_index(self, complete):
+        index = {
+            "samplerate": self.samplerate,
+            "channels": self.channels,
+            "format": self.format,
+            "segment_seconds": self.segment_seconds,
+            "complete": complete,
+            "segments": self.segments,
+        }
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def write(self, block):
+        block = np.asarray(block, dtype=np.float32)
+        while len(block):
+            if self._file is None:
+                self._open_segment()
+            n = len(block)
+            if self.segment_frames:
+                n = min(n, self.segment_frames - self._frames)
+            self._file.write(block[:n])
+            self._frames += n
+            block = block[n:]
+            if self.segment_frames and self._frames >= self.segment_frames:
+                self._close_segment()
+
+    def close(self):
+        self._close_segment()
+        self._write_index(complete=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def session_segments(index_path):
+    """Return the segment file paths listed in a session index, in order."""
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    folder = os.path.dirname(index_path)
+    return [os.path.join(folder, s["path"]) for s in index["segments"]]
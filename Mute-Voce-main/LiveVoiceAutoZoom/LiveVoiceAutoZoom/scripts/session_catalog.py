@@ -0,0 +1,287 @@
+"""SQLite catalog of recorded sessions, voiceprints, features and matches.
+
+Replaces the appended ``logs/fingerprints.csv`` / ``logs/speaker_summary.csv``
+files and the free-text per-session match logs. Everything about a session
+is written in one transaction when the session ends, so a crash never
+leaves a half-recorded session behind, and the indexed tables answer
+cross-session questions without reading any audio or log files::
+
+    python session_catalog.py sessions --min-f0 180
+    python session_catalog.py sessions --min-f0 180 --speaker 2
+    python session_catalog.py sessions --with voiceprint_20240101_120000_speaker2.npy
+    python session_catalog.py matches voiceprint_20240101_120000_speaker2.npy
+    python session_catalog.py turns 20240101_120000 --speaker 2
+    python session_catalog.py import-csv
+
+Tables: ``sessions``, ``voiceprints`` (one row per saved voiceprint, with
+the embedding as float32 bytes), ``features`` (``speaker`` is NULL for the
+whole-session values), ``matches`` (cross-session voiceprint matches) and
+``turns`` (the speaker timeline).
+"""
+
+import os
+import re
+import csv
+import time
+import sqlite3
+import argparse
+
+import numpy as np
+
+CATALOG_PATH = "logs/sessions.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    recorded_at TEXT,
+    duration REAL,
+    sample_rate INTEGER,
+    recording TEXT,
+    enhanced TEXT,
+    num_speakers INTEGER
+);
+CREATE TABLE IF NOT EXISTS voiceprints (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    speaker INTEGER,
+    file TEXT UNIQUE,
+    talk_time REAL,
+    embedding BLOB
+);
+CREATE TABLE IF NOT EXISTS features (
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    speaker INTEGER,
+    mean_f0 REAL,
+    voice_color REAL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    voiceprint TEXT,
+    matched_file TEXT,
+    matched_session TEXT,
+    similarity REAL
+);
+CREATE TABLE IF NOT EXISTS turns (
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    start REAL,
+    end REAL,
+    speaker INTEGER,
+    confidence REAL
+);
+CREATE INDEX IF NOT EXISTS idx_voiceprints_session ON voiceprints(session_id);
+CREATE INDEX IF NOT EXISTS idx_features_f0 ON features(mean_f0);
+CREATE INDEX IF NOT EXISTS idx_features_session ON features(session_id);
+CREATE INDEX IF NOT EXISTS idx_matches_session ON matches(session_id);
+CREATE INDEX IF NOT EXISTS idx_matches_file ON matches(matched_file);
+CREATE INDEX IF NOT EXISTS idx_matches_matched_session ON matches(matched_session);
+CREATE INDEX IF NOT EXISTS idx_turns_session ON turns(session_id, speaker);
+"""
+
+_SESSION_IN_NAME = re.compile(r"(\d{8}_\d{6})")
+
+
+def session_of(filename):
+    """Return the session id embedded in a voiceprint file name, if any."""
+    match = _SESSION_IN_NAME.search(os.path.basename(filename))
+    return match.group(1) if match else None
+
+
+def recorded_at_of(session_id):
+    """``YYYY-MM-DD HH:MM:SS`` from a ``%Y%m%d_%H%M%S`` session id, or ``None``."""
+    try:
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.strptime(session_id, "%Y%m%d_%H%M%S"))
+    except ValueError:
+        return None
+
+
+def connect(path=CATALOG_PATH):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def record_session(conn, session_id, recorded_at=None, duration=None, sample_rate=None,
+                   recording=None, enhanced=None, voiceprints=(), features=(),
+                   matches=(), turns=()):
+    """Write everything about one session in a single transaction.
+
+    ``voiceprints`` are dicts with ``file``, ``speaker`` (None for the
+    session print), ``talk_time`` and ``embedding``; ``features`` dicts have
+    ``speaker``, ``mean_f0`` and ``voice_color``; ``matches`` dicts have
+    ``voiceprint``, ``matched_file`` and ``similarity``; ``turns`` are the
+    timeline dicts from ``online_diarization``. Re-recording a session id
+    replaces its rows.
+    """
+    speakers = {v["speaker"] for v in voiceprints if v.get("speaker") is not None}
+    with conn:
+        for table in ("voiceprints", "features", "matches", "turns"):
+            conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session_id, recorded_at, duration, sample_rate, recording, enhanced,
+             len(speakers)),
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO voiceprints (session_id, speaker, file, talk_time, embedding)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [
+                (session_id, v.get("speaker"), v["file"], v.get("talk_time"),
+                 None if v.get("embedding") is None
+                 else np.asarray(v["embedding"], dtype=np.float32).tobytes())
+                for v in voiceprints
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO features VALUES (?, ?, ?, ?)",
+            [(session_id, f.get("speaker"), f.get("mean_f0"), f.get("voice_color"))
+             for f in features],
+        )
+        conn.executemany(
+            "INSERT INTO matches VALUES (?, ?, ?, ?, ?)",
+            [(session_id, m["voiceprint"], m["matched_file"], session_of(m["matched_file"]),
+              m["similarity"]) for m in matches],
+        )
+        conn.executemany(
+            "INSERT INTO turns VALUES (?, ?, ?, ?, ?)",
+            [(session_id, t["start"], t["end"], t["speaker"], t["confidence"]) for t in turns],
+        )
+
+
+def find_sessions(conn, min_f0=None, max_f0=None, with_file=None, since=None, speaker=None):
+    """Return session rows filtered by pitch, a voiceprint and date.
+
+    The pitch filters and the returned ``mean_f0``/``voice_color`` use the
+    whole-session features, or speaker ``speaker``'s when it is given.
+    """
+    if speaker is None:
+        query = [
+            "SELECT s.id, s.recorded_at, s.duration, s.num_speakers, f.mean_f0, f.voice_color"
+            " FROM sessions s LEFT JOIN features f ON f.session_id = s.id AND f.speaker IS NULL"
+            " WHERE 1 = 1"
+        ]
+        params = []
+    else:
+        query = [
+            "SELECT s.id, s.recorded_at, s.duration, s.num_speakers, f.mean_f0, f.voice_color"
+            " FROM sessions s JOIN features f ON f.session_id = s.id AND f.speaker = ?"
+            " WHERE 1 = 1"
+        ]
+        params = [speaker]
+    if min_f0 is not None:
+        query.append("AND f.mean_f0 > ?")
+        params.append(min_f0)
+    if max_f0 is not None:
+        query.append("AND f.mean_f0 < ?")
+        params.append(max_f0)
+    if since is not None:
+        query.append("AND s.recorded_at >= ?")
+        params.append(since)
+    if with_file is not None:
+        # Sessions that matched this voiceprint, plus the session it came from
+        query.append(
+            "AND (s.id = ? OR s.id IN (SELECT session_id FROM matches WHERE matched_file = ?))"
+        )
+        params.extend([session_of(with_file), os.path.basename(with_file)])
+    query.append("ORDER BY s.id")
+    return conn.execute(" ".join(query), params).fetchall()
+
+
+def find_matches(conn, voiceprint):
+    """Every catalogued match involving ``voiceprint``, best first."""
+    name = os.path.basename(voiceprint)
+    return conn.execute(
+        "SELECT session_id, voiceprint, matched_file, similarity FROM matches"
+        " WHERE matched_file = ? OR voiceprint = ? ORDER BY similarity DESC",
+        (name, name),
+    ).fetchall()
+
+
+def session_turns(conn, session_id, speaker=None):
+    query = "SELECT start, end, speaker, confidence FROM turns WHERE session_id = ?"
+    params = [session_id]
+    if speaker is not None:
+        query += " AND speaker = ?"
+        params.append(speaker)
+    return conn.execute(query + " ORDER BY start", params).fetchall()
+
+
+def import_csv_logs(conn, fingerprints_csv="logs/fingerprints.csv",
+                    summary_csv="logs/speaker_summary.csv"):
+    """Load the old appended CSV logs into the catalog; returns sessions imported."""
+    sessions = {}
+    if os.path.exists(fingerprints_csv):
+        with open(fingerprints_csv, newline="") as f:
+            for row in csv.DictReader(f):
+                sessions.setdefault(row["session_id"], {})["features"] = row
+    if os.path.exists(summary_csv):
+        with open(summary_csv, newline="") as f:
+            for row in csv.DictReader(f):
+                sessions.setdefault(row["session_id"], {})["summary"] = row
+    for session_id, data in sessions.items():
+        voiceprints = []
+        features = []
+        if "features" in data:
+            row = data["features"]
+            voiceprints.append({"file": row["fingerprint_file"], "speaker": None})
+            features.append({
+                "speaker": None,
+                "mean_f0": float(row["mean_freq"]),
+                "voice_color": float(row["voice_color"]),
+            })
+        if "summary" in data:
+            for name in filter(None, data["summary"]["speaker_files"].split(";")):
+                number = re.search(r"speaker(\d+)", name)
+                voiceprints.append({"file": name, "speaker": int(number.group(1)) if number else None})
+        sample_rate = data.get("features", {}).get("samplerate")
+        record_session(
+            conn, session_id,
+            recorded_at=recorded_at_of(session_id),
+            sample_rate=int(sample_rate) if sample_rate else None,
+            voiceprints=voiceprints, features=features,
+        )
+    return len(sessions)
+
+
+def _print_rows(rows):
+    for row in rows:
+        print("  ".join("" if v is None else f"{v:.2f}" if isinstance(v, float) else str(v)
+                        for v in row))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the session catalog")
+    parser.add_argument("--db", default=CATALOG_PATH, help="Catalog database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("sessions", help="List sessions")
+    p.add_argument("--min-f0", type=float, help="Session mean F0 above this (Hz)")
+    p.add_argument("--max-f0", type=float, help="Session mean F0 below this (Hz)")
+    p.add_argument("--with", dest="with_file", help="Only sessions where this voiceprint appeared")
+    p.add_argument("--since", help="Recorded at or after this date (YYYY-MM-DD)")
+    p.add_argument("--speaker", type=int, help="Filter on this speaker's F0 instead of the whole session's")
+
+    p = commands.add_parser("matches", help="Cross-session matches of a voiceprint")
+    p.add_argument("voiceprint")
+
+    p = commands.add_parser("turns", help="Speaker timeline of a session")
+    p.add_argument("session_id")
+    p.add_argument("--speaker", type=int)
+
+    commands.add_parser("import-csv", help="Import logs/fingerprints.csv and speaker_summary.csv")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == "sessions":
+        _print_rows(find_sessions(conn, args.min_f0, args.max_f0, args.with_file, args.since,
+                                  args.speaker))
+    elif args.command == "matches":
+        _print_rows(find_matches(conn, args.voiceprint))
+    elif args.command == "turns":
+        _print_rows(session_turns(conn, args.session_id, args.speaker))
+    elif args.command == "import-csv":
+        print(f"[+] Imported {import_csv_logs(conn)} session(s) into {args.db}")
+    conn.close()
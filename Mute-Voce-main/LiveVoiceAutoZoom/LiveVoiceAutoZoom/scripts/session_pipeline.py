@@ -0,0 +1,164 @@
+"""Streaming analysis of a recording session while it is being captured.
+
+``StreamingSession`` receives the recorder's blocks through ``feed()`` (cheap
+enough to call from the audio callback) and a worker thread runs, per
+block, the same steps the post-session path runs on the whole file: VAD,
+mid-range enhancement (appended to the enhanced WAV), then the
+``feature_extraction`` stages for pitch, spectral centroid and partial
+speaker embeddings, which also drive online speaker-change detection
+(``online_diarization``). When recording stops, ``finish()`` only has to drain
+the last block, so clustering and matching can start seconds after the
+session ends.
+
+Each block is resampled once to 16 kHz by a ``resampling.StreamResampler``
+that lasts the whole session. VAD, pitch, spectral centroid and the
+embeddings all work on that copy; only the enhanced WAV keeps the capture
+rate, with its frames selected by the same VAD mask.
+
+Blocks may be any length (the recorder splits them where its ring
+wraps); VAD works on whole 30 ms frames, so the samples after the last
+whole frame are carried over to the next block. Each block is enhanced on
+its own, so peak normalization is per block rather than per file.
+"""
+
+import queue
+import threading
+
+import numpy as np
+import soundfile as sf
+
+from feature_extraction import PartialEmbedder, VoiceFeatures
+from online_diarization import OnlineDiarizer, VoicedMap
+from resampling import MODEL_RATE, StreamResampler
+from vad_enhancer import enhance_audio
+from vad_frames import FRAME_DURATION, VAD_MODE, voiced_frame_mask
+
+
+class StreamingSession:
+    def __init__(self, sample_rate, enhanced_path=None):
+        self.sample_rate = sample_rate
+        self.enhanced_path = enhanced_path
+        self.error = None
+        self.blocks = 0
+        self.voiced_seconds = 0.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._writer = None
+        self._embedder = PartialEmbedder()
+        self._features = VoiceFeatures()
+        self._voiced_map = VoicedMap(MODEL_RATE)
+        self._diarizer = OnlineDiarizer()
+        self._resampler = StreamResampler(sample_rate, MODEL_RATE)
+        self._vad = None
+        self._session_frames = 0  # 16 kHz samples analysed so far
+        self._frame_len = int(sample_rate * FRAME_DURATION / 1000)
+        self._model_frame_len = MODEL_RATE * FRAME_DURATION // 1000
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._model_carry = np.zeros(0, dtype=np.float32)
+
+    def start(self):
+        if self.enhanced_path:
+            self._writer = sf.SoundFile(
+                self.enhanced_path, mode="w", samplerate=self.sample_rate,
+                channels=1, subtype="FLOAT",
+            )
+        self._thread.start()
+        return self
+
+    def feed(self, block):
+        """Queue a recorded block; never blocks the caller."""
+        self._queue.put_nowait(np.array(block, dtype=np.float32, copy=True))
+
+    @property
+    def backlog(self):
+        return self._queue.qsize()
+
+    # ------------------------------------------------------------ processing
+    def _run(self):
+        while True:
+            block = self._queue.get()
+            if block is None:
+                break
+            if self.error is not None:
+                continue  # keep draining so feed() never backs up
+            try:
+                self._process(block)
+            except Exception as e:
+                self.error = e
+                print(f"[WARNING] Streaming analysis stopped: {e}")
+
+    def _process(self, block):
+        if block.ndim > 1:
+            block = block.mean(axis=1)
+        self.blocks += 1
+        if self._vad is None:
+            import webrtcvad
+
+            self._vad = webrtcvad.Vad(VAD_MODE)
+        native = np.concatenate([self._carry, block])
+        low = np.concatenate([self._model_carry, self._resampler.process(block)])
+        # Frame i covers the same 30 ms at both rates (the resampler lags by
+        # well under a millisecond)
+        n = min(len(native) // self._frame_len, len(low) // self._model_frame_len)
+        self._carry = native[n * self._frame_len:]
+        self._model_carry = low[n * self._model_frame_len:]
+        if n == 0:
+            return
+        native = native[:n * self._frame_len].reshape(n, self._frame_len)
+        low = low[:n * self._model_frame_len].reshape(n, self._model_frame_len)
+        mask = voiced_frame_mask(low.ravel(), MODEL_RATE, detector=self._vad)
+        self._voiced_map.add_block(self._session_frames, mask, self._model_frame_len)
+        self._session_frames += low.size
+        if not mask.any():
+            return
+        enhanced = enhance_audio(low[mask].ravel(), MODEL_RATE)
+        self.voiced_seconds += len(enhanced) / MODEL_RATE
+        if self._writer is not None:
+            self._writer.write(enhance_audio(native[mask].ravel(), self.sample_rate))
+        self._features.update(enhanced, MODEL_RATE)
+        new = self._embedder.add(enhanced, MODEL_RATE)
+        if new is not None:
+            partials, windows = new
+            self._diarizer.update(partials, self._voiced_map.window_spans(windows))
+
+    @property
+    def current_turn_start(self):
+        """Session time (s) where the current speaker's turn began."""
+        return self._diarizer.current_turn_start
+
+    # ---------------------------------------------------------------- result
+    def finish(self):
+        """Drain the queue and return the session analysis.
+
+        Returns ``None`` if streaming analysis failed, so the caller can fall
+        back to processing the recorded file.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        embed = partials = None
+        try:
+            if self.error is None:
+                done = self._embedder.partial_count
+                embed, partials = self._embedder.finish()
+                if partials is not None and len(partials) > done:
+                    windows = self._embedder.windows[done:]
+                    self._diarizer.update(
+                        partials[done:], self._voiced_map.window_spans(windows)
+                    )
+        except Exception as e:
+            self.error = e
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+        if self.error is not None or embed is None:
+            return None
+        return {
+            "embed": embed,
+            "partials": partials,
+            "mean_f0": self._features.mean_f0,
+            "centroid": self._features.centroid,
+            "windows": self._embedder.windows,
+            "diarizer": self._diarizer,
+            "voiced_seconds": self.voiced_seconds,
+            "blocks": self.blocks,
+        }
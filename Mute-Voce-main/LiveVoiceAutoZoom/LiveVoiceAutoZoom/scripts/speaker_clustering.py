@@ -0,0 +1,264 @@
+"""Speaker clustering that picks the number of speakers itself.
+
+Clustering runs in three passes over L2-normalized float32 embeddings:
+
+1. **Micro-clusters.** Embeddings are consumed in chunks (``partial_fit``)
+   and each joins the closest micro-cluster whose centroid is within
+   ``MICRO_THRESHOLD`` cosine similarity, or starts a new one. Only the
+   running centroid sums and counts are kept, so memory does not grow with
+   session length.
+2. **Merge.** Micro-clusters are merged agglomeratively (size-weighted
+   centroid linkage) until no two clusters are more similar than
+   ``MERGE_THRESHOLD``, or until ``n_clusters`` remain if the count is
+   known. ``method="eigengap"`` estimates the count from the Laplacian
+   spectrum of a k-NN graph over a bounded reservoir sample of the
+   embeddings instead of using the threshold.
+3. **Assign.** Every embedding is labelled with its nearest final centroid,
+   again in chunks. Clusters holding less than ``MIN_CLUSTER_FRACTION`` of
+   the audio are folded into their nearest neighbour.
+
+Labels are ``0..k-1`` ordered by cluster size, largest first.
+"""
+
+import numpy as np
+
+MICRO_THRESHOLD = 0.65  # join a micro-cluster above this cosine similarity
+MERGE_THRESHOLD = 0.75  # stop merging speakers below this similarity
+MAX_MICRO_CLUSTERS = 2000
+MIN_CLUSTER_FRACTION = 0.02
+MAX_SPEAKERS = 20
+EIGENGAP_SAMPLE = 1000  # embeddings kept (reservoir) for the eigengap estimate
+EIGENGAP_NEIGHBOURS = 10  # k-NN graph used for the eigengap estimate
+CHUNK_SIZE = 4096
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def estimate_speakers_eigengap(embeddings, max_speakers=MAX_SPEAKERS,
+                               neighbours=EIGENGAP_NEIGHBOURS):
+    """Estimate the number of speakers from the normalized Laplacian spectrum.
+
+    The affinity is a symmetrized k-nearest-neighbour graph over
+    ``embeddings`` (a few hundred to a thousand rows is plenty).
+    """
+    embeddings = _normalize(embeddings)
+    n = len(embeddings)
+    if n <= 2:
+        return 1
+    neighbours = min(neighbours, n - 1)
+    sims = embeddings @ embeddings.T
+    np.fill_diagonal(sims, -np.inf)
+    nearest = np.argpartition(-sims, neighbours - 1, axis=1)[:, :neighbours]
+    affinity = np.zeros((n, n))
+    affinity[np.repeat(np.arange(n), neighbours), nearest.ravel()] = 1.0
+    affinity = 0.5 * (affinity + affinity.T)
+    inv_sqrt = 1.0 / np.sqrt(affinity.sum(axis=1))
+    laplacian = np.eye(n) - inv_sqrt[:, None] * affinity * inv_sqrt[None, :]
+    eigenvalues = np.linalg.eigvalsh(laplacian)[:max_speakers + 1]
+    return int(np.argmax(np.diff(eigenvalues))) + 1
+
+
+def merge_clusters(centroids, weights, threshold=MERGE_THRESHOLD, n_clusters=None):
+    """Agglomerate weighted centroids; returns ``(centroids, weights, groups)``.
+
+    ``groups[i]`` is the index of the merged cluster that input ``i`` ended
+    up in. Merging stops at ``n_clusters`` clusters if given, otherwise when
+    the most similar pair falls below ``threshold``.
+    """
+    sums = centroids.astype(np.float64) * weights[:, None]
+    weights = weights.astype(np.float64).copy()
+    alive = np.ones(len(centroids), dtype=bool)
+    groups = np.arange(len(centroids))
+    unit = _normalize(sums)
+
+    sims = unit @ unit.T
+    np.fill_diagonal(sims, -np.inf)
+    best = np.argmax(sims, axis=1)
+    best_sim = sims[np.arange(len(sims)), best]
+
+    remaining = len(centroids)
+    while remaining > 1:
+        i = int(np.argmax(np.where(alive, best_sim, -np.inf)))
+        if n_clusters is not None:
+            if remaining <= n_clusters:
+                break
+        elif best_sim[i] < threshold:
+            break
+        j = int(best[i])
+        # Merge j into i
+        sums[i] += sums[j]
+        weights[i] += weights[j]
+        alive[j] = False
+        groups[groups == j] = i
+        remaining -= 1
+        unit[i] = _normalize(sums[i])
+        row = unit @ unit[i]
+        row[~alive] = -np.inf
+        row[i] = -np.inf
+        sims[i, :] = row
+        sims[:, i] = row
+        sims[j, :] = -np.inf
+        sims[:, j] = -np.inf
+        best_sim[j] = -np.inf
+        # Only rows that pointed at i or j (or now prefer i) need refreshing
+        stale = np.flatnonzero(alive & ((best == i) | (best == j)))
+        for r in stale:
+            best[r] = int(np.argmax(sims[r]))
+            best_sim[r] = sims[r, best[r]]
+        better = alive & (row > best_sim)
+        best[better] = i
+        best_sim[better] = row[better]
+        best[i] = int(np.argmax(row))
+        best_sim[i] = row[best[i]]
+
+    keep = np.flatnonzero(alive)
+    remap = np.full(len(centroids), -1)
+    remap[keep] = np.arange(len(keep))
+    return _normalize(sums[keep]), weights[keep], remap[groups]
+
+
+class SpeakerClusterer:
+    """Incremental clusterer; feed chunks with ``partial_fit`` then ``finalize``."""
+
+    def __init__(self, micro_threshold=MICRO_THRESHOLD, max_micro=MAX_MICRO_CLUSTERS):
+        self.micro_threshold = micro_threshold
+        self.max_micro = max_micro
+        self._sums = None
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._unit = None
+        self.centroids = None
+        # Uniform reservoir sample of everything seen, for the eigengap estimate
+        self._sample = None
+        self._seen = 0
+        self._rng = np.random.default_rng(0)
+
+    @property
+    def n_micro(self):
+        return len(self._counts)
+
+    def partial_fit(self, embeddings):
+        """Fold a chunk of embeddings into the micro-clusters."""
+        data = _normalize(np.atleast_2d(embeddings))
+        if len(data) == 0:
+            return self
+        if self._sums is None:
+            self._sums = np.zeros((0, data.shape[1]), dtype=np.float64)
+            self._unit = np.zeros((0, data.shape[1]), dtype=np.float32)
+            self._sample = np.zeros((0, data.shape[1]), dtype=np.float32)
+        self._update_sample(data)
+
+        if len(self._counts):
+            scores = data @ self._unit.T
+            nearest = np.argmax(scores, axis=1)
+            joined = scores[np.arange(len(data)), nearest] >= self.micro_threshold
+        else:
+            nearest = np.zeros(len(data), dtype=np.int64)
+            joined = np.zeros(len(data), dtype=bool)
+        if joined.any():
+            np.add.at(self._sums, nearest[joined], data[joined])
+            np.add.at(self._counts, nearest[joined], 1)
+
+        # Leftovers start new micro-clusters; compare them only with the
+        # clusters created in this chunk
+        new_sums, new_counts = [], []
+        for vector in data[~joined]:
+            if new_sums:
+                unit = _normalize(np.array(new_sums))
+                scores = unit @ vector
+                k = int(np.argmax(scores))
+                if scores[k] >= self.micro_threshold:
+                    new_sums[k] += vector
+                    new_counts[k] += 1
+                    continue
+            if self.n_micro + len(new_sums) >= self.max_micro:
+                # Budget exhausted: join the nearest cluster, old or new
+                existing = self._unit @ vector if self.n_micro else np.empty(0)
+                if existing.size and (not new_sums or existing.max() >= scores[k]):
+                    k = int(np.argmax(existing))
+                    self._sums[k] += vector
+                    self._counts[k] += 1
+                else:
+                    new_sums[k] += vector
+                    new_counts[k] += 1
+                continue
+            new_sums.append(vector.astype(np.float64))
+            new_counts.append(1)
+        if new_sums:
+            self._sums = np.vstack([self._sums, np.array(new_sums)])
+            self._counts = np.concatenate([self._counts, new_counts])
+        self._unit = _normalize(self._sums)
+        return self
+
+    def _update_sample(self, data):
+        free = EIGENGAP_SAMPLE - len(self._sample)
+        if free > 0:
+            self._sample = np.vstack([self._sample, data[:free]])
+        rest = data[max(free, 0):]
+        if len(rest):
+            positions = self._seen + max(free, 0) + np.arange(len(rest))
+            slots = self._rng.integers(0, positions + 1)
+            replace = slots < EIGENGAP_SAMPLE
+            self._sample[slots[replace]] = rest[replace]
+        self._seen += len(data)
+
+    def finalize(self, n_clusters=None, threshold=MERGE_THRESHOLD, method="threshold",
+                 max_speakers=MAX_SPEAKERS, min_fraction=MIN_CLUSTER_FRACTION):
+        """Merge micro-clusters into speakers; returns the speaker centroids."""
+        if not self.n_micro:
+            self.centroids = np.zeros((0, 0), dtype=np.float32)
+            return self.centroids
+        weights = self._counts.astype(np.float64)
+        if n_clusters is None and method == "eigengap":
+            n_clusters = estimate_speakers_eigengap(self._sample, max_speakers)
+        if n_clusters is not None:
+            n_clusters = max(1, min(n_clusters, self.n_micro))
+        centroids, weights, _ = merge_clusters(self._unit, weights, threshold, n_clusters)
+
+        # Fold tiny clusters into their nearest neighbour
+        if n_clusters is None and len(centroids) > 1:
+            small = weights < min_fraction * weights.sum()
+            if small.all():
+                small[np.argmax(weights)] = False
+            if small.any():
+                big = np.flatnonzero(~small)
+                targets = np.argmax(centroids[small] @ centroids[big].T, axis=1)
+                sums = centroids[big] * weights[big, None]
+                np.add.at(sums, targets, centroids[small] * weights[small, None])
+                centroids = _normalize(sums)
+                weights = weights[big] + np.bincount(
+                    targets, weights=weights[small], minlength=len(big)
+                )
+
+        order = np.argsort(-weights, kind="stable")
+        self.centroids = centroids[order].astype(np.float32)
+        return self.centroids
+
+    def predict(self, embeddings, chunk=CHUNK_SIZE):
+        """Label embeddings with their nearest speaker centroid."""
+        embeddings = np.atleast_2d(embeddings)
+        labels = np.empty(len(embeddings), dtype=np.int64)
+        for start in range(0, len(embeddings), chunk):
+            block = _normalize(embeddings[start:start + chunk])
+            labels[start:start + chunk] = np.argmax(block @ self.centroids.T, axis=1)
+        return labels
+
+
+def cluster_embeddings(embeddings, n_clusters=None, threshold=MERGE_THRESHOLD,
+                       method="threshold", chunk=CHUNK_SIZE):
+    """Cluster ``embeddings`` into speakers and return one label per row.
+
+    With ``n_clusters=None`` the number of speakers is chosen automatically
+    (``method="threshold"`` or ``"eigengap"``).
+    """
+    embeddings = np.atleast_2d(embeddings)
+    if len(embeddings) == 0:
+        return np.zeros(0, dtype=np.int64)
+    clusterer = SpeakerClusterer()
+    for start in range(0, len(embeddings), chunk):
+        clusterer.partial_fit(embeddings[start:start + chunk])
+    clusterer.finalize(n_clusters=n_clusters, threshold=threshold, method=method)
+    return clusterer.predict(embeddings, chunk=chunk)
@@ -1,37 +1,207 @@
 
-import os
+import threading
 import numpy as np
-from resemblyzer import VoiceEncoder, preprocess_wav
-from sklearn.cluster import KMeans
-from scipy.spatial.distance import cosine
 
-encoder = VoiceEncoder()
+from embedding_cache import EmbeddingCache, file_content_hash
+from resampling import MODEL_RATE, resample
+from speaker_store import SpeakerStore, normalize
+
 SPEAKER_DB_PATH = "scripts/speakers"  # Folder to store known speaker embeddings
-os.makedirs(SPEAKER_DB_PATH, exist_ok=True)
+EMBEDDING_CACHE_DIR = "cache/embeddings"
+
+# The encoder is created on first use so importing this module stays cheap.
+_encoder = None
+_encoder_lock = threading.Lock()
+_embedding_cache = None
+_embed_params = None
+
+
+def get_encoder():
+    """Return the process-wide ``VoiceEncoder``, loading it on first use.
+
+    Safe to call from several threads at once; the model is loaded exactly
+    once per process.
+    """
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                from resemblyzer import VoiceEncoder
+
+                _encoder = VoiceEncoder()
+    return _encoder
+
+
+def warm_up(background=False):
+    """Load the encoder and run one dummy forward pass.
+
+    With ``background=True`` this happens in a daemon thread (returned) so a
+    GUI or CLI can start immediately and the first real embedding does not
+    pay the load time.
+    """
+
+    def _run():
+        get_encoder().embed_utterance(np.zeros(16000, dtype=np.float32))
+
+    if not background:
+        _run()
+        return None
+    thread = threading.Thread(target=_run, daemon=True)
+    thread.start()
+    return thread
+
+
+def embed_mel_partials(mels):
+    """Run the encoder on a batch of mel partial windows ``(n, frames, mels)``.
+
+    Returns the L2-normalized partial embeddings as an ``(n, 256)`` array.
+    """
+    import torch
+
+    encoder = get_encoder()
+    with torch.no_grad():
+        batch = torch.from_numpy(np.ascontiguousarray(mels, dtype=np.float32))
+        return encoder(batch.to(encoder.device)).cpu().numpy()
+
+
+def embedding_params():
+    """Everything besides the audio that changes an embedding."""
+    global _embed_params
+    if _embed_params is None:
+        try:
+            from importlib.metadata import version
+
+            encoder_version = version("resemblyzer")
+        except Exception:
+            encoder_version = "unknown"
+        _embed_params = {
+            "encoder": f"resemblyzer-{encoder_version}",
+            "sample_rate": MODEL_RATE,
+            "resampler": "polyphase",
+            "rate": 1.3,
+            "min_coverage": 0.75,
+        }
+    return _embed_params
+
+
+def get_embedding_cache():
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _encoder_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR)
+    return _embedding_cache
+
+
+def load_audio(path):
+    """Decode ``path`` to mono float32 at its native rate; returns ``(audio, sample_rate)``."""
+    import soundfile as sf
+
+    try:
+        audio, sample_rate = sf.read(path, dtype="float32", always_2d=True)
+        return audio.mean(axis=1), sample_rate
+    except Exception:
+        # Formats libsndfile cannot read (e.g. m4a)
+        import librosa
+
+        return librosa.load(path, sr=None, mono=True)
+
+
+def preprocess(source, sample_rate=None):
+    """``preprocess_wav`` using the shared polyphase resampler.
+
+    ``source`` is a file path or a mono signal at ``sample_rate``. The audio
+    is resampled to 16 kHz once here, so resemblyzer's own (librosa)
+    resampling never runs.
+    """
+    from resemblyzer import preprocess_wav
+
+    if isinstance(source, str):
+        source, sample_rate = load_audio(source)
+    return preprocess_wav(resample(source, sample_rate, MODEL_RATE), source_sr=MODEL_RATE)
+
+
+def embed_file(wav_path, return_partials=False, use_cache=True):
+    """Embed ``wav_path``, reading the result from the embedding cache if present.
+
+    With ``return_partials`` returns ``(embed, partials, splits)`` where
+    ``splits`` holds the ``[start, stop)`` bounds of each partial window in
+    16 kHz samples of the preprocessed audio.
+    """
+    cache = get_embedding_cache() if use_cache else None
+    key = None
+    entry = None
+    if cache is not None:
+        key = cache.key(file_content_hash(wav_path), embedding_params())
+        entry = cache.get(key)
+    if entry is None:
+        wav = preprocess(wav_path)
+        embed, partials, wav_splits = get_encoder().embed_utterance(
+            wav, return_partials=True
+        )
+        entry = {
+            "embed": embed,
+            "partials": partials,
+            "splits": np.array([[s.start, s.stop] for s in wav_splits], dtype=np.int64),
+        }
+        if cache is not None:
+            cache.put(key, **entry)
+    if return_partials:
+        return entry["embed"], entry["partials"], entry["splits"]
+    return entry["embed"]
+
+
+def embed_audio(audio, sample_rate, min_speech=1.0):
+    """Embed an in-memory mono signal without touching the disk.
+
+    Silence is trimmed as in ``preprocess_wav``; returns ``None`` when less
+    than ``min_speech`` seconds of speech remain.
+    """
+    wav = preprocess(np.asarray(audio, dtype=np.float32), sample_rate)
+    if len(wav) < min_speech * MODEL_RATE:
+        return None
+    return get_encoder().embed_utterance(wav)
+
 
 def extract_embedding(wav_path):
-    wav = preprocess_wav(wav_path)
-    return encoder.embed_utterance(wav)
+    return embed_file(wav_path)
 
 def save_speaker(name, embedding):
-    np.save(os.path.join(SPEAKER_DB_PATH, f"{name}.npy"), embedding)
+    SpeakerStore(SPEAKER_DB_PATH).add(name, embedding)
+
+def remove_speaker(name):
+    return SpeakerStore(SPEAKER_DB_PATH).remove(name)
 
 def load_known_speakers():
-    speakers = {}
-    for file in os.listdir(SPEAKER_DB_PATH):
-        if file.endswith(".npy"):
-            name = file.replace(".npy", "")
-            embedding = np.load(os.path.join(SPEAKER_DB_PATH, file))
-            speakers[name] = embedding
-    return speakers
+    """Open the speaker store (one index read plus a memory-mapped matrix)."""
+    return SpeakerStore(SPEAKER_DB_PATH)
+
+def match_speakers(embedding, known_speakers, k=5):
+    """Return the ``k`` best ``(name, cosine_similarity)`` pairs, best first.
+
+    ``known_speakers`` is a ``SpeakerStore`` or a ``{name: embedding}`` dict.
+    """
+    if isinstance(known_speakers, dict):
+        if not known_speakers:
+            return []
+        names = list(known_speakers)
+        scores = normalize(np.stack(list(known_speakers.values()))) @ normalize(embedding)
+        order = np.argsort(-scores)[:k]
+        return [(names[i], float(scores[i])) for i in order]
+    return known_speakers.match(embedding, k=k)
 
 def recognize_speaker(embedding, known_speakers, threshold=0.3):
-    for name, ref_embedding in known_speakers.items():
-        if cosine(embedding, ref_embedding) < threshold:
-            return name
+    """Return the best matching speaker within cosine distance ``threshold``."""
+    best = match_speakers(embedding, known_speakers, k=1)
+    if best and 1.0 - best[0][1] < threshold:
+        return best[0][0]
     return None
 
-def cluster_unknown_embeddings(embeddings, n_clusters=2):
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-    labels = kmeans.fit_predict(embeddings)
-    return labels
+def cluster_unknown_embeddings(embeddings, n_clusters=None, method="threshold"):
+    """Group embeddings by speaker; the speaker count is estimated unless given.
+
+    See ``speaker_clustering`` for the available ``method`` values.
+    """
+    from speaker_clustering import cluster_embeddings
+
+    return cluster_embeddings(embeddings, n_clusters=n_clusters, method=method)
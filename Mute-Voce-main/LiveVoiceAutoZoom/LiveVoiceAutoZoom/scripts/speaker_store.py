@@ -0,0 +1,245 @@
+"""Known-speaker database backed by one contiguous embedding matrix.
+
+Layout of the store directory::
+
+    index.json           {"generation": N, "matrix": "embeddings_N.npy", "names": [...]}
+    embeddings_N.npy     float32 (len(names), dim), rows L2-normalized
+
+The matrix is memory-mapped on load, so opening the store is a single small
+JSON read plus an ``mmap``. Every change writes a new ``embeddings_N.npy``
+and then swaps ``index.json`` with ``os.replace``, so readers always see a
+consistent name/matrix pair even if a writer dies half way.
+
+Writers (enrollment, ``batch_embed``, removal) take an OS lock on
+``.lock`` in the store directory around the whole read-modify-write and the
+clean-up of old matrices, so concurrent processes never lose each other's
+updates. Readers take no lock; a reader that loses the race with a writer's
+clean-up simply re-reads the index. An index whose matrix stays missing
+(a store copied without its ``embeddings_N.npy``) raises
+``FileNotFoundError`` naming that file.
+
+Matching is one matrix-vector product; with normalized rows the scores are
+cosine similarities.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+INDEX_FILE = "index.json"
+LOCK_FILE = ".lock"
+# How often reload() re-reads an unchanged index whose matrix is missing
+RELOAD_ATTEMPTS = 5
+RELOAD_RETRY_SECONDS = 0.05
+
+
+def _lock_file(f):
+    if os.name == "nt":
+        import msvcrt
+
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after ~10 s; keep waiting for the writer
+                continue
+    else:
+        import fcntl
+
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(f):
+    if os.name == "nt":
+        import msvcrt
+
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def normalize(embeddings):
+    """Return float32 rows scaled to unit L2 norm."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+class SpeakerStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._lock_handle = None
+        self._lock_depth = 0
+        os.makedirs(path, exist_ok=True)
+        self.generation = 0
+        self.names = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._name_index = {}
+        self.reload()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._name_index
+
+    @contextmanager
+    def _writing(self):
+        """Hold the thread lock and the store's OS file lock (reentrant)."""
+        with self._lock:
+            if self._lock_depth == 0:
+                handle = open(os.path.join(self.path, LOCK_FILE), "a+b")
+                try:
+                    _lock_file(handle)
+                except BaseException:
+                    handle.close()
+                    raise
+                self._lock_handle = handle
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    handle, self._lock_handle = self._lock_handle, None
+                    try:
+                        _unlock_file(handle)
+                    finally:
+                        handle.close()
+
+    def reload(self):
+        """Re-read the index (and mmap the matrix) from disk."""
+        index_path = os.path.join(self.path, INDEX_FILE)
+        missing, attempts = None, 0
+        while True:
+            if not os.path.exists(index_path):
+                self._import_legacy()
+                return
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            matrix_path = os.path.join(self.path, index["matrix"])
+            try:
+                matrix = (
+                    np.load(matrix_path, mmap_mode="r")
+                    if index["names"] else np.zeros((0, 0), dtype=np.float32)
+                )
+            except FileNotFoundError:
+                # A writer replaced the index and removed this matrix meanwhile;
+                # an index that keeps naming the same missing file is broken
+                attempts = attempts + 1 if index["generation"] == missing else 1
+                missing = index["generation"]
+                if attempts >= RELOAD_ATTEMPTS:
+                    raise FileNotFoundError(
+                        f"{index_path} names {index['matrix']}, which does not exist"
+                    ) from None
+                time.sleep(RELOAD_RETRY_SECONDS)
+                continue
+            break
+        self.generation = index["generation"]
+        self.names = index["names"]
+        self.matrix = matrix
+        self._name_index = {name: i for i, name in enumerate(self.names)}
+
+    def _import_legacy(self):
+        # Older versions stored one ``<name>.npy`` per speaker
+        legacy = sorted(
+            f for f in os.listdir(self.path)
+            if f.endswith(".npy") and not f.startswith("embeddings_")
+        )
+        if not legacy:
+            return
+        with self._writing():
+            if os.path.exists(os.path.join(self.path, INDEX_FILE)):
+                # Another process imported them first
+                self.reload()
+                return
+            names = [f[:-len(".npy")] for f in legacy]
+            matrix = np.stack([np.load(os.path.join(self.path, f)) for f in legacy])
+            self._commit(names, normalize(matrix))
+        print(f"[INFO] Imported {len(names)} speaker(s) into {self.path}")
+
+    def _commit(self, names, matrix):
+        # Callers hold self._writing()
+        generation = self.generation + 1
+        matrix_name = f"embeddings_{generation}.npy"
+        matrix_path = os.path.join(self.path, matrix_name)
+        with open(matrix_path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        os.replace(matrix_path + ".tmp", matrix_path)
+
+        index_path = os.path.join(self.path, INDEX_FILE)
+        with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(
+                {"generation": generation, "matrix": matrix_name, "names": names}, f
+            )
+        os.replace(index_path + ".tmp", index_path)
+        self.reload()
+        self._remove_stale(matrix_name)
+
+    def _remove_stale(self, current):
+        for f in os.listdir(self.path):
+            if f.startswith("embeddings_") and f.endswith(".npy") and f != current:
+                try:
+                    os.remove(os.path.join(self.path, f))
+                except OSError:
+                    # Still mapped by another reader (Windows); retry next commit
+                    pass
+
+    def add(self, name, embedding):
+        """Add or replace ``name`` with ``embedding``."""
+        self.add_many([name], [embedding])
+
+    def add_many(self, names, embeddings):
+        """Add or replace several speakers in one atomic update."""
+        new = normalize(np.atleast_2d(embeddings))
+        with self._writing():
+            self.reload()
+            current_names = list(self.names)
+            matrix = np.array(self.matrix, dtype=np.float32)
+            if matrix.size == 0:
+                matrix = np.zeros((0, new.shape[1]), dtype=np.float32)
+            positions = {n: i for i, n in enumerate(current_names)}
+            rows = []
+            for name, row in zip(names, new):
+                if name in positions:
+                    matrix[positions[name]] = row
+                else:
+                    positions[name] = len(current_names)
+                    current_names.append(name)
+                    rows.append(row)
+            if rows:
+                matrix = np.vstack([matrix, np.stack(rows)])
+            self._commit(current_names, matrix)
+
+    def remove(self, name):
+        """Remove ``name``; returns ``False`` if it was not enrolled."""
+        with self._writing():
+            self.reload()
+            if name not in self._name_index:
+                return False
+            keep = [i for i, n in enumerate(self.names) if n != name]
+            names = [self.names[i] for i in keep]
+            self._commit(names, np.array(self.matrix[keep], dtype=np.float32))
+            return True
+
+    def get(self, name):
+        return np.array(self.matrix[self._name_index[name]])
+
+    def match(self, embedding, k=1):
+        """Return up to ``k`` ``(name, cosine_similarity)`` pairs, best first."""
+        if not self.names:
+            return []
+        scores = self.matrix @ normalize(embedding)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.names[i], float(scores[i])) for i in top]
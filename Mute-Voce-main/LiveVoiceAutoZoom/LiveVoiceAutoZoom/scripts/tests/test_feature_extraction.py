@@ -0,0 +1,82 @@
+import tracemalloc
+
+import numpy as np
+import soundfile as sf
+
+from feature_extraction import TARGET_DBFS, PartialEmbedder, extract_features, speaker_features
+
+
+def rms_dbfs(wav):
+    return 10 * np.log10(np.mean(wav.astype(np.float64) ** 2))
+
+
+def test_running_gain_is_shared_across_chunks():
+    rng = np.random.default_rng(0)
+    embedder = PartialEmbedder()
+    chunks = [0.001 * rng.standard_normal(16000).astype(np.float32) for _ in range(4)]
+    chunks[1] *= 2  # a slightly louder stretch keeps its relative level
+
+    out = [embedder._level(c) for c in chunks]
+
+    # The gain converges to preprocess_wav's whole-file gain...
+    whole = 10 ** ((TARGET_DBFS - rms_dbfs(np.concatenate(chunks))) / 20)
+    assert abs(np.std(out[-1]) / np.std(chunks[-1]) / whole - 1) < 1e-3
+    assert abs(rms_dbfs(np.concatenate(out)) - TARGET_DBFS) < 1.5
+    # ...and, unlike per-chunk normalization, keeps chunks' relative levels
+    assert np.std(out[1]) > 1.2 * np.std(out[0])
+
+
+def test_loud_audio_is_not_attenuated():
+    embedder = PartialEmbedder()
+    loud = np.full(1000, 0.5, dtype=np.float32)
+
+    assert np.array_equal(embedder._level(loud), loud)
+    assert not embedder._level(np.zeros(100, dtype=np.float32)).any()
+
+
+def test_features_from_a_44k_file(tmp_path, voice):
+    path = str(tmp_path / "enhanced.wav")
+    sf.write(path, voice(3.0, 44100), 44100, subtype="FLOAT")
+
+    result = extract_features(path, embed=False)
+
+    assert result["embed"] is None
+    assert abs(result["seconds"] - 3.0) < 1e-3
+    assert 140 <= result["mean_f0"] <= 160
+    assert 0 < result["centroid"] < 8000  # measured on the 16 kHz copy
+
+
+def test_memory_does_not_grow_with_file_length(tmp_path, voice):
+    clip = voice(10.0, 44100)
+    peaks = []
+    for n in (3, 12):  # one chunk, then four
+        path = str(tmp_path / f"enhanced_{n}.wav")
+        sf.write(path, np.tile(clip, n), 44100, subtype="FLOAT")
+        tracemalloc.start()
+        try:
+            extract_features(path, embed=False)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+    assert peaks[1] < 1.2 * peaks[0]
+    assert peaks[0] < 100e6
+
+
+def test_features_per_speaker(tmp_path, voice):
+    # Two speakers taking turns: 120 Hz for 3 s, 220 Hz for 3 s, 120 Hz again
+    turns = [(0, 120), (1, 220), (0, 120)]
+    path = str(tmp_path / "enhanced.wav")
+    sf.write(path, np.concatenate([voice(3.0, 44100, f0) for _, f0 in turns]), 44100, subtype="FLOAT")
+    # 1.6 s partial windows every 0.5 s, labelled by the turn holding their centre
+    starts = np.arange(0, 9 * 16000 - 25600 + 1, 8000)
+    windows = np.stack([starts, starts + 25600], axis=1)
+    labels = np.array([turns[int((s + 12800) // 48000)][0] for s in starts])
+
+    features = speaker_features(path, windows, labels)
+
+    assert sorted(features) == [0, 1]
+    assert 110 <= features[0].mean_f0 <= 130
+    assert 210 <= features[1].mean_f0 <= 230
+    assert features[1].centroid > features[0].centroid
+    assert speaker_features(path, np.zeros((0, 2)), []) == {}
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from online_diarization import CHANGE_PATIENCE, OnlineDiarizer, VoicedMap
+from resampling import MODEL_RATE
+
+DIM = 32
+
+
+def speakers_partials(order, per_turn=6, seed=0):
+    """Noisy partials for turns spoken by ``order`` (e.g. ``[0, 1, 0]``)."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(order) + 1, DIM))
+    owners = np.repeat(order, per_turn)
+    return centres[owners] + 0.2 * rng.standard_normal((len(owners), DIM)), owners
+
+
+def one_second_spans(n):
+    starts = np.arange(n, dtype=float)
+    return np.stack([starts, starts + 0.5, starts + 1.0], axis=1)
+
+
+def test_turn_changes_and_labels():
+    partials, owners = speakers_partials([0, 1, 0])
+    diarizer = OnlineDiarizer()
+    # Partials arrive in small batches, as from the streaming session
+    for start in range(0, len(partials), 4):
+        diarizer.update(partials[start:start + 4], one_second_spans(len(partials))[start:start + 4])
+
+    assert diarizer.boundaries == [6, 12]
+    assert diarizer.current_turn_start == 12.0
+
+    turns = diarizer.finish(labels=owners)
+    assert [t["speaker"] for t in turns] == [1, 2, 1]
+    assert [(t["start"], t["end"]) for t in turns] == [(0.0, 6.0), (6.0, 12.0), (12.0, 18.0)]
+    assert all(t["confidence"] > 0.9 for t in turns)
+
+    # Without clustering labels every turn is its own provisional speaker
+    assert [t["speaker"] for t in diarizer.finish()] == [1, 2, 3]
+
+
+def test_single_outlier_does_not_split_the_turn():
+    partials, _ = speakers_partials([0], per_turn=10)
+    outlier = np.random.default_rng(1).standard_normal(DIM)
+    partials = np.vstack([partials[:5], [outlier] * (CHANGE_PATIENCE - 1), partials[5:]])
+
+    diarizer = OnlineDiarizer()
+    diarizer.update(partials, one_second_spans(len(partials)))
+
+    assert diarizer.boundaries == []
+
+
+def test_voiced_map_places_windows_on_session_clock():
+    sr = 44100
+    voiced = VoicedMap(sr)
+    frame = sr * 30 // 1000
+    # 0.99 s of silence, 3 s voiced, 2.01 s silence, 3 s voiced
+    voiced.add_block(0, [0] * 33 + [1] * 100 + [0] * 67 + [1] * 100, frame)
+
+    spans = voiced.window_spans([[0, MODEL_RATE], [MODEL_RATE * 3, MODEL_RATE * 4]])
+
+    assert np.allclose(spans, [[0.99, 1.49, 1.99], [6.0, 6.5, 7.0]], atol=1e-3)
+
+
+def test_timeline_queries_skip_the_audio_stack():
+    # The timeline CLI must not load webrtcvad or the speaker encoder
+    check = (
+        "import sys, online_diarization; "
+        "print(sorted({'feature_extraction', 'vad_frames', 'webrtcvad', 'resemblyzer'} & set(sys.modules)))"
+    )
+    scripts = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    out = subprocess.run([sys.executable, "-c", check], cwd=scripts, capture_output=True, text=True, check=True)
+
+    assert out.stdout.strip() == "[]"
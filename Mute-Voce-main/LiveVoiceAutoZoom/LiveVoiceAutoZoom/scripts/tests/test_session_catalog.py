@@ -0,0 +1,112 @@
+import csv
+
+import numpy as np
+
+from session_catalog import (
+    connect, find_matches, find_sessions, import_csv_logs, record_session, recorded_at_of,
+    session_turns,
+)
+
+
+def record(conn, session_id, mean_f0, matches=(), turns=(), speaker_f0=()):
+    record_session(
+        conn, session_id, recorded_at=recorded_at_of(session_id), duration=60.0,
+        sample_rate=44100,
+        voiceprints=[
+            {"file": f"voiceprint_{session_id}.npy", "speaker": None, "embedding": np.ones(4)},
+            {"file": f"voiceprint_{session_id}_speaker1.npy", "speaker": 1, "talk_time": 40.0},
+            {"file": f"voiceprint_{session_id}_speaker2.npy", "speaker": 2, "talk_time": 20.0},
+        ],
+        features=[{"speaker": None, "mean_f0": mean_f0, "voice_color": 1500.0}] + [
+            {"speaker": speaker, "mean_f0": f0, "voice_color": 1500.0}
+            for speaker, f0 in enumerate(speaker_f0, start=1)
+        ],
+        matches=matches, turns=turns,
+    )
+
+
+def test_round_trip_and_queries(tmp_path):
+    conn = connect(str(tmp_path / "sessions.db"))
+    record(conn, "20240101_120000", 120.0, turns=[
+        {"start": 0.0, "end": 5.0, "speaker": 1, "confidence": 0.9},
+        {"start": 5.0, "end": 8.0, "speaker": 2, "confidence": 0.8},
+        {"start": 8.0, "end": 9.0, "speaker": 1, "confidence": 0.7},
+    ])
+    record(conn, "20240305_093000", 210.0, matches=[{
+        "voiceprint": "voiceprint_20240305_093000_speaker1.npy",
+        "matched_file": "voiceprint_20240101_120000_speaker2.npy",
+        "similarity": 0.83,
+    }])
+
+    sessions = find_sessions(conn)
+    assert [row[:4] for row in sessions] == [
+        ("20240101_120000", "2024-01-01 12:00:00", 60.0, 2),
+        ("20240305_093000", "2024-03-05 09:30:00", 60.0, 2),
+    ]
+    assert [row[0] for row in find_sessions(conn, min_f0=180)] == ["20240305_093000"]
+    assert [row[0] for row in find_sessions(conn, max_f0=180)] == ["20240101_120000"]
+    assert [row[0] for row in find_sessions(conn, since="2024-02-01")] == ["20240305_093000"]
+    assert [row[0] for row in find_sessions(
+        conn, with_file="fingerprints/voiceprint_20240101_120000_speaker2.npy"
+    )] == ["20240101_120000", "20240305_093000"]
+
+    assert find_matches(conn, "voiceprint_20240101_120000_speaker2.npy") == [(
+        "20240305_093000", "voiceprint_20240305_093000_speaker1.npy",
+        "voiceprint_20240101_120000_speaker2.npy", 0.83,
+    )]
+    assert session_turns(conn, "20240101_120000", speaker=1) == [
+        (0.0, 5.0, 1, 0.9), (8.0, 9.0, 1, 0.7),
+    ]
+    embedding = conn.execute(
+        "SELECT embedding FROM voiceprints WHERE speaker IS NULL AND session_id = ?",
+        ("20240101_120000",),
+    ).fetchone()[0]
+    assert np.array_equal(np.frombuffer(embedding, dtype=np.float32), np.ones(4))
+
+    # Re-recording a session replaces its rows
+    record(conn, "20240101_120000", 130.0)
+    assert session_turns(conn, "20240101_120000") == []
+    assert [row[4] for row in find_sessions(conn)] == [130.0, 210.0]
+    conn.close()
+
+
+def test_pitch_filter_on_one_speaker(tmp_path):
+    conn = connect(str(tmp_path / "sessions.db"))
+    # A low voice and a high voice average out to a mid-range session F0
+    record(conn, "20240101_120000", 165.0, speaker_f0=(110.0, 220.0))
+    record(conn, "20240305_093000", 190.0, speaker_f0=(185.0, 195.0))
+
+    assert [row[0] for row in find_sessions(conn, min_f0=200)] == []
+    assert [row[0] for row in find_sessions(conn, min_f0=200, speaker=2)] == ["20240101_120000"]
+    assert [row[0] for row in find_sessions(conn, max_f0=150, speaker=1)] == ["20240101_120000"]
+    assert [row[4] for row in find_sessions(conn, speaker=2)] == [220.0, 195.0]
+    conn.close()
+
+
+def test_csv_import_keeps_recording_time(tmp_path):
+    fingerprints = tmp_path / "fingerprints.csv"
+    with open(fingerprints, "w", newline="") as f:
+        writer = csv.DictWriter(
+            f, ["session_id", "fingerprint_file", "mean_freq", "voice_color", "samplerate"]
+        )
+        writer.writeheader()
+        writer.writerow({"session_id": "20231224_180500", "fingerprint_file": "voiceprint_20231224_180500.npy",
+                         "mean_freq": "150.5", "voice_color": "1400", "samplerate": "44100"})
+    summary = tmp_path / "speaker_summary.csv"
+    with open(summary, "w", newline="") as f:
+        writer = csv.DictWriter(f, ["session_id", "speaker_files"])
+        writer.writeheader()
+        writer.writerow({"session_id": "20231224_180500",
+                         "speaker_files": "voiceprint_20231224_180500_speaker1.npy;"})
+
+    conn = connect(str(tmp_path / "sessions.db"))
+    assert import_csv_logs(conn, str(fingerprints), str(summary)) == 1
+
+    (row,) = find_sessions(conn, since="2023-12-01")
+    assert row[:2] == ("20231224_180500", "2023-12-24 18:05:00")
+    assert row[3:5] == (1, 150.5)
+    conn.close()
+
+
+def test_recorded_at_of_other_ids():
+    assert recorded_at_of("manual-import") is None
@@ -0,0 +1,81 @@
+import numpy as np
+import soundfile as sf
+
+import session_pipeline
+
+SR = 44100
+EMBED_RATE = 16000
+
+
+class FakeEmbedder:
+    """Stands in for ``PartialEmbedder`` (resemblyzer): one partial per second of voiced audio."""
+
+    def __init__(self):
+        self.samples = 0
+        self.rates = set()
+        self._windows = []
+
+    @property
+    def partial_count(self):
+        return len(self._windows)
+
+    @property
+    def windows(self):
+        return np.array(self._windows, dtype=np.int64).reshape(-1, 2)
+
+    def add(self, wav, sample_rate):
+        self.rates.add(sample_rate)
+        self.samples += len(wav) * EMBED_RATE // sample_rate
+        first = len(self._windows)
+        self._windows.extend(
+            [i * EMBED_RATE, (i + 1) * EMBED_RATE] for i in range(first, self.samples // EMBED_RATE)
+        )
+        if len(self._windows) == first:
+            return None
+        return np.ones((len(self._windows) - first, 4)), self.windows[first:]
+
+    def finish(self):
+        if not self._windows:
+            return None, None
+        return np.full(4, 0.5), np.ones((len(self._windows), 4))
+
+
+def stream(recording, block, path=None):
+    session = session_pipeline.StreamingSession(SR, enhanced_path=path).start()
+    for start in range(0, len(recording), block):
+        session.feed(recording[start:start + block])
+    return session, session.finish()
+
+
+def test_streams_44k_blocks(monkeypatch, tmp_path, voice):
+    monkeypatch.setattr(session_pipeline, "PartialEmbedder", FakeEmbedder)
+    silence = np.zeros(SR, dtype=np.float32)
+    mono = np.concatenate([silence, voice(3.0, SR), silence])
+    recording = np.stack([mono, mono], axis=1)  # the recorder's stereo blocks
+    path = str(tmp_path / "enhanced.wav")
+
+    # Not a whole number of 30 ms frames, as when the recorder's ring wraps
+    session, result = stream(recording, 20000, path)
+
+    assert session.error is None
+    assert result is not None
+    # Analysis runs on the session's single 16 kHz copy of the blocks
+    assert session._embedder.rates == {EMBED_RATE}
+    assert 2.8 <= result["voiced_seconds"] <= 3.4
+    assert 140 <= result["mean_f0"] <= 160
+    assert len(result["partials"]) >= 2
+    # Partials are placed back on the session clock, after the leading silence
+    assert abs(session.current_turn_start - 1.0) < 0.15
+    info = sf.info(path)
+    assert info.samplerate == SR
+    assert abs(info.frames / SR - result["voiced_seconds"]) < 0.05
+
+
+def test_blocks_shorter_than_a_vad_frame(monkeypatch, voice):
+    monkeypatch.setattr(session_pipeline, "PartialEmbedder", FakeEmbedder)
+    recording = np.concatenate([np.zeros(SR, dtype=np.float32), voice(2.0, SR)])
+
+    session, result = stream(recording, 1024)
+
+    assert result is not None
+    assert 1.8 <= result["voiced_seconds"] <= 2.1
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from speaker_clustering import _normalize, cluster_embeddings
+
+DIM = 256
+NOISE = 0.025  # same-speaker similarity around 0.86
+
+
+def session(n_speakers, seed=0):
+    """Embeddings of ``n_speakers`` with unequal talk time, and their true speakers."""
+    rng = np.random.default_rng(seed)
+    centres = _normalize(rng.standard_normal((n_speakers, DIM)))
+    sizes = 100 + 60 * np.arange(n_speakers)[::-1]
+    owners = np.repeat(np.arange(n_speakers), sizes)
+    rng.shuffle(owners)
+    return _normalize(centres[owners] + NOISE * rng.standard_normal((len(owners), DIM))), owners
+
+
+@pytest.mark.parametrize("method", ["threshold", "eigengap"])
+@pytest.mark.parametrize("n_speakers", [1, 2, 4, 6])
+def test_recovers_speaker_count(method, n_speakers):
+    embeddings, owners = session(n_speakers)
+
+    labels = cluster_embeddings(embeddings, method=method, chunk=128)
+
+    assert len(set(labels.tolist())) == n_speakers
+    # Every speaker maps to exactly one label; the largest is labelled 0
+    assert all(len(set(labels[owners == s].tolist())) == 1 for s in range(n_speakers))
+    assert labels[owners == 0][0] == 0
+
+
+def test_known_count_is_respected():
+    embeddings, owners = session(4)
+
+    labels = cluster_embeddings(embeddings, n_clusters=2)
+
+    assert len(set(labels.tolist())) == 2
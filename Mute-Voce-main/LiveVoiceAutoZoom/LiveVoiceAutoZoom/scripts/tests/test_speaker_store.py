@@ -0,0 +1,52 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from speaker_store import SpeakerStore
+
+DIM = 8
+
+
+def _enroll(path, prefix, count):
+    rng = np.random.default_rng(ord(prefix))
+    store = SpeakerStore(path)
+    for i in range(count):
+        store.add(f"{prefix}{i}", rng.standard_normal(DIM))
+
+
+def test_concurrent_writers_keep_every_speaker(tmp_path):
+    path = str(tmp_path)
+    prefixes = ["a", "b", "c", "d"]
+    with ProcessPoolExecutor(max_workers=len(prefixes)) as pool:
+        for future in [pool.submit(_enroll, path, p, 10) for p in prefixes]:
+            future.result()
+
+    store = SpeakerStore(path)
+    assert sorted(store.names) == sorted(f"{p}{i}" for p in prefixes for i in range(10))
+    assert store.generation == 40
+    matrices = [f for f in os.listdir(path) if f.startswith("embeddings_")]
+    assert matrices == [f"embeddings_{store.generation}.npy"]
+
+
+def test_remove_and_legacy_import(tmp_path):
+    np.save(tmp_path / "alice.npy", np.ones(DIM, dtype=np.float32))
+    np.save(tmp_path / "bob.npy", -np.ones(DIM, dtype=np.float32))
+
+    store = SpeakerStore(str(tmp_path))
+    assert store.names == ["alice", "bob"]
+    assert store.match(np.ones(DIM))[0][0] == "alice"
+
+    assert store.remove("alice")
+    assert not store.remove("alice")
+    assert SpeakerStore(str(tmp_path)).names == ["bob"]
+
+
+def test_missing_matrix_is_reported(tmp_path):
+    store = SpeakerStore(str(tmp_path))
+    store.add("alice", np.ones(DIM))
+    os.remove(tmp_path / f"embeddings_{store.generation}.npy")
+
+    with pytest.raises(FileNotFoundError, match=f"embeddings_{store.generation}.npy"):
+        store.reload()
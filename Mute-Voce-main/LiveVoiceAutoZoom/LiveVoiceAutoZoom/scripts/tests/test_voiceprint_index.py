@@ -0,0 +1,62 @@
+import numpy as np
+
+from voiceprint_index import MIN_TRAIN, VoiceprintIndex, _normalize, brute_force
+
+DIM = 64
+NOISE = 0.05  # same-speaker similarity around 0.86, as in benchmark()
+
+
+def synthetic_prints(size, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = _normalize(rng.standard_normal((size // 6, DIM)))
+    data = _normalize(centres[rng.integers(0, len(centres), size)]
+                      + NOISE * rng.standard_normal((size, DIM)))
+    queries = _normalize(centres[rng.integers(0, len(centres), 100)]
+                         + NOISE * rng.standard_normal((100, DIM)))
+    return data, queries
+
+
+def build(data):
+    index = VoiceprintIndex(dim=DIM)
+    index.add([str(i) for i in range(len(data))], data)
+    return index
+
+
+def test_ivf_recall_matches_brute_force():
+    data, queries = synthetic_prints(3 * MIN_TRAIN)
+    index = build(data)
+    assert index.centroids is not None
+
+    top1 = np.mean([
+        int(index.search(q, k=1)[0][0]) == brute_force(data, q, 1)[0] for q in queries
+    ])
+    assert top1 >= 0.95
+
+    found = total = 0
+    for q in queries:
+        truth = set(np.flatnonzero(data @ q > 0.75).tolist())
+        found += len(truth & {int(i) for i, _ in index.search(q, threshold=0.75)})
+        total += len(truth)
+    assert found / total >= 0.95
+
+
+def test_probing_every_list_is_exact():
+    data, queries = synthetic_prints(MIN_TRAIN)
+    index = build(data)
+    for q in queries[:20]:
+        hits = index.search(q, k=5, nprobe=len(index.centroids))
+        assert [int(i) for i, _ in hits] == brute_force(data, q, 5).tolist()
+
+
+def test_small_archive_is_searched_exhaustively_and_round_trips(tmp_path):
+    data, queries = synthetic_prints(600)
+    index = build(data)
+    assert index.centroids is None
+    assert int(index.search(queries[0], k=1)[0][0]) == brute_force(data, queries[0], 1)[0]
+
+    index.train()
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = VoiceprintIndex.load(path, dim=DIM)
+    assert loaded.ids == index.ids
+    assert loaded.search(queries[1], k=3) == index.search(queries[1], k=3)
@@ -1,37 +1,26 @@
 
 import numpy as np
-import warnings
-
-# Suppress deprecation warnings emitted by webrtcvad's use of pkg_resources
-warnings.filterwarnings(
-    "ignore",
-    message="pkg_resources is deprecated as an API",
-    category=UserWarning,
-)
-
-import webrtcvad
 from scipy.signal import butter, lfilter
 
-SAMPLE_RATE = 44100
-FRAME_DURATION = 30  # ms
-VAD_MODE = 2  # 0-3: higher = more aggressive
+from vad_frames import FRAME_DURATION, VAD_MODE, frame_generator, frame_runs, vad, voiced_frame_mask
 
-vad = webrtcvad.Vad(VAD_MODE)
+SAMPLE_RATE = 44100
 
-def frame_generator(audio, sample_rate, frame_duration_ms):
-    frame_len = int(sample_rate * frame_duration_ms / 1000)
-    for i in range(0, len(audio) - frame_len + 1, frame_len):
-        yield audio[i:i + frame_len]
+def detect_voiced(audio, sample_rate=SAMPLE_RATE, return_mask=False):
+    """Keep only the voiced frames of ``audio`` (as int16).
 
-def detect_voiced(audio, sample_rate=SAMPLE_RATE):
+    With ``return_mask`` also returns the per-frame mask, which maps the
+    voiced samples back to positions in ``audio``.
+    """
     if audio.dtype != np.int16:
         audio = (audio * 32767).astype(np.int16)
-    frames = frame_generator(audio, sample_rate, FRAME_DURATION)
-    voiced = []
-    for frame in frames:
-        if vad.is_speech(frame.tobytes(), sample_rate):
-            voiced.extend(frame)
-    return np.array(voiced, dtype=np.int16)
+    frame_len = int(sample_rate * FRAME_DURATION / 1000)
+    mask = voiced_frame_mask(audio, sample_rate)
+    frames = audio[:len(mask) * frame_len].reshape(len(mask), frame_len)
+    voiced = frames[mask].ravel()
+    if return_mask:
+        return voiced, mask
+    return voiced
 
 def apply_midrange_enhancement(audio, sample_rate=SAMPLE_RATE, low=300, high=3000, gain=1.5):
     """Boost mid-range frequencies to improve intelligibility."""
@@ -50,7 +39,10 @@ def enhance_audio(voiced_audio, sample_rate=SAMPLE_RATE):
         return np.zeros(1, dtype=np.float32)
     if voiced_audio.dtype != np.float32:
         voiced_audio = voiced_audio.astype(np.float32) / 32767
-    normalized = voiced_audio / np.max(np.abs(voiced_audio))
+    peak = np.max(np.abs(voiced_audio))
+    if peak == 0:
+        return np.zeros(len(voiced_audio), dtype=np.float32)
+    normalized = voiced_audio / peak
     amplified = normalized * 0.9
     mid_boosted = apply_midrange_enhancement(amplified, sample_rate)
     return mid_boosted.astype(np.float32)
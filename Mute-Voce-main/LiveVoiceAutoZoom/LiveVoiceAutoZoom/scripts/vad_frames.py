@@ -0,0 +1,60 @@
+"""webrtcvad speech decisions on 30 ms frames.
+
+This module and ``resampling.py`` are shared by the tools in this
+repository: ``soft_voice_tools Batch`` and the live transcriber add this
+directory to ``sys.path`` and import them from here.
+"""
+
+import warnings
+
+import numpy as np
+
+# Suppress deprecation warnings emitted by webrtcvad's use of pkg_resources
+warnings.filterwarnings(
+    "ignore",
+    message="pkg_resources is deprecated as an API",
+    category=UserWarning,
+)
+
+import webrtcvad
+
+from resampling import MODEL_RATE, VAD_RATES, resample
+
+FRAME_DURATION = 30  # ms
+VAD_MODE = 2  # 0-3: higher = more aggressive
+
+vad = webrtcvad.Vad(VAD_MODE)
+
+
+def frame_generator(audio, sample_rate, frame_duration_ms):
+    frame_len = int(sample_rate * frame_duration_ms / 1000)
+    for i in range(0, len(audio) - frame_len + 1, frame_len):
+        yield audio[i:i + frame_len]
+
+
+def voiced_frame_mask(audio, sample_rate, detector=None):
+    """Return one bool per ``FRAME_DURATION`` frame, True where VAD hears speech.
+
+    webrtcvad only accepts 8/16/32/48 kHz, so other rates (the 44.1 kHz
+    capture) are classified on a 16 kHz copy; frame ``i`` of the copy covers
+    the same 30 ms as frame ``i`` of ``audio``. ``detector`` replaces the
+    module's ``webrtcvad.Vad``; callers that classify a stream block by block
+    on their own thread keep their own.
+    """
+    detector = detector or vad
+    n_frames = len(audio) // int(sample_rate * FRAME_DURATION / 1000)
+    vad_rate = sample_rate
+    if sample_rate not in VAD_RATES:
+        audio = resample(audio, sample_rate, MODEL_RATE)
+        vad_rate = MODEL_RATE
+    if audio.dtype != np.int16:
+        audio = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    frames = frame_generator(audio, vad_rate, FRAME_DURATION)
+    mask = np.array([detector.is_speech(frame.tobytes(), vad_rate) for frame in frames], dtype=bool)
+    return np.pad(mask[:n_frames], (0, max(0, n_frames - len(mask))))
+
+
+def frame_runs(mask):
+    """Return ``[(first, stop), ...]`` frame ranges where ``mask`` is True."""
+    edges = np.diff(np.concatenate([[0], np.asarray(mask, dtype=int), [0]]))
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
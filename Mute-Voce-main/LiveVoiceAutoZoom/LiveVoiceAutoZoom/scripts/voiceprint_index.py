@@ -0,0 +1,291 @@
+"""Approximate nearest-neighbour index over stored voiceprints.
+
+A pure-NumPy inverted-file (IVF) index: voiceprints are L2-normalized and
+assigned to the closest of ``n_lists`` centroids found with spherical
+k-means. A query only scores the vectors in its ``nprobe`` closest lists,
+so matching cost grows with ``sqrt(n)`` instead of ``n``. Small archives
+(below ``MIN_TRAIN``) are searched exhaustively.
+
+New voiceprints are inserted incrementally into the nearest existing list;
+the centroids are retrained once the archive has grown ``RETRAIN_FACTOR``
+times since the last training. The whole index is persisted to a single
+``.npz`` written atomically.
+
+Run ``python voiceprint_index.py --benchmark`` for a recall/latency
+comparison against brute force on synthetic data.
+"""
+
+import os
+import time
+import argparse
+
+import numpy as np
+
+INDEX_PATH = "fingerprints/.voiceprint_index.npz"
+MIN_TRAIN = 2048
+RETRAIN_FACTOR = 4
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 15
+TRAIN_SAMPLE = 65536
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def spherical_kmeans(data, n_clusters, iterations=KMEANS_ITERATIONS, seed=0):
+    """Cluster unit vectors by cosine similarity; returns normalized centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _nearest(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, data)
+        counts = np.bincount(labels, minlength=n_clusters)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty lists with random points
+            sums[empty] = data[rng.choice(len(data), int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def _nearest(data, centroids, chunk=16384):
+    labels = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), chunk):
+        scores = data[start:start + chunk] @ centroids.T
+        labels[start:start + chunk] = np.argmax(scores, axis=1)
+    return labels
+
+
+class VoiceprintIndex:
+    def __init__(self, dim=256, nprobe=DEFAULT_NPROBE):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.ids = []
+        self._id_set = set()
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self.centroids = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._trained_size = 0
+        self._order = None
+        self._offsets = None
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, item_id):
+        return item_id in self._id_set
+
+    @property
+    def vectors(self):
+        return self._vectors[:self._size]
+
+    # ------------------------------------------------------------------ build
+    def add(self, ids, vectors):
+        """Insert voiceprints; ids already present are skipped."""
+        vectors = _normalize(np.atleast_2d(vectors))
+        keep = [i for i, item_id in enumerate(ids) if item_id not in self._id_set]
+        if not keep:
+            return
+        vectors = vectors[keep]
+        ids = [ids[i] for i in keep]
+
+        needed = self._size + len(ids)
+        if needed > len(self._vectors):
+            # Grow geometrically so repeated inserts stay amortized O(1)
+            capacity = max(needed, 2 * len(self._vectors), 1024)
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:self._size] = self.vectors
+            self._vectors = grown
+        self._vectors[self._size:needed] = vectors
+        self._size = needed
+        self.ids.extend(ids)
+        self._id_set.update(ids)
+
+        if self.centroids is not None:
+            self._assign = np.concatenate([self._assign, _nearest(vectors, self.centroids)])
+            self._order = None
+        if self._size >= MIN_TRAIN and self._size >= RETRAIN_FACTOR * self._trained_size:
+            self.train()
+
+    def train(self, n_lists=None):
+        """(Re)cluster the stored voiceprints into ``n_lists`` inverted lists."""
+        if self._size < 2:
+            return
+        n_lists = n_lists or int(max(1, min(4 * np.sqrt(self._size), self._size // 39)))
+        rng = np.random.default_rng(0)
+        sample = self.vectors
+        if len(sample) > TRAIN_SAMPLE:
+            sample = sample[rng.choice(len(sample), TRAIN_SAMPLE, replace=False)]
+        self.centroids = spherical_kmeans(sample, n_lists)
+        self._assign = _nearest(self.vectors, self.centroids)
+        self._trained_size = self._size
+        self._order = None
+
+    def _build_lists(self):
+        self._order = np.argsort(self._assign, kind="stable")
+        counts = np.bincount(self._assign, minlength=len(self.centroids))
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    # ----------------------------------------------------------------- search
+    def _candidates(self, query, nprobe):
+        if self.centroids is None:
+            return None
+        if self._order is None:
+            self._build_lists()
+        nprobe = min(nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate(
+            [self._order[self._offsets[c]:self._offsets[c + 1]] for c in probe]
+        )
+
+    def search(self, query, k=10, threshold=None, nprobe=None, exclude=None):
+        """Return ``[(id, similarity), ...]`` best first.
+
+        With ``threshold`` all hits with similarity above it are returned
+        (``k`` is ignored). ``exclude`` is a predicate on ids to skip, e.g.
+        voiceprints from the current session.
+        """
+        if self._size == 0:
+            return []
+        query = _normalize(query)
+        candidates = self._candidates(query, nprobe or self.nprobe)
+        if candidates is None:
+            scores = self.vectors @ query
+            candidates = np.arange(self._size)
+        else:
+            scores = self._vectors[candidates] @ query
+        if exclude is not None:
+            keep = np.array([not exclude(self.ids[i]) for i in candidates], dtype=bool)
+            candidates, scores = candidates[keep], scores[keep]
+        if threshold is not None:
+            hits = np.flatnonzero(scores > threshold)
+            hits = hits[np.argsort(-scores[hits])]
+        else:
+            k = min(k, len(scores))
+            if k == 0:
+                return []
+            hits = np.argpartition(-scores, k - 1)[:k]
+            hits = hits[np.argsort(-scores[hits])]
+        return [(self.ids[candidates[i]], float(scores[i])) for i in hits]
+
+    # ------------------------------------------------------------ persistence
+    def save(self, path=INDEX_PATH):
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            ids=np.array(self.ids, dtype=str),
+            vectors=self.vectors,
+            centroids=self.centroids if self.centroids is not None else np.zeros((0, self.dim), np.float32),
+            assign=self._assign,
+            trained_size=np.array(self._trained_size),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH, dim=256, nprobe=DEFAULT_NPROBE):
+        index = cls(dim=dim, nprobe=nprobe)
+        if not os.path.exists(path):
+            return index
+        with np.load(path) as data:
+            vectors = data["vectors"]
+            index.dim = vectors.shape[1] if vectors.size else dim
+            index._vectors = vectors.astype(np.float32)
+            index._size = len(vectors)
+            index.ids = data["ids"].tolist()
+            index._id_set = set(index.ids)
+            if len(data["centroids"]):
+                index.centroids = data["centroids"]
+                index._assign = data["assign"]
+            index._trained_size = int(data["trained_size"])
+        return index
+
+    def sync_directory(self, directory):
+        """Add every ``.npy`` voiceprint in ``directory`` not yet indexed.
+
+        Returns the number of new entries.
+        """
+        new = [
+            f for f in sorted(os.listdir(directory))
+            if f.endswith(".npy") and f not in self._id_set
+        ]
+        if new:
+            vectors = np.stack([np.load(os.path.join(directory, f)).ravel() for f in new])
+            self.add(new, vectors)
+        return len(new)
+
+
+def brute_force(vectors, query, k):
+    scores = vectors @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def benchmark(size=100000, dim=256, queries=200, threshold=0.75,
+              nprobes=(1, 4, 8, 16, 32), seed=0):
+    """Compare recall and latency of the IVF index with brute force.
+
+    Synthetic voiceprints are drawn around ``size // 6`` speaker centres
+    (roughly one session's worth of prints per speaker) with noise. Recall
+    is reported for the top-1 match and for all matches above
+    ``threshold``, which is what ``compare_with_existing()`` reports.
+    """
+    rng = np.random.default_rng(seed)
+    noise = 0.025  # per-dimension; same-speaker similarity around 0.86
+    centres = _normalize(rng.standard_normal((max(1, size // 6), dim)))
+    owners = rng.integers(0, len(centres), size)
+    data = _normalize(centres[owners] + noise * rng.standard_normal((size, dim)))
+    query_owners = rng.integers(0, len(centres), queries)
+    query_set = _normalize(
+        centres[query_owners] + noise * rng.standard_normal((queries, dim))
+    )
+
+    t0 = time.perf_counter()
+    index = VoiceprintIndex(dim=dim)
+    index.add([str(i) for i in range(size)], data)
+    if index.centroids is None:
+        index.train()
+    build = time.perf_counter() - t0
+    print(f"Built index over {size} voiceprints ({len(index.centroids)} lists) in {build:.2f}s")
+
+    t0 = time.perf_counter()
+    truth = []
+    for q in query_set:
+        scores = data @ q
+        truth.append((int(np.argmax(scores)), set(np.flatnonzero(scores > threshold).tolist())))
+    brute_ms = (time.perf_counter() - t0) / queries * 1000
+    print(f"brute force : {brute_ms:8.3f} ms/query  recall@1 1.000  recall@>{threshold} 1.000")
+
+    for nprobe in nprobes:
+        t0 = time.perf_counter()
+        results = [index.search(q, threshold=threshold, nprobe=nprobe) for q in query_set]
+        ivf_ms = (time.perf_counter() - t0) / queries * 1000
+        top1 = np.mean([
+            bool(res) and int(res[0][0]) == best for (best, _), res in zip(truth, results)
+        ])
+        found = sum(len(hits & {int(i) for i, _ in res}) for (_, hits), res in zip(truth, results))
+        total = sum(len(hits) for _, hits in truth)
+        print(f"nprobe={nprobe:<4} : {ivf_ms:8.3f} ms/query  recall@1 {top1:.3f}  "
+              f"recall@>{threshold} {found / max(total, 1):.3f}  speedup {brute_ms / ivf_ms:5.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Voiceprint ANN index utilities")
+    parser.add_argument("--benchmark", action="store_true", help="Run the recall/latency benchmark")
+    parser.add_argument("--size", type=int, default=100000, help="Benchmark archive size")
+    parser.add_argument("--queries", type=int, default=200, help="Benchmark query count")
+    parser.add_argument("--rebuild", metavar="DIR", help="Rebuild the index from a fingerprints folder")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(size=args.size, queries=args.queries)
+    if args.rebuild:
+        index = VoiceprintIndex()
+        added = index.sync_directory(args.rebuild)
+        index.train()
+        index.save(os.path.join(args.rebuild, os.path.basename(INDEX_PATH)))
+        print(f"[+] Indexed {added} voiceprints from {args.rebuild}")
@@ -1,19 +1,38 @@
 import os
 import sys
+import glob
+import queue
+import argparse
+import tempfile
+import threading
 import subprocess
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import librosa
 import soundfile as sf
 import numpy as np
 
-print("🔊 Full Soft Voice Enhancer + Transcriber")
+import ffmpeg_pipe
+from enhancer_cache import OutputCache, file_sha256, file_signature
+
+SUPPORTED_EXTENSIONS = (".wav", ".mp3", ".mp4")
+WHISPER_MODEL = "base"
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+# Recorded in the cache manifest; bump "version" when the algorithm changes
+ENHANCE_PARAMS = {
+    "version": 1,
+    "frame_length": FRAME_LENGTH,
+    "hop_length": HOP_LENGTH,
+    "threshold_db": -30,
+}
+PCM_SPOOL_BYTES = 256 * 1024 * 1024  # pipe mode keeps this much decoded audio in memory
+SERVICE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "transcription_service"
+)
+
 
-# allow passing the input file on the command line
-if len(sys.argv) > 1:
-    input_path = sys.argv[1]
-else:
-    input_path = input(
-        "Enter full path to your audio/video file (.wav, .mp3, .mp4): "
-    ).strip().strip('"')
 def sanitize_path(path: str) -> str:
     """Try to resolve problematic paths that contain spaces.
 
@@ -43,77 +62,614 @@ def sanitize_path(path: str) -> str:
 
     return path
 
-input_path = sanitize_path(input_path)
-
-if not os.path.exists(input_path):
-    print(f"❌ File not found: {input_path}")
-    sys.exit(1)
-if not os.path.isfile(input_path):
-    print(f"❌ Path is not a file: {input_path}")
-    sys.exit(1)
-
-base_name = os.path.splitext(os.path.basename(input_path))[0]
-ext = os.path.splitext(input_path)[1].lower()
-
-try:
-    print("📥 Loading audio...")
-    y, sr = librosa.load(input_path, sr=None)
-except Exception as e:
-    print(f"❌ Error loading file: {e}")
-    sys.exit(1)
-
-try:
-    print("🎚️ Enhancing soft voices...")
-    frame_length = 2048
-    hop_length = 512
-    rms = librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0]
+
+def collect_inputs(patterns):
+    """Expand files, directories and glob patterns into a sorted file list.
+
+    Directories are scanned (non-recursively) for supported audio/video
+    files. Duplicates are removed while keeping the order stable.
+    """
+
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [
+                os.path.join(pattern, name) for name in sorted(os.listdir(pattern))
+            ]
+        elif glob.has_magic(pattern):
+            candidates = sorted(glob.glob(pattern))
+        else:
+            candidates = [pattern]
+        for path in candidates:
+            if os.path.isdir(path):
+                continue
+            if path.lower().endswith(SUPPORTED_EXTENSIONS) or path == pattern:
+                files.append(path)
+    return list(dict.fromkeys(files))
+
+
+def output_names(input_paths):
+    """Map each input to the base name of its outputs, ``{path: name}``.
+
+    Outputs are named after the file stem, so ``a.mp3`` and ``a.wav`` would
+    write the same files (at the same time in batch mode). Inputs sharing a
+    stem get their extension appended (``a_mp3``, ``a_wav``). Inputs whose
+    names still collide, such as the same file name in two directories, map
+    to ``None``.
+    """
+    stems = Counter(os.path.splitext(os.path.basename(p))[0].lower() for p in input_paths)
+    names = {}
+    for path in input_paths:
+        stem, ext = os.path.splitext(os.path.basename(path))
+        names[path] = stem if stems[stem.lower()] == 1 else f"{stem}_{ext[1:].lower()}"
+    taken = Counter(name.lower() for name in names.values())
+    return {path: name if taken[name.lower()] == 1 else None for path, name in names.items()}
+
+
+def gain_from_rms(rms):
+    """Per-frame gain lifting frames below -30 dB (relative to the loudest)."""
     rms_db = librosa.amplitude_to_db(rms, ref=np.max)
-    gain_mask = np.where(rms_db < -30, 10**(((-30 - rms_db) / 20)), 1.0)
-    gain_expanded = np.repeat(gain_mask, hop_length)
+    return np.where(rms_db < -30, 10**(((-30 - rms_db) / 20)), 1.0)
+
+
+def enhance_signal(y):
+    """Boost frames quieter than -30 dB (relative to the loudest frame)."""
+    rms = librosa.feature.rms(y=y, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH)[0]
+    gain_mask = gain_from_rms(rms)
+    gain_expanded = np.repeat(gain_mask, HOP_LENGTH)
     gain_expanded = gain_expanded[:len(y)] if len(gain_expanded) > len(y) else np.pad(gain_expanded, (0, len(y) - len(gain_expanded)))
-    y_enhanced = np.clip(y * gain_expanded, -1.0, 1.0)
-    wav_output = f"enhanced_{base_name}.wav"
-    sf.write(wav_output, y_enhanced, sr)
-    print(f"✅ Saved enhanced audio: {wav_output}")
-except Exception as e:
-    print(f"❌ Enhancement error: {e}")
-    sys.exit(1)
-
-# Convert back to MP4 if needed
-if ext == ".mp4":
+    return np.clip(y * gain_expanded, -1.0, 1.0)
+
+
+def streaming_frame_rms(blocks):
+    """Compute the same frame RMS as ``librosa.feature.rms`` from a block stream.
+
+    Only one energy value per hop is kept, so memory stays small for long
+    files. Frames are centred with zero padding like librosa's default.
+    """
+
+    energies = []
+    rest = np.zeros(0)
+    n_samples = 0
+    for block in blocks:
+        n_samples += len(block)
+        block = np.concatenate([rest, block.astype(np.float64)])
+        n_hops = len(block) // HOP_LENGTH
+        frames = block[:n_hops * HOP_LENGTH].reshape(n_hops, HOP_LENGTH)
+        energies.append((frames ** 2).sum(axis=1))
+        rest = block[n_hops * HOP_LENGTH:]
+    if len(rest):
+        energies.append(np.array([(rest ** 2).sum()]))
+
+    hops_per_frame = FRAME_LENGTH // HOP_LENGTH
+    energy = np.concatenate(
+        [np.zeros(hops_per_frame // 2)] + energies + [np.zeros(hops_per_frame)]
+    )
+    cumulative = np.concatenate([[0.0], np.cumsum(energy)])
+    n_frames = 1 + n_samples // HOP_LENGTH
+    frame_energy = (
+        cumulative[hops_per_frame:n_frames + hops_per_frame] - cumulative[:n_frames]
+    )
+    return np.sqrt(np.maximum(frame_energy, 0.0) / FRAME_LENGTH)
+
+
+def enhance_mp4_piped(input_path, mp4_output, wav_output=None):
+    """Enhance the audio of an MP4 through ffmpeg pipes.
+
+    The audio is decoded once. While the frame RMS is measured, the decoded
+    PCM is teed into a spool that stays in memory up to ``PCM_SPOOL_BYTES``
+    and spills to a temporary file beyond that. The gain pass then reads the
+    spool block by block and streams the result straight into an ffmpeg
+    process that copies the video. No WAV is written unless ``wav_output`` is
+    given.
+    """
+
+    sr = ffmpeg_pipe.probe_sample_rate(input_path)
+    with tempfile.SpooledTemporaryFile(max_size=PCM_SPOOL_BYTES) as spool:
+        gain_mask = gain_from_rms(streaming_frame_rms(
+            ffmpeg_pipe.tee_pcm_blocks(ffmpeg_pipe.iter_pcm_blocks(input_path, sr), spool)
+        ))
+        spool.seek(0)
+        _mux_enhanced(ffmpeg_pipe.read_pcm_blocks(spool), gain_mask, input_path, sr,
+                      mp4_output, wav_output)
+
+
+def _mux_enhanced(blocks, gain_mask, input_path, sr, mp4_output, wav_output=None):
+    wav_file = sf.SoundFile(wav_output, "w", samplerate=sr, channels=1) if wav_output else None
+    muxer = ffmpeg_pipe.open_mp4_muxer(input_path, sr, mp4_output)
     try:
-        mp4_output = f"enhanced_{base_name}.mp4"
-        print("🎞️ Rebuilding MP4 with enhanced audio...")
-        # build ffmpeg command as a list to avoid shell injection
-        cmd = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            input_path,
-            "-i",
-            wav_output,
-            "-c:v",
-            "copy",
-            "-map",
-            "0:v:0",
-            "-map",
-            "1:a:0",
-            "-shortest",
-            mp4_output,
-        ]
-        subprocess.run(cmd, check=True)
-        print(f"✅ Rebuilt MP4 saved as: {mp4_output}")
+        offset = 0
+        for block in blocks:
+            hop_index = (offset + np.arange(len(block))) // HOP_LENGTH
+            offset += len(block)
+            enhanced = np.clip(block * gain_mask[hop_index], -1.0, 1.0).astype("<f4")
+            muxer.stdin.write(enhanced.tobytes())
+            if wav_file is not None:
+                wav_file.write(enhanced)
+    except BaseException:
+        muxer.kill()
+        raise
+    finally:
+        if wav_file is not None:
+            wav_file.close()
+    ffmpeg_pipe.close_muxer(muxer)
+
+
+def rebuild_mp4(input_path, wav_output, mp4_output):
+    """Mux ``wav_output`` back into the video stream of ``input_path``."""
+    # build ffmpeg command as a list to avoid shell injection
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        input_path,
+        "-i",
+        wav_output,
+        "-c:v",
+        "copy",
+        "-map",
+        "0:v:0",
+        "-map",
+        "1:a:0",
+        "-shortest",
+        mp4_output,
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def enhance_file(input_path, output_dir=".", pipe=False, keep_wav=False, use_cache=True,
+                 name=None):
+    """Enhance one file and rebuild its MP4 if needed.
+
+    Outputs are named ``enhanced_<name>``; ``name`` defaults to the input's
+    file stem.
+
+    Returns ``(audio_path, input_hash)`` where ``audio_path`` is the enhanced
+    audio to transcribe (the WAV, or the rebuilt MP4 in pipe mode without
+    ``keep_wav``) and ``input_hash`` keys the cache manifest (``None`` when
+    caching is disabled). Stages with a still valid cached result are
+    skipped. Raises on loading or enhancement errors; a failed MP4 rebuild
+    is only reported unless pipe mode is used, where the MP4 is the only
+    output.
+    """
+
+    base_name = name or os.path.splitext(os.path.basename(input_path))[0]
+    ext = os.path.splitext(input_path)[1].lower()
+    wav_output = os.path.join(output_dir, f"enhanced_{base_name}.wav")
+    mp4_output = os.path.join(output_dir, f"enhanced_{base_name}.mp4")
+
+    cache = OutputCache(output_dir) if use_cache else None
+    input_hash = file_sha256(input_path) if cache else None
+
+    if pipe and ext == ".mp4":
+        params = dict(ENHANCE_PARAMS, keep_wav=keep_wav)
+        outputs = cache and cache.lookup(input_hash, "pipe", params)
+        if outputs:
+            print(f"♻️ Using cached MP4: {outputs['mp4']}")
+        else:
+            print(f"🎞️ Enhancing MP4 through ffmpeg pipes: {base_name}")
+            enhance_mp4_piped(input_path, mp4_output, wav_output if keep_wav else None)
+            print(f"✅ Rebuilt MP4 saved as: {mp4_output}")
+            outputs = {"mp4": mp4_output}
+            if keep_wav:
+                print(f"✅ Saved enhanced audio: {wav_output}")
+                outputs["wav"] = wav_output
+            if cache:
+                cache.record(input_hash, "pipe", params, outputs, source=input_path)
+        return outputs.get("wav", outputs["mp4"]), input_hash
+
+    outputs = cache and cache.lookup(input_hash, "enhance", ENHANCE_PARAMS)
+    if outputs:
+        wav_output = outputs["wav"]
+        print(f"♻️ Using cached enhanced audio: {wav_output}")
+    else:
+        print(f"📥 Loading audio: {input_path}")
+        y, sr = librosa.load(input_path, sr=None)
+
+        print(f"🎚️ Enhancing soft voices: {base_name}")
+        y_enhanced = enhance_signal(y)
+        sf.write(wav_output, y_enhanced, sr)
+        print(f"✅ Saved enhanced audio: {wav_output}")
+        if cache:
+            cache.record(
+                input_hash, "enhance", ENHANCE_PARAMS, {"wav": wav_output}, source=input_path
+            )
+
+    # Convert back to MP4 if needed
+    if ext == ".mp4":
+        params = {"audio": file_signature(wav_output)}
+        outputs = cache and cache.lookup(input_hash, "mux", params)
+        if outputs:
+            print(f"♻️ Using cached MP4: {outputs['mp4']}")
+        else:
+            try:
+                print("🎞️ Rebuilding MP4 with enhanced audio...")
+                rebuild_mp4(input_path, wav_output, mp4_output)
+                print(f"✅ Rebuilt MP4 saved as: {mp4_output}")
+                if cache:
+                    cache.record(input_hash, "mux", params, {"mp4": mp4_output})
+            except Exception as e:
+                print(f"⚠️ Could not rebuild MP4: {e}")
+
+    return wav_output, input_hash
+
+
+class ServiceModel:
+    """Expose a running transcription service through ``model.transcribe``.
+
+    ``backend`` and ``model_name`` are what the service reported when we
+    connected; they key cached transcripts together with the service URL.
+    """
+
+    def __init__(self, client, backend=None, model_name=None):
+        self.client = client
+        self.backend = backend
+        self.model_name = model_name
+
+    def transcribe(self, path):
+        return self.client.transcribe_file(path)
+
+
+def connect_service(url):
+    """Return a ``ServiceModel`` for ``url`` or ``None`` if it is not reachable."""
+    if SERVICE_DIR not in sys.path:
+        sys.path.insert(0, SERVICE_DIR)
+    from transcription_client import TranscriptionClient
+
+    client = TranscriptionClient(url)
+    try:
+        health = client.health()
+    except OSError:
+        print(f"⚠️ Transcription service not reachable at {url}")
+        return None
+    print(f"📝 Using transcription service at {url} ({health['backend']} '{health['model']}')")
+    return ServiceModel(client, health["backend"], health["model"])
+
+
+def load_whisper_model(name=WHISPER_MODEL, server=None, segmented=False, workers=None):
+    """Load the Whisper model once. Returns ``None`` if Whisper is unavailable.
+
+    When ``server`` is given and reachable, jobs are sent to the running
+    transcription service instead and no model is loaded locally. With
+    ``segmented`` the speech regions of each file are transcribed in
+    parallel by ``workers`` CPU processes (default: CPU count).
+    """
+    if server:
+        service = connect_service(server)
+        if service is not None:
+            return service
+    if segmented:
+        # Needs webrtcvad; only imported when asked for
+        from segmented_transcribe import SegmentedTranscriber
+
+        transcriber = SegmentedTranscriber(name, workers)
+        print(
+            f"📝 Segmented transcription with '{name}' on {transcriber.workers} worker(s)"
+        )
+        return transcriber
+    try:
+        import whisper
+
+        print(f"📝 Loading Whisper model '{name}'...")
+        return whisper.load_model(name)
     except Exception as e:
-        print(f"⚠️ Could not rebuild MP4: {e}")
+        print(f"ℹ️ Whisper transcription skipped or failed: {e}")
+        return None
 
-# Whisper transcription
-try:
-    print("📝 Transcribing using Whisper (if installed)...")
-    import whisper
-    model = whisper.load_model("base")
+
+def close_model(model):
+    """Shut down a ``SegmentedTranscriber``'s worker pool; other models hold none."""
+    close = getattr(model, "close", None)
+    if close is not None:
+        close()
+
+
+def transcribe_file(model, wav_output, output_dir="."):
+    """Transcribe ``wav_output`` with an already loaded Whisper model.
+
+    Writes the plain transcript and a timestamped segment list and returns
+    ``{"transcript": path, "segments": path}``.
+    """
+    base_name = os.path.splitext(os.path.basename(wav_output))[0]
+    if base_name.startswith("enhanced_"):
+        base_name = base_name[len("enhanced_"):]
     result = model.transcribe(wav_output)
-    with open(f"transcript_{base_name}.txt", "w", encoding="utf-8") as f:
+    transcript = os.path.join(output_dir, f"transcript_{base_name}.txt")
+    with open(transcript, "w", encoding="utf-8") as f:
         f.write(result["text"])
-    print(f"✅ Transcript saved: transcript_{base_name}.txt")
-except Exception as e:
-    print(f"ℹ️ Whisper transcription skipped or failed: {e}")
+    segments = os.path.join(output_dir, f"transcript_{base_name}_segments.txt")
+    with open(segments, "w", encoding="utf-8") as f:
+        for seg in result.get("segments", []):
+            f.write(f"[{seg['start']:.2f}s - {seg['end']:.2f}s]: {seg['text'].strip()}\n")
+    print(f"✅ Transcript saved: {transcript}")
+    return {"transcript": transcript, "segments": segments}
+
+
+def transcriber_params(model_name, service=None, segmented=False):
+    """Identify what produces the transcripts, for the cache.
+
+    With a connected ``service`` that is the service URL and the backend and
+    model it runs; otherwise the local model and mode.
+    """
+    if service is not None:
+        return {"server": service.client.url, "backend": service.backend,
+                "model": service.model_name}
+    return {"model": model_name, "mode": "segmented" if segmented else "full"}
+
+
+def _transcribe_params(transcriber, audio_path):
+    return dict(transcriber, audio=file_signature(audio_path))
+
+
+def cached_transcript(cache, input_hash, transcriber, audio_path):
+    """Return the cached transcript path for ``audio_path`` if still valid.
+
+    ``transcriber`` comes from ``transcriber_params``.
+    """
+    if cache is None or input_hash is None:
+        return None
+    params = _transcribe_params(transcriber, audio_path)
+    outputs = cache.lookup(input_hash, "transcribe", params)
+    if outputs:
+        print(f"♻️ Using cached transcript: {outputs['transcript']}")
+        return outputs["transcript"]
+    return None
+
+
+def record_transcript(cache, input_hash, transcriber, audio_path, outputs):
+    if cache is None or input_hash is None:
+        return
+    params = _transcribe_params(transcriber, audio_path)
+    cache.record(input_hash, "transcribe", params, outputs)
+
+
+def run_single(input_path, output_dir=".", model_name=WHISPER_MODEL, transcribe=True,
+               server=None, enhance_options=None, use_cache=True,
+               transcribe_options=None):
+    input_path = sanitize_path(input_path)
+
+    if not os.path.exists(input_path):
+        print(f"❌ File not found: {input_path}")
+        sys.exit(1)
+    if not os.path.isfile(input_path):
+        print(f"❌ Path is not a file: {input_path}")
+        sys.exit(1)
+
+    try:
+        wav_output, input_hash = enhance_file(
+            input_path, output_dir, use_cache=use_cache, **(enhance_options or {})
+        )
+    except Exception as e:
+        print(f"❌ Enhancement error: {e}")
+        sys.exit(1)
+
+    if not transcribe:
+        return
+    transcribe_options = transcribe_options or {}
+    segmented = transcribe_options.get("segmented", False)
+    cache = OutputCache(output_dir) if use_cache else None
+    # Connecting is cheap, and the cache key depends on what the service runs
+    service = connect_service(server) if server else None
+    transcriber = transcriber_params(model_name, service, segmented)
+    if cached_transcript(cache, input_hash, transcriber, wav_output):
+        return
+
+    # Whisper transcription
+    print("📝 Transcribing using Whisper (if installed)...")
+    model = service or load_whisper_model(model_name, **transcribe_options)
+    if model is None:
+        return
+    try:
+        outputs = transcribe_file(model, wav_output, output_dir)
+        record_transcript(cache, input_hash, transcriber, wav_output, outputs)
+    except Exception as e:
+        print(f"ℹ️ Whisper transcription skipped or failed: {e}")
+    finally:
+        close_model(model)
+
+
+def _transcription_worker(model_name, service, transcriber, wav_queue, output_dir,
+                          cache, transcribe_options):
+    """Consume ``(audio_path, input_hash)`` items until a ``None`` sentinel.
+
+    ``service`` (a connected ``ServiceModel``) is used when given. Otherwise
+    the model is only loaded once the first file actually needs it, so a
+    fully cached batch never loads Whisper at all. ``transcriber`` is the
+    ``transcriber_params`` cache key the transcripts are recorded under.
+    """
+    model = service
+    loaded = service is not None
+    while True:
+        item = wav_queue.get()
+        if item is None:
+            break
+        wav_output, input_hash = item
+        if not loaded:
+            model = load_whisper_model(model_name, **transcribe_options)
+            loaded = True
+        if model is None:
+            continue
+        try:
+            outputs = transcribe_file(model, wav_output, output_dir)
+            record_transcript(cache, input_hash, transcriber, wav_output, outputs)
+        except Exception as e:
+            print(f"⚠️ Transcription failed for {wav_output}: {e}")
+    close_model(model)
+
+
+def run_batch(input_paths, output_dir=".", jobs=None, model_name=WHISPER_MODEL,
+              transcribe=True, server=None, enhance_options=None, use_cache=True,
+              transcribe_options=None):
+    """Enhance many files in a process pool and transcribe them in order of
+    completion with a single Whisper model loaded once. Stages with valid
+    cached results are skipped, so re-running a partly failed batch only
+    redoes what is missing.
+
+    Returns a list of ``(input_path, error)`` tuples for failed files.
+    """
+
+    input_paths = [sanitize_path(p) for p in input_paths]
+    input_paths = [p for p in input_paths if os.path.isfile(p)]
+    if not input_paths:
+        print("❌ No supported input files found.")
+        return []
+
+    failures = []
+    names = output_names(input_paths)
+    for path in [p for p, name in names.items() if name is None]:
+        print(f"❌ Skipping {path}: its outputs would overwrite another input's")
+        failures.append((path, ValueError("output name collision")))
+    input_paths = [p for p in input_paths if names[p] is not None]
+
+    print(f"📂 Batch mode: {len(input_paths)} file(s), {jobs or os.cpu_count()} worker(s)")
+
+    transcribe_options = transcribe_options or {}
+    segmented = transcribe_options.get("segmented", False)
+    cache = OutputCache(output_dir) if use_cache else None
+    wav_queue = queue.Queue()
+    transcriber = None
+    if transcribe:
+        service = connect_service(server) if server else None
+        params = transcriber_params(model_name, service, segmented)
+        # The worker loads the model when the first uncached file reaches it,
+        # while the pool keeps enhancing the rest.
+        transcriber = threading.Thread(
+            target=_transcription_worker,
+            args=(model_name, service, params, wav_queue, output_dir, cache,
+                  transcribe_options),
+            daemon=True,
+        )
+        transcriber.start()
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(
+                enhance_file, path, output_dir, use_cache=use_cache, name=names[path],
+                **(enhance_options or {})
+            ): path
+            for path in input_paths
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                wav_output, input_hash = future.result()
+            except Exception as e:
+                print(f"❌ Enhancement error for {path}: {e}")
+                failures.append((path, e))
+                continue
+            if transcriber is None:
+                continue
+            if not cached_transcript(cache, input_hash, params, wav_output):
+                wav_queue.put((wav_output, input_hash))
+
+    if transcriber is not None:
+        wav_queue.put(None)
+        transcriber.join()
+
+    total = len(names)
+    print(f"✅ Batch complete: {total - len(failures)}/{total} file(s) enhanced")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Enhance soft voices in audio/video files and transcribe them"
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="Input file(s), directories or glob patterns (.wav, .mp3, .mp4)",
+    )
+    parser.add_argument(
+        "--output-dir", default=".", help="Directory for enhanced files and transcripts"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of enhancement processes in batch mode (default: CPU count)",
+    )
+    parser.add_argument("--model", default=WHISPER_MODEL, help="Whisper model name")
+    parser.add_argument(
+        "--no-transcribe", action="store_true", help="Skip Whisper transcription"
+    )
+    parser.add_argument(
+        "--pipe",
+        action="store_true",
+        help="Enhance MP4 audio through ffmpeg pipes without an intermediate WAV",
+    )
+    parser.add_argument(
+        "--keep-wav",
+        action="store_true",
+        help="In pipe mode, also write the enhanced WAV",
+    )
+    parser.add_argument(
+        "--segmented",
+        action="store_true",
+        help="Transcribe VAD speech regions in parallel CPU processes",
+    )
+    parser.add_argument(
+        "--transcribe-workers",
+        type=int,
+        default=None,
+        help="Worker processes for --segmented (default: CPU count)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore the output cache and redo every stage",
+    )
+    parser.add_argument(
+        "--server",
+        default=None,
+        help="URL of a running transcription service (e.g. http://127.0.0.1:8765)",
+    )
+    args = parser.parse_args(argv)
+
+    print("🔊 Full Soft Voice Enhancer + Transcriber")
+
+    inputs = args.inputs
+    if not inputs:
+        inputs = [
+            input(
+                "Enter full path to your audio/video file (.wav, .mp3, .mp4): "
+            ).strip().strip('"')
+        ]
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    enhance_options = {"pipe": args.pipe, "keep_wav": args.keep_wav}
+    transcribe_options = {"segmented": args.segmented, "workers": args.transcribe_workers}
+
+    is_batch = len(inputs) > 1 or any(
+        os.path.isdir(p) or glob.has_magic(p) for p in inputs
+    )
+    if not is_batch:
+        run_single(
+            inputs[0],
+            args.output_dir,
+            args.model,
+            not args.no_transcribe,
+            args.server,
+            enhance_options,
+            not args.no_cache,
+            transcribe_options,
+        )
+        return
+
+    failures = run_batch(
+        collect_inputs(inputs),
+        output_dir=args.output_dir,
+        jobs=args.jobs,
+        model_name=args.model,
+        transcribe=not args.no_transcribe,
+        server=args.server,
+        enhance_options=enhance_options,
+        use_cache=not args.no_cache,
+        transcribe_options=transcribe_options,
+    )
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
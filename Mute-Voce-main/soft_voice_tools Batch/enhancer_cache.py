@@ -0,0 +1,84 @@
+"""Content-hash keyed cache manifest for the soft-voice enhancer.
+
+Each input file gets one JSON manifest named after the SHA-256 of its
+content, so renaming an input (for example by ``sanitize_path()``) does not
+invalidate earlier results. A manifest records, per stage, the parameters
+used and the outputs produced together with their size and modification
+time. A stage is reused only when the parameters match and every recorded
+output is still present and unchanged. Stages that consume an earlier
+output include its ``file_signature()`` in their parameters, so a redone
+enhancement also invalidates the MP4 rebuild and the transcript.
+"""
+
+import os
+import json
+import time
+import hashlib
+
+CACHE_DIR_NAME = ".enhancer_cache"
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_signature(path):
+    """Cheap identity of a file on disk: absolute path, size and mtime."""
+    st = os.stat(path)
+    return {
+        "path": os.path.abspath(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+
+
+class OutputCache:
+    def __init__(self, output_dir="."):
+        self.cache_dir = os.path.join(output_dir, CACHE_DIR_NAME)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _manifest_path(self, input_hash):
+        return os.path.join(self.cache_dir, f"{input_hash}.json")
+
+    def load(self, input_hash):
+        try:
+            with open(self._manifest_path(input_hash), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"input_hash": input_hash, "stages": {}}
+
+    def _save(self, manifest):
+        path = self._manifest_path(manifest["input_hash"])
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, path)
+
+    def lookup(self, input_hash, stage, params):
+        """Return ``{name: path}`` of a still valid stage, or ``None``."""
+        entry = self.load(input_hash)["stages"].get(stage)
+        if entry is None or entry.get("params") != params:
+            return None
+        for output in entry["outputs"].values():
+            try:
+                if file_signature(output["path"]) != output:
+                    return None
+            except OSError:
+                return None
+        return {key: output["path"] for key, output in entry["outputs"].items()}
+
+    def record(self, input_hash, stage, params, outputs, source=None):
+        """Store the result of ``stage`` for the input with ``input_hash``."""
+        manifest = self.load(input_hash)
+        if source is not None:
+            manifest["source"] = os.path.abspath(source)
+        manifest["stages"][stage] = {
+            "params": params,
+            "outputs": {key: file_signature(path) for key, path in outputs.items()},
+            "completed": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self._save(manifest)
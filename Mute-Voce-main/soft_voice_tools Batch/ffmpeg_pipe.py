@@ -0,0 +1,131 @@
+"""ffmpeg helpers for decoding to and muxing from raw PCM pipes.
+
+Audio is exchanged as little-endian float32 mono PCM so video jobs never
+need an intermediate WAV on disk. ``tee_pcm_blocks`` copies a decoded stream
+into a spool file as it is consumed, so a second pass over the audio reads
+the spool (``read_pcm_blocks``) instead of decoding the video again.
+"""
+
+import subprocess
+
+import numpy as np
+
+BYTES_PER_SAMPLE = 4
+BLOCK_FRAMES = 65536
+
+
+def probe_sample_rate(path):
+    """Return the sample rate of the first audio stream in ``path``."""
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "a:0",
+        "-show_entries",
+        "stream=sample_rate",
+        "-of",
+        "csv=p=0",
+        path,
+    ]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    lines = out.strip().splitlines()
+    if not lines:
+        raise ValueError(f"No audio stream found in {path}")
+    try:
+        return int(lines[0])
+    except ValueError:
+        raise ValueError(f"Could not read the sample rate of {path}: {lines[0]!r}") from None
+
+
+def iter_pcm_blocks(path, sample_rate, block_frames=BLOCK_FRAMES):
+    """Decode ``path`` with ffmpeg and yield mono float32 blocks."""
+    cmd = [
+        "ffmpeg",
+        "-v",
+        "error",
+        "-i",
+        path,
+        "-vn",
+        "-f",
+        "f32le",
+        "-ac",
+        "1",
+        "-ar",
+        str(sample_rate),
+        "pipe:1",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    try:
+        block_bytes = block_frames * BYTES_PER_SAMPLE
+        pending = b""
+        while True:
+            data = proc.stdout.read(block_bytes)
+            if not data:
+                break
+            data = pending + data
+            usable = len(data) - len(data) % BYTES_PER_SAMPLE
+            pending = data[usable:]
+            if usable:
+                yield np.frombuffer(data[:usable], dtype="<f4")
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+
+def tee_pcm_blocks(blocks, spool):
+    """Yield ``blocks`` unchanged while appending their PCM to ``spool``."""
+    for block in blocks:
+        spool.write(np.ascontiguousarray(block, dtype="<f4").tobytes())
+        yield block
+
+
+def read_pcm_blocks(spool, block_frames=BLOCK_FRAMES):
+    """Yield float32 blocks back from a file written by ``tee_pcm_blocks``."""
+    while True:
+        data = spool.read(block_frames * BYTES_PER_SAMPLE)
+        if not data:
+            break
+        yield np.frombuffer(data, dtype="<f4")
+
+
+def open_mp4_muxer(video_path, sample_rate, mp4_output):
+    """Start ffmpeg copying the video of ``video_path`` and reading audio on stdin.
+
+    Write float32 mono PCM to ``proc.stdin`` and call ``close_muxer()`` when
+    done.
+    """
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-v",
+        "error",
+        "-i",
+        video_path,
+        "-f",
+        "f32le",
+        "-ar",
+        str(sample_rate),
+        "-ac",
+        "1",
+        "-i",
+        "pipe:0",
+        "-c:v",
+        "copy",
+        "-map",
+        "0:v:0",
+        "-map",
+        "1:a:0",
+        "-shortest",
+        mp4_output,
+    ]
+    return subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+
+def close_muxer(proc):
+    proc.stdin.close()
+    returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, proc.args)
@@ -1,8 +1,12 @@
 @echo off
 cd /d "%~dp0"
-echo Installing requirements...
-python -m pip install --upgrade pip
-python -m pip install -r "requirements.txt" --quiet
+:: Only install requirements when they are missing so repeated runs start fast
+python -c "import librosa, soundfile, numpy, webrtcvad" >nul 2>&1
+if errorlevel 1 (
+    echo Installing requirements...
+    python -m pip install --upgrade pip
+    python -m pip install -r "requirements.txt" --quiet
+)
 
 echo Running script...
 python "enhance_soft_voices_full.py" %*
@@ -3,10 +3,12 @@
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 cd "$SCRIPT_DIR"
 
-echo "Installing requirements..."
-python3 -m pip install --upgrade pip
-python3 -m pip install -r "requirements.txt" --quiet
+# Only install requirements when they are missing so repeated runs start fast
+if ! python3 -c "import librosa, soundfile, numpy, webrtcvad" >/dev/null 2>&1; then
+    echo "Installing requirements..."
+    python3 -m pip install --upgrade pip
+    python3 -m pip install -r "requirements.txt" --quiet
+fi
 
 echo "Running script..."
 python3 "enhance_soft_voices_full.py" "$@"
-
@@ -0,0 +1,166 @@
+"""VAD-segmented, multi-process Whisper transcription for CPU machines.
+
+The enhanced audio is split into speech regions with webrtcvad
+(``vad_frames.py`` from the LiveVoiceAutoZoom scripts), the regions
+are transcribed in parallel by worker processes that each keep their own
+Whisper model, and the segments are stitched back together with
+timestamps relative to the start of the file. Silence is never sent to the
+model.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+SAMPLE_RATE = 16000  # Whisper and webrtcvad both work at 16 kHz
+PADDING_MS = 300  # context kept around each speech region
+MIN_GAP_MS = 600  # shorter pauses between padded regions are bridged
+MAX_REGION_SECONDS = 30  # Whisper decodes 30 s windows
+CUT_SEARCH_SECONDS = 5  # overlong regions are cut at the quietest frame this close to the limit
+# Shared VAD and resampling modules live with the LiveVoiceAutoZoom scripts
+LIVE_SCRIPTS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "LiveVoiceAutoZoom", "LiveVoiceAutoZoom", "scripts"
+)
+
+_model = None
+
+
+def load_audio(path):
+    """Load ``path`` as mono float32 at 16 kHz."""
+    import librosa
+
+    audio, _ = librosa.load(path, sr=SAMPLE_RATE, mono=True)
+    return audio.astype(np.float32)
+
+
+def speech_regions(audio, sample_rate=SAMPLE_RATE):
+    """Return ``[(start, end), ...]`` sample ranges that contain speech.
+
+    Each region reaches ``PADDING_MS`` past its outermost speech frames,
+    clamped to the file, so speech at either end of the file is kept whole.
+    """
+    if LIVE_SCRIPTS_DIR not in sys.path:
+        sys.path.append(LIVE_SCRIPTS_DIR)
+    import webrtcvad
+    from vad_frames import FRAME_DURATION, VAD_MODE, frame_runs, voiced_frame_mask
+
+    # A fresh detector per file: webrtcvad's hangover would otherwise carry
+    # speech over from the end of the previous file
+    speech = voiced_frame_mask(audio, sample_rate, detector=webrtcvad.Vad(VAD_MODE))
+    voiced = np.flatnonzero(speech)
+    if len(voiced) == 0:
+        return []
+    frame_len = int(sample_rate * FRAME_DURATION / 1000)
+    n_frames = len(speech)
+
+    # Closing the gaps (pad + merge short pauses) is a 1-D dilation of the
+    # speech mask by half the minimum gap plus the padding on each side.
+    reach = int(np.ceil((PADDING_MS + MIN_GAP_MS / 2) / FRAME_DURATION))
+    pad = int(np.ceil(PADDING_MS / FRAME_DURATION))
+    dilated = np.convolve(speech.astype(int), np.ones(2 * reach + 1, dtype=int), "same") > 0
+
+    regions = []
+    for first, stop in frame_runs(dilated):
+        # Pad the outermost speech frames of the run rather than shrinking
+        # the dilation back, which would eat into speech at the file edges
+        run = voiced[np.searchsorted(voiced, first):np.searchsorted(voiced, stop)]
+        start = max(run[0] - pad, 0) * frame_len
+        last = run[-1] + 1 + pad
+        end = len(audio) if last >= n_frames else last * frame_len
+        regions.extend(_split_region(audio, start, end, speech, frame_len, sample_rate))
+    return regions
+
+
+def _split_region(audio, start, end, speech, frame_len, sample_rate):
+    """Cut ``[start, end)`` into pieces no longer than the model window.
+
+    Each cut goes at the start of the quietest non-speech frame in the last
+    ``CUT_SEARCH_SECONDS`` before the limit (the quietest frame if VAD hears
+    speech throughout), so words are not split between jobs.
+    """
+    max_len = MAX_REGION_SECONDS * sample_rate
+    if end - start <= max_len:
+        return [(start, end)]
+    frames = audio[:len(speech) * frame_len].reshape(len(speech), frame_len)
+    energy = np.einsum("ij,ij->i", frames, frames)
+    pieces = []
+    while end - start > max_len:
+        limit = start + max_len
+        first = -(-(limit - CUT_SEARCH_SECONDS * sample_rate) // frame_len)
+        candidates = np.arange(max(first, start // frame_len + 1), min(limit // frame_len, len(speech) - 1) + 1)
+        quiet = ~speech[candidates]
+        score = np.where(quiet, energy[candidates], np.inf) if quiet.any() else energy[candidates]
+        cut = int(candidates[np.argmin(score)]) * frame_len
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+
+def _init_worker(model_name, threads):
+    global _model
+    import torch
+    import whisper
+
+    torch.set_num_threads(threads)
+    _model = whisper.load_model(model_name, device="cpu")
+
+
+def _transcribe_region(start, audio):
+    result = _model.transcribe(audio, fp16=False, condition_on_previous_text=False)
+    offset = start / SAMPLE_RATE
+    return [
+        {
+            "start": round(offset + seg["start"], 2),
+            "end": round(offset + seg["end"], 2),
+            "text": seg["text"],
+        }
+        for seg in result["segments"]
+    ]
+
+
+class SegmentedTranscriber:
+    """Drop-in for ``whisper_model.transcribe(path)`` using a worker pool.
+
+    The pool (and each worker's model) is created on first use and kept
+    for later files, so batch runs load the model once per worker.
+    """
+
+    def __init__(self, model_name="base", workers=None):
+        self.model_name = model_name
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+
+    def _ensure_pool(self):
+        if self.pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.model_name, threads),
+            )
+        return self.pool
+
+    def transcribe(self, path):
+        audio = load_audio(path)
+        regions = speech_regions(audio)
+        if not regions:
+            return {"text": "", "segments": []}
+        pool = self._ensure_pool()
+        # Longest regions first keeps the workers evenly loaded
+        order = sorted(regions, key=lambda r: r[0] - r[1])
+        futures = [
+            pool.submit(_transcribe_region, start, audio[start:end])
+            for start, end in order
+        ]
+        segments = [seg for future in futures for seg in future.result()]
+        segments.sort(key=lambda seg: seg["start"])
+        text = "".join(seg["text"] for seg in segments)
+        return {"text": text, "segments": segments}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
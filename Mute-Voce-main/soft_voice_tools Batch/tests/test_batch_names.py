@@ -0,0 +1,33 @@
+import os
+
+import soundfile as sf
+
+from enhance_soft_voices_full import output_names, run_batch
+
+
+def test_shared_stems_get_their_extension():
+    names = output_names(["in/a.mp3", "in/a.WAV", "in/b.wav"])
+
+    assert names == {"in/a.mp3": "a_mp3", "in/a.WAV": "a_wav", "in/b.wav": "b"}
+
+
+def test_same_file_name_in_two_directories_is_rejected():
+    names = output_names(["one/a.wav", "two/a.wav", "one/b.wav"])
+
+    assert names == {"one/a.wav": None, "two/a.wav": None, "one/b.wav": "b"}
+
+
+def test_batch_keeps_outputs_of_shared_stems_apart(tmp_path, voice):
+    inputs = []
+    for ext, sr in (("wav", 16000), ("flac", 22050)):
+        path = str(tmp_path / f"a.{ext}")
+        sf.write(path, voice(0.5, sr), sr)
+        inputs.append(path)
+    out = tmp_path / "out"
+    out.mkdir()
+
+    failures = run_batch(inputs, str(out), jobs=2, transcribe=False, use_cache=False)
+
+    assert failures == []
+    assert sorted(os.listdir(out)) == ["enhanced_a_flac.wav", "enhanced_a_wav.wav"]
+    assert sf.info(str(out / "enhanced_a_flac.wav")).samplerate == 22050
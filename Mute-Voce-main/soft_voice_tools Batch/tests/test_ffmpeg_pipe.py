@@ -0,0 +1,88 @@
+import io
+import shutil
+import subprocess
+
+import librosa
+import numpy as np
+import pytest
+import soundfile as sf
+
+import ffmpeg_pipe
+from enhance_soft_voices_full import (
+    FRAME_LENGTH,
+    HOP_LENGTH,
+    enhance_mp4_piped,
+    enhance_signal,
+    streaming_frame_rms,
+)
+
+SR = 16000
+
+
+def soft_and_loud(voice):
+    # A loud first half and a soft second half, so the gain mask varies
+    y = voice(2.0, SR)
+    y[SR:] *= 0.01
+    return y
+
+
+def blocks_of(y, size):
+    return [y[i:i + size] for i in range(0, len(y), size)]
+
+
+@pytest.mark.parametrize("block", [1000, HOP_LENGTH + 1, 3 * FRAME_LENGTH - 7, 65536])
+def test_streaming_rms_matches_librosa(voice, block):
+    y = soft_and_loud(voice)
+
+    rms = streaming_frame_rms(blocks_of(y, block))
+
+    expected = librosa.feature.rms(y=y, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH)[0]
+    assert rms.shape == expected.shape
+    assert np.allclose(rms, expected, rtol=1e-4, atol=1e-7)
+
+
+class FakeMuxer:
+    def __init__(self):
+        self.stdin = io.BytesIO()
+        self.killed = False
+
+    def kill(self):
+        self.killed = True
+
+
+def test_piped_enhancement_matches_in_memory(tmp_path, voice, monkeypatch):
+    y = soft_and_loud(voice)
+    muxer = FakeMuxer()
+    monkeypatch.setattr(ffmpeg_pipe, "probe_sample_rate", lambda path: SR)
+    monkeypatch.setattr(ffmpeg_pipe, "iter_pcm_blocks", lambda path, sr: iter(blocks_of(y, 5000)))
+    monkeypatch.setattr(ffmpeg_pipe, "open_mp4_muxer", lambda path, sr, out: muxer)
+    monkeypatch.setattr(ffmpeg_pipe, "close_muxer", lambda proc: None)
+    wav_output = str(tmp_path / "out.wav")
+
+    enhance_mp4_piped("in.mp4", str(tmp_path / "out.mp4"), wav_output)
+
+    piped = np.frombuffer(muxer.stdin.getvalue(), dtype="<f4")
+    expected = enhance_signal(y)
+    assert len(piped) == len(y)
+    assert np.allclose(piped, expected, atol=1e-5)
+    assert np.allclose(sf.read(wav_output, dtype="float32")[0], piped, atol=1e-4)
+    assert not muxer.killed
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+                    reason="ffmpeg not installed")
+def test_piped_enhancement_with_ffmpeg(tmp_path, voice):
+    wav_input = str(tmp_path / "audio.wav")
+    sf.write(wav_input, soft_and_loud(voice), SR)
+    mp4_input = str(tmp_path / "in.mp4")
+    subprocess.run(
+        ["ffmpeg", "-y", "-v", "error", "-f", "lavfi", "-i", "color=size=64x64:duration=2",
+         "-i", wav_input, "-c:v", "libx264", "-c:a", "aac", "-shortest", mp4_input],
+        check=True,
+    )
+    mp4_output = str(tmp_path / "out.mp4")
+
+    enhance_mp4_piped(mp4_input, mp4_output, str(tmp_path / "out.wav"))
+
+    assert ffmpeg_pipe.probe_sample_rate(mp4_output) == SR
+    assert abs(sf.info(str(tmp_path / "out.wav")).duration - 2.0) < 0.1
@@ -0,0 +1,52 @@
+import numpy as np
+
+from segmented_transcribe import MAX_REGION_SECONDS, MIN_GAP_MS, PADDING_MS, SAMPLE_RATE, speech_regions
+
+SLACK = int(0.2 * SAMPLE_RATE)  # webrtcvad hangover plus frame rounding
+PAD = PADDING_MS * SAMPLE_RATE // 1000
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_speech_at_file_edges_is_kept_whole(voice):
+    audio = np.concatenate([voice(1.0), silence(2.0), voice(1.0)])
+
+    regions = speech_regions(audio)
+
+    assert len(regions) == 2
+    (start, end), (second_start, second_end) = regions
+    assert start == 0
+    assert SAMPLE_RATE + PAD <= end <= SAMPLE_RATE + PAD + SLACK
+    assert 3 * SAMPLE_RATE - PAD - SLACK <= second_start <= 3 * SAMPLE_RATE - PAD
+    assert second_end == len(audio)
+
+
+def test_short_pauses_are_bridged(voice):
+    pause = MIN_GAP_MS / 2000
+    audio = np.concatenate([silence(1.0), voice(1.0), silence(pause), voice(1.0), silence(1.0)])
+
+    regions = speech_regions(audio)
+
+    assert len(regions) == 1
+    start, end = regions[0]
+    assert SAMPLE_RATE - PAD - SLACK <= start <= SAMPLE_RATE - PAD
+    assert end < len(audio)
+
+
+def test_long_regions_are_cut_in_pauses(voice):
+    # 4 s phrases with pauses short enough to be bridged into one region
+    phrase, pause = 4.0, MIN_GAP_MS / 2000
+    audio = np.concatenate([np.concatenate([voice(phrase), silence(pause)]) for _ in range(12)])
+
+    regions = speech_regions(audio)
+
+    assert len(regions) > 1
+    assert regions[0][0] == 0 and regions[-1][1] == len(audio)
+    assert all(a[1] == b[0] for a, b in zip(regions, regions[1:]))
+    assert all(end - start <= MAX_REGION_SECONDS * SAMPLE_RATE for start, end in regions)
+    period = (phrase + pause) * SAMPLE_RATE
+    for _, cut in regions[:-1]:
+        # Every cut falls in a pause, not inside a phrase
+        assert cut % period >= phrase * SAMPLE_RATE
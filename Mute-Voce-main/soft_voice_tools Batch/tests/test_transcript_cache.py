@@ -0,0 +1,31 @@
+from enhance_soft_voices_full import (
+    ServiceModel,
+    cached_transcript,
+    record_transcript,
+    transcriber_params,
+)
+from enhancer_cache import OutputCache
+
+
+class FakeClient:
+    def __init__(self, url):
+        self.url = url
+
+
+def test_transcripts_are_cached_per_service_and_model(tmp_path):
+    audio = tmp_path / "enhanced_a.wav"
+    audio.write_bytes(b"audio")
+    transcript = tmp_path / "transcript_a.txt"
+    transcript.write_text("text")
+    cache = OutputCache(str(tmp_path))
+    remote = transcriber_params("base", ServiceModel(FakeClient("http://a:8765"), "whisper", "base"))
+    record_transcript(cache, "hash", remote, str(audio), {"transcript": str(transcript)})
+
+    assert cached_transcript(cache, "hash", remote, str(audio)) == str(transcript)
+    for other in (
+        transcriber_params("base", ServiceModel(FakeClient("http://b:8765"), "whisper", "base")),
+        transcriber_params("base", ServiceModel(FakeClient("http://a:8765"), "faster-whisper", "base")),
+        transcriber_params("base", ServiceModel(FakeClient("http://a:8765"), "whisper", "small")),
+        transcriber_params("base"),
+    ):
+        assert cached_transcript(cache, "hash", other, str(audio)) is None
@@ -0,0 +1,18 @@
+"""Synthetic speech for the tools' test suites; each ``tests/conftest.py`` imports it."""
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def voice():
+    """``voice(seconds, sr)``: a harmonic, amplitude-modulated tone webrtcvad hears as speech."""
+    rng = np.random.default_rng(0)
+
+    def make(seconds, sr=16000, f0=150):
+        t = np.arange(int(seconds * sr)) / sr
+        sig = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 20))
+        env = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+        return (0.3 * sig * env / np.max(np.abs(sig)) + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+
+    return make
@@ -0,0 +1,105 @@
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+import transcription_client
+from transcription_client import TranscriptionClient
+from transcription_server import (
+    IGNORED_OPTIONS,
+    TranscriptionService,
+    UnsupportedOptionsError,
+    filter_options,
+    make_handler,
+)
+
+# The options the live transcriber sends with every job
+LIVE_OPTIONS = {"language": "en", "beam_size": 5, "vad_filter": True,
+                "condition_on_previous_text": False}
+WHISPER_OPTIONS = {"language", "beam_size", "condition_on_previous_text", "fp16"}
+
+
+class FakeBackend:
+    backend = "whisper"
+    model_name = "fake"
+    options = WHISPER_OPTIONS
+
+    def __init__(self, release=None):
+        self.release = release
+
+    def transcribe(self, audio, **options):
+        if self.release is not None:
+            self.release.wait(5)
+        options = filter_options(options, self.options, IGNORED_OPTIONS[self.backend])
+        return {"text": "ok", "segments": [], "language": options.get("language"),
+                "samples": None if isinstance(audio, str) else len(audio)}
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(backend):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(TranscriptionService(backend)))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_faster_whisper_only_options_are_dropped_for_whisper():
+    options = filter_options(LIVE_OPTIONS, WHISPER_OPTIONS, IGNORED_OPTIONS["whisper"])
+    assert options == {"language": "en", "beam_size": 5, "condition_on_previous_text": False}
+
+
+def test_unknown_option_is_rejected():
+    with pytest.raises(UnsupportedOptionsError, match="no_such_option"):
+        filter_options({"no_such_option": 1}, WHISPER_OPTIONS, IGNORED_OPTIONS["whisper"])
+
+
+def test_unsupported_option_fails_only_that_job():
+    service = TranscriptionService(FakeBackend())
+    audio = np.zeros(16000, dtype=np.float32)
+    bad = service.submit(audio, options={"no_such_option": 1})
+    good = service.submit(audio, options=LIVE_OPTIONS)
+
+    bad_job = service.get(bad, wait=5)
+    assert bad_job["status"] == "error"
+    assert bad_job["error"] == "unsupported option(s): no_such_option"
+    good_job = service.get(good, wait=5)
+    assert good_job["status"] == "done"
+    assert good_job["result"]["language"] == "en"
+
+
+def test_raw_audio_is_resampled_to_the_model_rate(serve):
+    client = TranscriptionClient(serve(FakeBackend()))
+    result = client.transcribe_audio(np.zeros(44100, dtype=np.float32), 44100)
+    assert result["samples"] == 16000
+
+
+def test_non_numeric_wait_is_a_bad_request(serve):
+    url = serve(FakeBackend())
+    job_id = TranscriptionClient(url).submit_file("missing.wav")
+    for wait in ("soon", "nan"):
+        with pytest.raises(urllib.error.HTTPError) as info:
+            urllib.request.urlopen(f"{url}/jobs/{job_id}?wait={wait}", timeout=5)
+        assert info.value.code == 400
+
+
+def test_file_jobs_have_no_deadline_by_default(serve, monkeypatch):
+    # Several long polls pass before the job finishes
+    monkeypatch.setattr(transcription_client, "POLL_SECONDS", 0.1)
+    release = threading.Event()
+    client = TranscriptionClient(serve(FakeBackend(release)))
+    job_id = client.submit_file("long.wav")
+    with pytest.raises(TimeoutError):
+        client.result(job_id, timeout=0.3)
+    threading.Timer(0.5, release.set).start()
+    assert client.result(job_id)["text"] == "ok"
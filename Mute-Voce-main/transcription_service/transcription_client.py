@@ -0,0 +1,101 @@
+"""Thin client for ``transcription_server.py``.
+
+Uses only the standard library (plus NumPy for in-memory audio) so scripts
+can talk to a running service without importing any model code.
+"""
+
+import os
+import json
+import time
+import urllib.request
+from urllib.parse import urlencode
+
+import numpy as np
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+REQUEST_TIMEOUT = 30.0
+# Longest single ``?wait=`` long poll while waiting for a job
+POLL_SECONDS = 30.0
+
+
+class TranscriptionError(RuntimeError):
+    """Raised when the service reports a failed job."""
+
+
+class TranscriptionClient:
+    """``timeout`` bounds how long ``result`` waits for a job to finish.
+
+    The default ``None`` waits as long as the service keeps the job queued or
+    running; a long file behind other jobs can take far longer than any fixed
+    deadline.
+    """
+
+    def __init__(self, url=DEFAULT_URL, timeout=None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, data=None, content_type=None, timeout=REQUEST_TIMEOUT):
+        request = urllib.request.Request(self.url + path, data=data)
+        if content_type:
+            request.add_header("Content-Type", content_type)
+        with urllib.request.urlopen(request, timeout=timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+    def health(self):
+        """Return the service's backend, model and queue depth."""
+        return self._request("/health", timeout=2.0)
+
+    def is_available(self):
+        """Return ``True`` if the service answers its health check."""
+        try:
+            self.health()
+            return True
+        except OSError:
+            return False
+
+    def submit_file(self, path, priority=None, **options):
+        """Queue a file that the service can read from local disk."""
+        payload = {"path": os.path.abspath(path), "options": options}
+        if priority is not None:
+            payload["priority"] = priority
+        response = self._request(
+            "/jobs", json.dumps(payload).encode("utf-8"), "application/json"
+        )
+        return response["id"]
+
+    def submit_audio(self, audio, sample_rate, priority=None, **options):
+        """Queue an in-memory mono float32 signal."""
+        params = {"sample_rate": int(sample_rate)}
+        if priority is not None:
+            params["priority"] = priority
+        params.update({k: json.dumps(v) for k, v in options.items()})
+        data = np.ascontiguousarray(audio, dtype="<f4").tobytes()
+        response = self._request(
+            "/jobs?" + urlencode(params), data, "application/octet-stream"
+        )
+        return response["id"]
+
+    def result(self, job_id, timeout=None):
+        """Block until ``job_id`` finishes and return its result dict.
+
+        Raises ``TimeoutError`` only when ``timeout`` (or the client's) is set.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            wait = POLL_SECONDS
+            if deadline is not None:
+                wait = min(max(deadline - time.time(), 0.0), POLL_SECONDS)
+            job = self._request(f"/jobs/{job_id}?wait={wait:.1f}", timeout=wait + 10.0)
+            if job["status"] == "done":
+                return job["result"]
+            if job["status"] == "error":
+                raise TranscriptionError(job.get("error") or "transcription failed")
+            if deadline is not None and time.time() >= deadline:
+                raise TimeoutError(f"Job {job_id} did not finish in time")
+
+    def transcribe_file(self, path, priority=None, **options):
+        return self.result(self.submit_file(path, priority, **options))
+
+    def transcribe_audio(self, audio, sample_rate, priority=None, **options):
+        return self.result(self.submit_audio(audio, sample_rate, priority, **options))
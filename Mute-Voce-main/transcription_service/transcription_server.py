@@ -0,0 +1,341 @@
+"""Long-lived local transcription service.
+
+Keeps one Whisper model resident and serves transcription jobs over
+localhost HTTP so scripts do not pay the model load time on every run.
+
+Endpoints
+---------
+``POST /jobs``
+    Submit a job. Either a JSON body ``{"path": ..., "priority": ...,
+    "options": {...}}`` for a file on this machine, or raw little-endian
+    float32 mono PCM (``Content-Type: application/octet-stream``) with
+    ``sample_rate``, ``priority`` and option query parameters.
+    Returns ``{"id": ...}``.
+``GET /jobs/<id>?wait=SECONDS``
+    Job status and, once finished, the result. ``wait`` blocks until the job
+    is done or the timeout expires.
+``GET /health``
+    Backend, model name and current queue depth.
+
+Options are checked against the loaded backend. Options that only tune the
+other library's silence handling (``vad_filter`` for faster-whisper) are
+ignored; anything else the backend does not know fails the job with an
+"unsupported option" error instead of a ``TypeError`` from the model.
+
+Lower ``priority`` values run first; jobs with equal priority run in
+submission order.
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+import dataclasses
+import uuid
+import queue
+import argparse
+import threading
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+# The shared resampler lives with the LiveVoiceAutoZoom scripts
+LIVE_SCRIPTS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "LiveVoiceAutoZoom", "LiveVoiceAutoZoom", "scripts"
+)
+if LIVE_SCRIPTS_DIR not in sys.path:
+    sys.path.append(LIVE_SCRIPTS_DIR)
+
+from resampling import MODEL_RATE, resample
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_PRIORITY = 10
+MAX_RESULTS = 1000
+# Options only one library understands that never change the text much;
+# the other backend drops them so clients can send one option set to either
+IGNORED_OPTIONS = {
+    "whisper": {"vad_filter", "vad_parameters"},
+    "faster-whisper": {"fp16", "verbose"},
+}
+
+
+class UnsupportedOptionsError(ValueError):
+    """A job asked for options the loaded backend does not accept."""
+
+
+def filter_options(options, supported, ignored=()):
+    """Return the ``options`` to pass to the model.
+
+    Options in ``ignored`` are dropped; any other option not in ``supported``
+    raises ``UnsupportedOptionsError``.
+    """
+    unknown = sorted(set(options) - set(supported) - set(ignored))
+    if unknown:
+        raise UnsupportedOptionsError(f"unsupported option(s): {', '.join(unknown)}")
+    return {k: v for k, v in options.items() if k in supported}
+
+
+def _keyword_names(func, skip=()):
+    return {
+        name for name, p in inspect.signature(func).parameters.items()
+        if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY) and name not in skip
+    }
+
+
+class WhisperBackend:
+    """Adapter for ``openai-whisper`` and ``faster-whisper`` models."""
+
+    def __init__(self, backend="whisper", model_name="base", device=None,
+                 compute_type=None):
+        self.backend = backend
+        self.model_name = model_name
+        print(f"[INFO] Loading {backend} model '{model_name}'...")
+        if backend == "faster-whisper":
+            from faster_whisper import WhisperModel
+
+            self.model = WhisperModel(
+                model_name,
+                device=device or "auto",
+                compute_type=compute_type or "default",
+            )
+            self.options = _keyword_names(self.model.transcribe, skip=("audio",))
+        else:
+            import whisper
+
+            self.model = whisper.load_model(model_name, device=device)
+            # transcribe() forwards the rest (beam_size, language, ...) to
+            # DecodingOptions
+            self.options = _keyword_names(whisper.transcribe, skip=("model", "audio")) | {
+                f.name for f in dataclasses.fields(whisper.DecodingOptions)
+            }
+        print("[INFO] Model loaded.")
+
+    def transcribe(self, audio, **options):
+        """Transcribe a file path or a 16 kHz float32 array.
+
+        Raises ``UnsupportedOptionsError`` for options this backend rejects.
+        """
+        options = filter_options(options, self.options, IGNORED_OPTIONS[self.backend])
+        if self.backend == "faster-whisper":
+            segments, info = self.model.transcribe(audio, **options)
+            segments = [
+                {"start": s.start, "end": s.end, "text": s.text} for s in segments
+            ]
+            return {
+                "text": "".join(s["text"] for s in segments),
+                "segments": segments,
+                "language": info.language,
+            }
+        result = self.model.transcribe(audio, **options)
+        return {
+            "text": result["text"],
+            "segments": [
+                {"start": s["start"], "end": s["end"], "text": s["text"]}
+                for s in result.get("segments", [])
+            ],
+            "language": result.get("language"),
+        }
+
+
+class TranscriptionService:
+    """Priority job queue, single inference worker and bounded result store."""
+
+    def __init__(self, backend, max_results=MAX_RESULTS):
+        self.backend = backend
+        self.max_results = max_results
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.done = threading.Condition(self.lock)
+        self.pending = queue.PriorityQueue()
+        self._seq = 0
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, audio, priority=DEFAULT_PRIORITY, options=None):
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self._seq += 1
+            self.jobs[job_id] = {
+                "id": job_id,
+                "status": "queued",
+                "priority": priority,
+                "submitted": time.time(),
+                "audio": audio,
+                "options": options or {},
+            }
+            self.pending.put((priority, self._seq, job_id))
+            self._evict()
+        return job_id
+
+    def get(self, job_id, wait=0.0):
+        deadline = time.time() + wait
+        with self.lock:
+            job = self.jobs.get(job_id)
+            while job is not None and job["status"] in ("queued", "running"):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.done.wait(remaining)
+                job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {k: v for k, v in job.items() if k not in ("audio", "options")}
+
+    def queue_depth(self):
+        return self.pending.qsize()
+
+    def _evict(self):
+        # Drop the oldest finished jobs once the store is full
+        finished = [
+            job_id for job_id, job in self.jobs.items()
+            if job["status"] in ("done", "error")
+        ]
+        excess = len(self.jobs) - self.max_results
+        for job_id in finished[:max(excess, 0)]:
+            del self.jobs[job_id]
+
+    def _run(self):
+        while True:
+            _, _, job_id = self.pending.get()
+            with self.lock:
+                job = self.jobs.get(job_id)
+                if job is None:
+                    continue
+                job["status"] = "running"
+                job["started"] = time.time()
+            try:
+                result = self.backend.transcribe(job["audio"], **job["options"])
+                status, error = "done", None
+            except UnsupportedOptionsError as e:
+                result, status, error = None, "error", str(e)
+                print(f"[WARNING] Job {job_id} rejected: {error}")
+            except Exception:
+                result, status, error = None, "error", traceback.format_exc()
+                print(f"[ERROR] Job {job_id} failed:\n{error}")
+            with self.lock:
+                job["status"] = status
+                job["result"] = result
+                job["error"] = error
+                job["finished"] = time.time()
+                job["audio"] = None
+                self.done.notify_all()
+
+
+def _parse_option(value):
+    """Decode query-string option values (numbers, booleans, strings)."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            if url.path == "/health":
+                self._send_json(200, {
+                    "backend": service.backend.backend,
+                    "model": service.backend.model_name,
+                    "queued": service.queue_depth(),
+                })
+                return
+            if url.path.startswith("/jobs/"):
+                job_id = url.path[len("/jobs/"):]
+                try:
+                    wait = float(params.get("wait", ["0"])[0])
+                    if not np.isfinite(wait):
+                        raise ValueError(wait)
+                except ValueError:
+                    self._send_json(400, {"error": "bad request: wait must be a number of seconds"})
+                    return
+                job = service.get(job_id, wait=wait)
+                if job is None:
+                    self._send_json(404, {"error": "unknown job"})
+                else:
+                    self._send_json(200, job)
+                return
+            self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/jobs":
+                self._send_json(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            content_type = self.headers.get("Content-Type", "")
+            try:
+                if content_type.startswith("application/json"):
+                    request = json.loads(body)
+                    audio = request["path"]
+                    priority = int(request.get("priority", DEFAULT_PRIORITY))
+                    options = request.get("options", {})
+                else:
+                    params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                    sample_rate = int(params.pop("sample_rate", MODEL_RATE))
+                    priority = int(params.pop("priority", DEFAULT_PRIORITY))
+                    options = {k: _parse_option(v) for k, v in params.items()}
+                    audio = np.frombuffer(body, dtype="<f4").astype(np.float32)
+                    audio = resample(audio, sample_rate, MODEL_RATE)
+            except (KeyError, ValueError) as e:
+                self._send_json(400, {"error": f"bad request: {e}"})
+                return
+            job_id = service.submit(audio, priority=priority, options=options)
+            self._send_json(202, {"id": job_id})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local transcription service")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to bind")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument(
+        "--backend",
+        choices=["whisper", "faster-whisper"],
+        default="whisper",
+        help="Inference library to use",
+    )
+    parser.add_argument("--model", default="base", help="Model name or size")
+    parser.add_argument("--device", default=None, help="Inference device (cpu, cuda)")
+    parser.add_argument("--compute-type", default=None, help="faster-whisper compute type")
+    parser.add_argument(
+        "--max-results",
+        type=int,
+        default=MAX_RESULTS,
+        help="Finished jobs kept in the results store",
+    )
+    args = parser.parse_args()
+
+    backend = WhisperBackend(args.backend, args.model, args.device, args.compute_type)
+    service = TranscriptionService(backend, max_results=args.max_results)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"[INFO] Transcription service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("[INFO] Stopped by user.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
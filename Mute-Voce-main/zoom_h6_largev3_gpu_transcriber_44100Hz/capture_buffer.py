@@ -0,0 +1,59 @@
+"""Preallocated, sample-counted chunking of the capture stream.
+
+``ChunkRing`` owns ``slots`` chunk-sized rows allocated once. Incoming
+blocks are copied straight into the current row, and each completed row is
+yielded as a view (no copy, no allocation) together with its exact start
+frame. Chunk boundaries are therefore a pure function of the sample count,
+not of wall-clock time.
+
+A yielded chunk stays valid until ``slots - 1`` further chunks have been
+completed, after which its row is reused. Consumers that keep chunks longer
+(e.g. an inference queue) must either copy them or size ``slots`` to cover
+everything they may hold at once.
+"""
+
+import numpy as np
+
+
+class ChunkRing:
+    def __init__(self, chunk_frames, slots=4):
+        if slots < 2:
+            raise ValueError("ChunkRing needs at least two slots")
+        self.chunk_frames = int(chunk_frames)
+        self._rows = np.zeros((slots, self.chunk_frames), dtype=np.float32)
+        self._slot = 0
+        self._fill = 0
+        self.chunks = 0  # completed chunks so far
+
+    @property
+    def slots(self):
+        return len(self._rows)
+
+    @property
+    def frames(self):
+        """Total frames received."""
+        return self.chunks * self.chunk_frames + self._fill
+
+    def push(self, data):
+        """Add a block (``(n,)`` or ``(n, channels)``; the first channel is used).
+
+        Yields ``(chunk, start_frame)`` for every chunk the block completes.
+        """
+        if data.ndim > 1:
+            data = data[:, 0]
+        while len(data):
+            row = self._rows[self._slot]
+            n = min(len(data), self.chunk_frames - self._fill)
+            row[self._fill:self._fill + n] = data[:n]
+            self._fill += n
+            data = data[n:]
+            if self._fill == self.chunk_frames:
+                start = self.chunks * self.chunk_frames
+                self.chunks += 1
+                self._slot = (self._slot + 1) % self.slots
+                self._fill = 0
+                yield row, start
+
+    def pending(self):
+        """View of the incomplete chunk collected so far."""
+        return self._rows[self._slot, :self._fill]
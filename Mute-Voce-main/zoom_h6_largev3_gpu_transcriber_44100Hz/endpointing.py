@@ -0,0 +1,138 @@
+"""Speech endpointing in front of the transcription model.
+
+``Endpointer`` runs webrtcvad over 30 ms frames of the capture stream.
+A segment opens once ``onset_frames`` consecutive frames are speech and
+starts ``pre_roll`` seconds earlier, so the first syllable is not clipped.
+It closes after ``trailing_silence`` seconds without speech, or when it
+reaches ``max_seconds`` (a long monologue is then cut and continued in a
+new segment). Segments with less than ``min_speech`` seconds of speech are
+discarded. Only speech reaches the model, and an utterance is submitted as
+soon as its trailing silence has elapsed.
+
+Frames are classified with ``vad_frames.voiced_frame_mask`` (shared with
+the LiveVoiceAutoZoom scripts), which takes the 16 kHz audio of the live
+transcriber directly and classifies other rates webrtcvad does not support
+(44.1 kHz) on a 16 kHz copy. The segments keep the input rate.
+"""
+
+import os
+import sys
+from collections import deque
+
+import numpy as np
+
+# Shared VAD and resampling modules live with the LiveVoiceAutoZoom scripts
+LIVE_SCRIPTS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "LiveVoiceAutoZoom", "LiveVoiceAutoZoom", "scripts"
+)
+if LIVE_SCRIPTS_DIR not in sys.path:
+    sys.path.append(LIVE_SCRIPTS_DIR)
+
+from vad_frames import FRAME_DURATION as FRAME_MS, VAD_MODE, voiced_frame_mask
+
+ONSET_FRAMES = 3  # 90 ms of speech opens a segment
+PRE_ROLL = 0.3
+TRAILING_SILENCE = 0.6
+MAX_SECONDS = 15.0  # well inside Whisper's 30 s window
+MIN_SPEECH = 0.25
+
+
+class Endpointer:
+    def __init__(self, sample_rate, trailing_silence=TRAILING_SILENCE, max_seconds=MAX_SECONDS,
+                 pre_roll=PRE_ROLL, min_speech=MIN_SPEECH, onset_frames=ONSET_FRAMES,
+                 mode=VAD_MODE):
+        import webrtcvad
+
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * FRAME_MS // 1000
+        self._vad = webrtcvad.Vad(mode)
+        self.onset_frames = onset_frames
+        self.trailing_frames = max(1, int(round(trailing_silence * 1000 / FRAME_MS)))
+        self.max_frames = max(1, int(max_seconds * 1000 / FRAME_MS))
+        self.min_speech_frames = int(min_speech * 1000 / FRAME_MS)
+        pre_roll_frames = max(onset_frames, int(round(pre_roll * 1000 / FRAME_MS)))
+        self._history = deque(maxlen=pre_roll_frames)
+        # One segment buffer, allocated once and reused
+        self._segment = np.zeros((self.max_frames + pre_roll_frames) * self.frame_len, dtype=np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._frames_seen = 0
+        self._active = False
+        self._segment_frames = 0
+        self._segment_start = 0
+        self._speech_frames = 0
+        self._run = 0  # consecutive speech frames (idle) or silent frames (active)
+
+    def _classify(self, frames):
+        """webrtcvad decisions for ``(n, frame_len)`` native-rate frames."""
+        return voiced_frame_mask(frames.reshape(-1), self.sample_rate, detector=self._vad)
+
+    def push(self, data):
+        """Add captured audio; yields ``(segment, start_frame)`` for each closed segment."""
+        if data.ndim > 1:
+            data = data[:, 0]
+        if len(self._pending):
+            data = np.concatenate([self._pending, data])
+        n = len(data) // self.frame_len
+        self._pending = data[n * self.frame_len:].copy()
+        if n == 0:
+            return
+        frames = data[:n * self.frame_len].reshape(n, self.frame_len)
+        for frame, speech in zip(frames, self._classify(frames)):
+            segment = self._step(frame, speech)
+            if segment is not None:
+                yield segment
+
+    def _append(self, frame):
+        pos = self._segment_frames * self.frame_len
+        self._segment[pos:pos + self.frame_len] = frame
+        self._segment_frames += 1
+
+    def _step(self, frame, speech):
+        index = self._frames_seen
+        self._frames_seen += 1
+        if not self._active:
+            self._history.append(frame.copy())
+            self._run = self._run + 1 if speech else 0
+            if self._run < self.onset_frames:
+                return None
+            self._active = True
+            self._segment_frames = 0
+            self._segment_start = (index - len(self._history) + 1) * self.frame_len
+            for past in self._history:
+                self._append(past)
+            self._history.clear()
+            self._speech_frames = self._run
+            self._run = 0
+            return None
+        self._append(frame)
+        if speech:
+            self._speech_frames += 1
+            self._run = 0
+        else:
+            self._run += 1
+        if self._run >= self.trailing_frames:
+            self._active = False
+            self._run = 0
+            return self._emit()
+        if self._segment_frames >= self.max_frames:
+            # Keep listening: the speech carries on in a fresh segment
+            segment = self._emit()
+            self._segment_start += self._segment_frames * self.frame_len
+            self._segment_frames = 0
+            self._speech_frames = 0
+            return segment
+        return None
+
+    def _emit(self):
+        if self._speech_frames < self.min_speech_frames:
+            return None
+        audio = self._segment[:self._segment_frames * self.frame_len].copy()
+        return audio, self._segment_start
+
+    def flush(self):
+        """Close and return the open segment, if any."""
+        if not self._active:
+            return None
+        self._active = False
+        self._run = 0
+        return self._emit()
@@ -0,0 +1,205 @@
+"""Pick a device, compute type and model size the current machine can run.
+
+``auto`` settings resolve as follows:
+
+* device: ``cuda`` if CTranslate2 sees a GPU, else ``cpu``. If loading on
+  the GPU fails, the next compute type is tried and finally the CPU.
+* compute type: ``float16`` (then ``int8_float16``) on CUDA, ``int8`` on CPU.
+* model size: ``large-v3`` on CUDA. On CPU, sizes are benchmarked from
+  ``tiny`` upward and the largest one whose real-time factor (inference
+  seconds per audio second) stays under ``target_rtf`` is used. The choice
+  is remembered per machine in ``transcriber_profile.json`` so later starts
+  skip the benchmark.
+* CPU threads: the cores divided between the inference workers.
+
+``benchmark()`` measures the RTF of every requested configuration, which is
+what ``--benchmark`` prints.
+"""
+
+import os
+import json
+import time
+import platform
+import traceback
+
+import numpy as np
+
+MODEL_SIZES = ("tiny", "base", "small", "medium", "large-v3")  # smallest first
+GPU_MODEL_SIZE = "large-v3"
+GPU_COMPUTE_TYPES = ("float16", "int8_float16")
+CPU_COMPUTE_TYPE = "int8"
+DEFAULT_TARGET_RTF = 0.5  # leave headroom so inference keeps up with capture
+BENCHMARK_SECONDS = 10
+MODEL_SAMPLE_RATE = 16000
+PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcriber_profile.json")
+
+
+def cuda_available():
+    try:
+        import ctranslate2
+
+        return ctranslate2.get_cuda_device_count() > 0
+    except Exception:
+        return False
+
+
+def default_cpu_threads(workers=1):
+    """Split the machine's cores between the inference workers."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def device_candidates(device="auto", compute_type="auto"):
+    """``(device, compute_type)`` pairs to try, in fallback order."""
+    candidates = []
+    if device == "cuda" or (device == "auto" and cuda_available()):
+        types = GPU_COMPUTE_TYPES if compute_type == "auto" else (compute_type,)
+        candidates.extend(("cuda", t) for t in types)
+    # The CPU is always the last resort, even after an explicit --device cuda;
+    # it has no float16 kernels, so GPU compute types become int8
+    if compute_type == "auto" or compute_type in GPU_COMPUTE_TYPES:
+        candidates.append(("cpu", CPU_COMPUTE_TYPE))
+    else:
+        candidates.append(("cpu", compute_type))
+    return candidates
+
+
+def load_model(model_size, device, compute_type, workers=1, cpu_threads=None):
+    from faster_whisper import WhisperModel
+
+    return WhisperModel(
+        model_size,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=(cpu_threads or default_cpu_threads(workers)) if device == "cpu" else 0,
+        num_workers=workers,
+    )
+
+
+def benchmark_audio(path=None, seconds=BENCHMARK_SECONDS):
+    """16 kHz benchmark clip: ``path`` if given, else low-level noise.
+
+    A real recording gives more representative numbers, since the model's
+    work depends on how much text it decodes.
+    """
+    if path:
+        from faster_whisper import decode_audio
+
+        return decode_audio(path, sampling_rate=MODEL_SAMPLE_RATE)
+    rng = np.random.default_rng(0)
+    return (0.01 * rng.standard_normal(int(seconds * MODEL_SAMPLE_RATE))).astype(np.float32)
+
+
+def measure_rtf(model, audio):
+    """Inference seconds per audio second for one decode of ``audio``."""
+    began = time.perf_counter()
+    segments, _ = model.transcribe(
+        audio, language="en", beam_size=5, vad_filter=False, condition_on_previous_text=False
+    )
+    for _ in segments:  # segments are decoded lazily
+        pass
+    return (time.perf_counter() - began) / (len(audio) / MODEL_SAMPLE_RATE)
+
+
+def _profile_key(device, compute_type, workers, cpu_threads, target_rtf):
+    return (f"{platform.node()}|{os.cpu_count()}|{device}|{compute_type}|"
+            f"{workers}|{cpu_threads}|{target_rtf}")
+
+
+def _load_profile():
+    try:
+        with open(PROFILE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_profile(key, entry):
+    profile = _load_profile()
+    profile[key] = entry
+    tmp = PROFILE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp, PROFILE_PATH)
+
+
+def _pick_cpu_model(compute_type, workers, cpu_threads, target_rtf, audio):
+    """Benchmark CPU model sizes from the smallest up; return ``(model, size, rtf)``."""
+    best = None
+    for size in MODEL_SIZES:
+        model = load_model(size, "cpu", compute_type, workers, cpu_threads)
+        measure_rtf(model, audio[:MODEL_SAMPLE_RATE])  # warm-up, as in benchmark()
+        rtf = measure_rtf(model, audio)
+        print(f"[INFO] {size} on cpu/{compute_type}: RTF {rtf:.2f}")
+        if best is not None and rtf > target_rtf:
+            break
+        best = (model, size, rtf)
+        if rtf > target_rtf:
+            print(f"[WARNING] Even '{size}' misses the target RTF {target_rtf}; using it anyway")
+            break
+    return best
+
+
+def resolve_model(model_size="auto", device="auto", compute_type="auto", workers=1,
+                  cpu_threads=None, target_rtf=DEFAULT_TARGET_RTF, audio_path=None):
+    """Load the best usable model; returns ``(model, config)``.
+
+    Raises ``RuntimeError`` if no configuration could be loaded.
+    """
+    errors = []
+    for dev, ctype in device_candidates(device, compute_type):
+        threads = (cpu_threads or default_cpu_threads(workers)) if dev == "cpu" else 0
+        config = {"device": dev, "compute_type": ctype, "cpu_threads": threads, "workers": workers}
+        try:
+            if model_size != "auto":
+                size = model_size
+                model = load_model(size, dev, ctype, workers, threads)
+            elif dev == "cuda":
+                size = GPU_MODEL_SIZE
+                model = load_model(size, dev, ctype, workers, threads)
+            else:
+                key = _profile_key(dev, ctype, workers, threads, target_rtf)
+                remembered = _load_profile().get(key)
+                if remembered:
+                    size = remembered["model"]
+                    model = load_model(size, dev, ctype, workers, threads)
+                else:
+                    print(f"[INFO] Benchmarking CPU model sizes for RTF <= {target_rtf}...")
+                    model, size, rtf = _pick_cpu_model(
+                        ctype, workers, threads, target_rtf, benchmark_audio(audio_path)
+                    )
+                    _save_profile(key, {"model": size, "rtf": round(rtf, 3)})
+        except Exception:
+            errors.append(f"{dev}/{ctype}: {traceback.format_exc().strip().splitlines()[-1]}")
+            print(f"[WARNING] Could not load the model on {dev}/{ctype}; trying the next option")
+            continue
+        config["model"] = size
+        return model, config
+    raise RuntimeError("No usable Whisper configuration:\n" + "\n".join(errors))
+
+
+def benchmark(model_sizes=MODEL_SIZES, device="auto", compute_type="auto", workers=1,
+              cpu_threads=None, audio_path=None):
+    """Measure the RTF of every size on every usable device; returns result rows."""
+    audio = benchmark_audio(audio_path)
+    rows = []
+    print(f"[INFO] Benchmark clip: {len(audio) / MODEL_SAMPLE_RATE:.1f}s")
+    for dev, ctype in device_candidates(device, compute_type):
+        threads = (cpu_threads or default_cpu_threads(workers)) if dev == "cpu" else 0
+        for size in model_sizes:
+            row = {"model": size, "device": dev, "compute_type": ctype, "cpu_threads": threads}
+            try:
+                began = time.perf_counter()
+                model = load_model(size, dev, ctype, workers, threads)
+                row["load_seconds"] = time.perf_counter() - began
+                measure_rtf(model, audio[:MODEL_SAMPLE_RATE])  # warm-up
+                row["rtf"] = measure_rtf(model, audio)
+                del model
+            except Exception as e:
+                row["error"] = str(e).splitlines()[0] if str(e) else type(e).__name__
+            rows.append(row)
+            if "error" in row:
+                print(f"{size:>9} {dev:>4}/{ctype:<12} failed: {row['error']}")
+            else:
+                print(f"{size:>9} {dev:>4}/{ctype:<12} threads {threads:>2}  "
+                      f"load {row['load_seconds']:5.1f}s  RTF {row['rtf']:.2f}")
+    return rows
@@ -0,0 +1,207 @@
+"""Bounded, ordered inference executor for the live transcriber.
+
+Captured chunks are queued for a fixed number of worker threads instead of
+getting one thread each. At most ``max_pending`` chunks wait in the queue.
+When a new chunk arrives at a full queue, the overload policy decides:
+
+``merge``
+    Append the audio to the newest waiting chunk, up to ``max_merge_seconds``
+    of audio per job (fewer, longer inference calls catch up faster).
+    Past that it falls back to ``drop-oldest``. Merged chunks need not be
+    contiguous (VAD segments have gaps between them); ``Job.stream_time``
+    maps times in the merged audio back to the stream clock.
+``drop-oldest``
+    Discard the oldest waiting chunk; its audio is never transcribed.
+``block``
+    Make the caller wait for a free slot (the capture loop then falls
+    behind, the audio callback itself never blocks).
+
+Results are emitted in submission order even with several workers, and
+``stats()`` reports queue depth, lag (seconds from the end of a chunk's
+audio to its result) and how much audio was merged or dropped.
+"""
+
+import time
+import threading
+import traceback
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+import numpy as np
+
+POLICIES = ("merge", "drop-oldest", "block")
+DEFAULT_POLICY = "merge"
+DEFAULT_MAX_PENDING = 4
+MAX_MERGE_SECONDS = 30  # Whisper's own window
+
+
+class Job:
+    __slots__ = ("seq", "audio", "offset", "pieces", "submitted", "error")
+
+    def __init__(self, seq, audio, offset):
+        self.seq = seq
+        self.audio = audio
+        self.offset = offset  # stream time (s) of the first sample
+        self.pieces = [(0.0, offset)]  # (seconds into audio, stream time) per merged chunk
+        self.submitted = time.monotonic()
+        self.error = None  # the exception transcribe() raised, if it did
+
+    def stream_time(self, seconds, end=False):
+        """Stream time of ``seconds`` into ``audio``.
+
+        With ``end`` a time on the boundary between two merged chunks
+        belongs to the earlier one (where a segment ending there ends).
+        """
+        starts = [start for start, _ in self.pieces]
+        find = bisect_left if end else bisect_right
+        start, offset = self.pieces[max(find(starts, seconds) - 1, 0)]
+        return offset + seconds - start
+
+
+class InferenceExecutor:
+    """Run ``transcribe(audio)`` on ``workers`` threads; ``emit(job, result)`` in order.
+
+    ``result`` is whatever ``transcribe`` returned, or ``None`` if it raised;
+    ``job.error`` then holds the exception.
+    """
+
+    def __init__(self, transcribe, emit, sample_rate, workers=1,
+                 max_pending=DEFAULT_MAX_PENDING, policy=DEFAULT_POLICY,
+                 max_merge_seconds=MAX_MERGE_SECONDS):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overload policy '{policy}' (choose from {', '.join(POLICIES)})")
+        self.transcribe = transcribe
+        self.emit = emit
+        self.sample_rate = sample_rate
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.policy = policy
+        self.max_merge_frames = int(max_merge_seconds * sample_rate)
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._emit_lock = threading.Lock()
+        self._finished = {}  # seq -> (job, result); job is None for dropped chunks
+        self._next_seq = 0
+        self._next_emit = 0
+        self._closed = False
+        self._running = 0
+        self._stats = {
+            "submitted": 0,
+            "processed": 0,
+            "failed": 0,
+            "merged": 0,
+            "dropped": 0,
+            "dropped_seconds": 0.0,
+            "last_lag": 0.0,
+            "max_lag": 0.0,
+        }
+        self._workers = [
+            threading.Thread(target=self._work, daemon=True) for _ in range(self.workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # ------------------------------------------------------------ producer
+    def submit(self, audio, offset):
+        """Queue ``audio`` captured at stream time ``offset``; applies the overload policy."""
+        with self._cond:
+            self._stats["submitted"] += 1
+            if len(self._pending) >= self.max_pending:
+                if self.policy == "block":
+                    while len(self._pending) >= self.max_pending and not self._closed:
+                        self._cond.wait()
+                elif self.policy == "merge" and (
+                    len(self._pending[-1].audio) + len(audio) <= self.max_merge_frames
+                ):
+                    tail = self._pending[-1]
+                    tail.pieces.append((len(tail.audio) / self.sample_rate, offset))
+                    tail.audio = np.concatenate([tail.audio, audio])
+                    tail.submitted = time.monotonic()
+                    self._stats["merged"] += 1
+                    return
+                else:
+                    oldest = self._pending.popleft()
+                    self._stats["dropped"] += 1
+                    self._stats["dropped_seconds"] += len(oldest.audio) / self.sample_rate
+                    print(f"[WARNING] Inference overloaded; dropped "
+                          f"{len(oldest.audio) / self.sample_rate:.1f}s at {oldest.offset:.1f}s")
+                    self._finish(oldest.seq, None, None)
+            if self._closed:
+                raise RuntimeError("InferenceExecutor is closed")
+            self._pending.append(Job(self._next_seq, audio, offset))
+            self._next_seq += 1
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------- workers
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                job = self._pending.popleft()
+                self._running += 1
+                self._cond.notify_all()  # wake a blocked producer
+            try:
+                result = self.transcribe(job.audio)
+            except Exception as e:
+                result = None
+                job.error = e
+                with self._cond:
+                    self._stats["failed"] += 1
+                print(f"[ERROR] Transcription failed:\n{traceback.format_exc()}")
+            with self._cond:
+                self._running -= 1
+            self._finish(job.seq, job, result)
+
+    def _finish(self, seq, job, result):
+        with self._emit_lock:
+            self._finished[seq] = (job, result)
+            while self._next_emit in self._finished:
+                job, result = self._finished.pop(self._next_emit)
+                self._next_emit += 1
+                if job is None:
+                    continue
+                lag = time.monotonic() - job.submitted
+                self._stats["processed"] += 1
+                self._stats["last_lag"] = lag
+                self._stats["max_lag"] = max(self._stats["max_lag"], lag)
+                try:
+                    self.emit(job, result)
+                except Exception:
+                    print(f"[ERROR] Emitting a result failed:\n{traceback.format_exc()}")
+
+    # --------------------------------------------------------------- state
+    @property
+    def depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["depth"] = len(self._pending)
+            stats["running"] = self._running
+            stats["pending_seconds"] = sum(len(j.audio) for j in self._pending) / self.sample_rate
+        return stats
+
+    def report(self):
+        s = self.stats()
+        print(
+            f"[INFO] Inference: {s['processed']} chunk(s) done, {s['depth']} queued "
+            f"({s['pending_seconds']:.1f}s), lag {s['last_lag']:.1f}s (max {s['max_lag']:.1f}s), "
+            f"{s['merged']} merged, {s['dropped']} dropped ({s['dropped_seconds']:.1f}s)"
+        )
+
+    def close(self, wait=True):
+        """Stop accepting chunks; with ``wait`` finish the queued ones first."""
+        with self._cond:
+            self._closed = True
+            if not wait:
+                while self._pending:
+                    job = self._pending.popleft()
+                    self._finish(job.seq, None, None)
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join()
@@ -1,23 +1,42 @@
+import os
+import sys
 import argparse
 import sounddevice as sd
 import numpy as np
 import queue
-import threading
-import time
 import traceback
-from faster_whisper import WhisperModel
+
+# Shared VAD and resampling modules live with the LiveVoiceAutoZoom scripts
+LIVE_SCRIPTS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "LiveVoiceAutoZoom", "LiveVoiceAutoZoom", "scripts"
+)
+if LIVE_SCRIPTS_DIR not in sys.path:
+    sys.path.append(LIVE_SCRIPTS_DIR)
+
+from capture_buffer import ChunkRing
+from endpointing import MAX_SECONDS, PRE_ROLL, TRAILING_SILENCE, Endpointer
+from inference_config import DEFAULT_TARGET_RTF, MODEL_SIZES, benchmark, resolve_model
+from inference_executor import DEFAULT_MAX_PENDING, DEFAULT_POLICY, POLICIES, InferenceExecutor
+from resampling import MODEL_RATE, StreamResampler
+from streaming_decode import HOP_SECONDS, MAX_WINDOW_SECONDS, StreamingDecoder
 
 # ------------------ CONFIGURATION ------------------
-SAMPLE_RATE = 44100
+SAMPLE_RATE = 44100  # capture rate; everything after capture runs at MODEL_RATE
 CHANNELS = 1
-CHUNK_DURATION = 5
-MODEL_SIZE = "large-v3"
-COMPUTE_TYPE = "float16"
-DEVICE_TYPE = "cuda"
+CHUNK_DURATION = 5  # used with --chunking fixed
+BLOCK_DURATION = 0.1  # capture block; bounds the endpointing delay
+MODEL_SIZE = "auto"  # large-v3 on CUDA, benchmarked on CPU
+COMPUTE_TYPE = "auto"  # float16 on CUDA, int8 on CPU
+DEVICE_TYPE = "auto"  # CUDA if available, else CPU
+SERVICE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "transcription_service"
+)
 
 # ------------------ INITIALIZATION ------------------
 audio_queue = queue.Queue()
 model = None
+client = None
+executor = None
 
 def list_input_devices():
     devices = sd.query_devices()
@@ -62,52 +81,168 @@ def audio_callback(indata, frames, time_info, status):
     audio_queue.put(indata.copy())
 
 def transcribe_audio(audio_data):
-    try:
-        if np.max(np.abs(audio_data)) < 0.01:
-            print("[INFO] Skipped silent audio chunk")
-            return
-        print("[INFO] Transcribing...")
-        segments, _ = model.transcribe(
+    """Transcribe one chunk; returns ``[{"start", "end", "text"}, ...]`` or ``None`` if silent."""
+    if np.max(np.abs(audio_data)) < 0.01:
+        return None
+    if client is not None:
+        result = client.transcribe_audio(
             audio_data,
+            MODEL_RATE,
+            priority=0,
             language="en",
             beam_size=5,
             vad_filter=True,
             condition_on_previous_text=False
         )
-        for segment in segments:
-            print(f"[{segment.start:.2f}s - {segment.end:.2f}s]: {segment.text}")
-    except Exception as e:
-        print(f"[ERROR] Transcription failed:\n{traceback.format_exc()}")
+        return result["segments"]
+    segments, _ = model.transcribe(
+        audio_data,
+        language="en",
+        beam_size=5,
+        vad_filter=True,
+        condition_on_previous_text=False
+    )
+    return [{"start": s.start, "end": s.end, "text": s.text} for s in segments]
+
+def print_segments(job, segments):
+    """Executor callback: print a chunk's segments on the stream clock, in order."""
+    if job.error is not None:
+        print(f"[ERROR] No transcript for {len(job.audio) / MODEL_RATE:.1f}s at {job.offset:.2f}s "
+              f"({type(job.error).__name__}: {job.error})")
+        return
+    if segments is None:
+        print(f"[INFO] Skipped silent audio at {job.offset:.2f}s")
+        return
+    for segment in segments:
+        start = job.stream_time(segment["start"])
+        end = job.stream_time(segment["end"], end=True)
+        print(f"[{start:.2f}s - {end:.2f}s]: {segment['text']}")
+
+def transcribe_words(audio_data, prompt=None):
+    """Word-level transcription for the streaming decoder: ``[(start, end, word), ...]``."""
+    segments, _ = model.transcribe(
+        audio_data,
+        language="en",
+        beam_size=5,
+        vad_filter=True,
+        condition_on_previous_text=False,
+        word_timestamps=True,
+        initial_prompt=prompt,
+    )
+    return [(w.start, w.end, w.word) for s in segments for w in (s.words or [])]
+
+_partial_width = 0
+
+def print_stream_event(kind, start, end, text):
+    """Streaming callback: finals get their own line, the partial is rewritten in place."""
+    global _partial_width
+    if kind == "partial":
+        line = f"... {text}" if text else ""
+        print(line.ljust(_partial_width), end="\r", flush=True)
+        _partial_width = len(line)
+        return
+    print(f"[{start:.2f}s - {end:.2f}s]: {text}".ljust(_partial_width))
+    _partial_width = 0
+
+def capture_audio(device_index, endpointer=None, decoder=None):
+    """Capture and stream to ``decoder``, or submit speech segments (``endpointer``) or fixed chunks.
+
+    On Ctrl-C the audio still in flight (queued blocks, the resampler tail
+    and the open segment or partial chunk) is passed on before returning.
+    """
+    # Resample once, as the audio arrives, to the 16 kHz the model,
+    # the VAD and the service all expect
+    resampler = StreamResampler(SAMPLE_RATE, MODEL_RATE)
+    ring = None
+    if decoder is None and endpointer is None:
+        # Chunks are passed to the executor as views into the ring, so
+        # it needs a row for every chunk that can be queued or running
+        # plus the one being filled.
+        ring = ChunkRing(
+            int(MODEL_RATE * CHUNK_DURATION),
+            slots=executor.max_pending + executor.workers + 2,
+        )
+
+    def route(data):
+        if decoder is not None:
+            decoder.feed(data)
+            return
+        pieces = ring.push(data) if endpointer is None else endpointer.push(data)
+        for chunk, start in pieces:
+            executor.submit(chunk, start / MODEL_RATE)
+            if executor.depth >= executor.max_pending:
+                executor.report()
 
-def capture_audio(device_index):
     try:
         with sd.InputStream(samplerate=SAMPLE_RATE,
                             channels=CHANNELS,
                             callback=audio_callback,
-                            blocksize=int(SAMPLE_RATE * 0.5),
+                            blocksize=int(SAMPLE_RATE * BLOCK_DURATION),
                             dtype='float32',
                             device=device_index):
             print("[INFO] Audio stream started. Listening...")
-            buffer = np.empty((0, CHANNELS), dtype='float32')
-            last_time = time.time()
             while True:
-                data = audio_queue.get()
-                buffer = np.vstack((buffer, data))
-                if time.time() - last_time >= CHUNK_DURATION:
-                    chunk = buffer[:, 0]
-                    threading.Thread(target=transcribe_audio, args=(chunk.copy(),)).start()
-                    buffer = np.empty((0, CHANNELS), dtype='float32')
-                    last_time = time.time()
+                route(resampler.process(audio_queue.get()[:, 0]))
+    except KeyboardInterrupt:
+        flush_capture(resampler, route, endpointer, ring)
+        raise
     except Exception as e:
         print(f"[FATAL] Failed to open audio stream:\n{traceback.format_exc()}")
         exit(1)
 
+def flush_capture(resampler, route, endpointer=None, ring=None):
+    """Pass on the captured audio that has not reached the model yet."""
+    while True:
+        try:
+            block = audio_queue.get_nowait()
+        except queue.Empty:
+            break
+        route(resampler.process(block[:, 0]))
+    route(resampler.flush())
+    last = None
+    if endpointer is not None:
+        last = endpointer.flush()
+    elif ring is not None and len(ring.pending()):
+        last = ring.pending().copy(), ring.chunks * ring.chunk_frames
+    if last is not None:
+        executor.submit(last[0], last[1] / MODEL_RATE)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Live transcription from microphone")
     parser.add_argument("--list-devices", action="store_true", help="List audio input devices and exit")
     parser.add_argument("--device-index", type=int, help="Input device index")
     parser.add_argument("--device-name", help="Search for input device by name")
     parser.add_argument("--choose-device", action="store_true", help="Interactively choose an input device")
+    parser.add_argument("--server", help="URL of a running transcription service instead of loading the model")
+    parser.add_argument("--model", default=MODEL_SIZE, help="Whisper model size or 'auto' (default: auto)")
+    parser.add_argument("--device", choices=("auto", "cuda", "cpu"), default=DEVICE_TYPE,
+                        help="Inference device (default: auto, falling back to CPU)")
+    parser.add_argument("--compute-type", default=COMPUTE_TYPE,
+                        help="CTranslate2 compute type, e.g. float16 or int8 (default: auto)")
+    parser.add_argument("--cpu-threads", type=int, help="CPU threads per worker (default: cores / workers)")
+    parser.add_argument("--target-rtf", type=float, default=DEFAULT_TARGET_RTF,
+                        help=f"Real-time factor the auto model size must reach on CPU (default: {DEFAULT_TARGET_RTF})")
+    parser.add_argument("--benchmark", action="store_true", help="Report the RTF of each model/device configuration and exit")
+    parser.add_argument("--benchmark-audio", help="Audio file to benchmark with (default: 10s of noise)")
+    parser.add_argument("--chunking", choices=("vad", "fixed"), default="vad",
+                        help=f"Cut at speech endpoints (default) or every {CHUNK_DURATION}s")
+    parser.add_argument("--trailing-silence", type=float, default=TRAILING_SILENCE,
+                        help=f"Silence (s) that ends an utterance (default: {TRAILING_SILENCE})")
+    parser.add_argument("--max-segment", type=float, default=MAX_SECONDS,
+                        help=f"Longest segment (s) before a forced cut (default: {MAX_SECONDS})")
+    parser.add_argument("--pre-roll", type=float, default=PRE_ROLL,
+                        help=f"Audio (s) kept before speech onset (default: {PRE_ROLL})")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Print partial hypotheses and commit words once consecutive decodes agree")
+    parser.add_argument("--hop", type=float, default=HOP_SECONDS,
+                        help=f"Streaming: seconds of new audio between decodes (default: {HOP_SECONDS})")
+    parser.add_argument("--max-window", type=float, default=MAX_WINDOW_SECONDS,
+                        help=f"Streaming: longest uncommitted window (default: {MAX_WINDOW_SECONDS})")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent inference workers (default: 1)")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help=f"Chunks allowed to wait for inference (default: {DEFAULT_MAX_PENDING})")
+    parser.add_argument("--overload", choices=POLICIES, default=DEFAULT_POLICY,
+                        help=f"What to do when the queue is full (default: {DEFAULT_POLICY})")
     args = parser.parse_args()
 
     if args.list_devices:
@@ -115,13 +250,49 @@ if __name__ == "__main__":
             print(f"{idx}: {name}")
         raise SystemExit
 
-    print("[INFO] Initializing Whisper model...")
-    try:
-        model = WhisperModel(MODEL_SIZE, device=DEVICE_TYPE, compute_type=COMPUTE_TYPE)
-    except Exception as e:
-        print(f"[FATAL] Whisper model failed to load:\n{traceback.format_exc()}")
+    if args.benchmark:
+        sizes = MODEL_SIZES if args.model == "auto" else (args.model,)
+        benchmark(sizes, args.device, args.compute_type, args.workers, args.cpu_threads,
+                  args.benchmark_audio)
+        raise SystemExit
+
+    if args.streaming and args.server:
+        print("[FATAL] --streaming needs word timestamps from a local model; drop --server")
         exit(1)
 
+    if args.server:
+        sys.path.insert(0, SERVICE_DIR)
+        from transcription_client import TranscriptionClient
+
+        client = TranscriptionClient(args.server)
+        if not client.is_available():
+            print(f"[FATAL] Transcription service not reachable at {args.server}")
+            exit(1)
+        print(f"[INFO] Using transcription service at {args.server}")
+    else:
+        print("[INFO] Initializing Whisper model...")
+        try:
+            model, config = resolve_model(
+                args.model, args.device, args.compute_type, args.workers,
+                args.cpu_threads, args.target_rtf, args.benchmark_audio,
+            )
+            threads = f", {config['cpu_threads']} thread(s)" if config["device"] == "cpu" else ""
+            print(f"[INFO] Using {config['model']} on {config['device']}/{config['compute_type']}{threads}")
+        except Exception as e:
+            print(f"[FATAL] Whisper model failed to load:\n{traceback.format_exc()}")
+            exit(1)
+
+    decoder = None
+    if args.streaming:
+        decoder = StreamingDecoder(
+            transcribe_words, print_stream_event, MODEL_RATE,
+            hop=args.hop, max_window=args.max_window,
+        ).start()
+    else:
+        executor = InferenceExecutor(
+            transcribe_audio, print_segments, MODEL_RATE,
+            workers=args.workers, max_pending=args.max_pending, policy=args.overload,
+        )
     try:
         if args.choose_device:
             device_index = select_input_device()
@@ -129,8 +300,26 @@ if __name__ == "__main__":
             device_index = args.device_index
         else:
             device_index = find_input_device(args.device_name)
-        capture_audio(device_index)
+        endpointer = None
+        if args.chunking == "vad" and decoder is None:
+            endpointer = Endpointer(
+                MODEL_RATE, trailing_silence=args.trailing_silence,
+                max_seconds=args.max_segment, pre_roll=args.pre_roll,
+            )
+        capture_audio(device_index, endpointer, decoder)
     except KeyboardInterrupt:
         print("[INFO] Stopped by user.")
     except Exception as e:
         print(f"[FATAL] Unhandled error:\n{traceback.format_exc()}")
+    finally:
+        if decoder is not None:
+            decoder.finish()
+            print(f"[INFO] Streaming: {decoder.decodes} decode(s)")
+        else:
+            if executor.depth:
+                print("[INFO] Finishing queued audio (Ctrl-C again to discard it)...")
+            try:
+                executor.close(wait=True)
+            except KeyboardInterrupt:
+                executor.close(wait=False)
+            executor.report()
@@ -4,7 +4,7 @@ SETLOCAL
 :: Auto-install required Python packages
 echo Installing required Python packages...
 python -m pip install --quiet --upgrade pip
-python -m pip install --quiet faster-whisper sounddevice numpy
+python -m pip install --quiet faster-whisper sounddevice numpy scipy webrtcvad
 
 :: Change to script directory
 CD /D "%~dp0"
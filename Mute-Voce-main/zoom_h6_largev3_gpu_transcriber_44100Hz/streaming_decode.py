@@ -0,0 +1,163 @@
+"""Streaming transcription with local-agreement commits.
+
+``StreamingDecoder`` keeps a window of not-yet-committed audio. Every
+``hop`` seconds of new audio it re-transcribes the whole window with word
+timestamps. Words on which two consecutive hypotheses agree (the longest
+common prefix, compared case- and punctuation-insensitively) are committed
+and emitted as a ``final`` event. The audio up to the last committed word
+is then dropped from the window. The rest of the hypothesis is emitted as a
+``partial`` event and may still change.
+
+Compute stays bounded because the window only holds uncommitted audio. If
+it reaches ``max_window`` seconds without agreement, the current hypothesis
+is committed as is. When decoding is slower than the hop, the decoder
+simply takes all the audio that arrived in the meantime.
+"""
+
+import re
+import queue
+import threading
+import traceback
+
+import numpy as np
+
+HOP_SECONDS = 1.0
+MAX_WINDOW_SECONDS = 15.0
+SILENCE_KEEP_SECONDS = 1.0  # window kept when a decode hears no words
+PROMPT_CHARS = 200  # committed text passed back as context
+
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+def _normalize(word):
+    return _NON_WORD.sub("", word.lower())
+
+
+def agreed_prefix(previous, current):
+    """Number of leading words of ``current`` that match ``previous``."""
+    n = 0
+    for (_, _, a), (_, _, b) in zip(previous, current):
+        if _normalize(a) != _normalize(b):
+            break
+        n += 1
+    return n
+
+
+class StreamingDecoder:
+    """Feed audio with ``feed()``; events go to ``emit(kind, start, end, text)``.
+
+    ``transcribe_words(audio, prompt)`` must return ``[(start, end, word), ...]``
+    with times in seconds relative to ``audio``. ``kind`` is ``"partial"`` or
+    ``"final"``; times are seconds on the stream clock.
+    """
+
+    def __init__(self, transcribe_words, emit, sample_rate, hop=HOP_SECONDS,
+                 max_window=MAX_WINDOW_SECONDS):
+        self.transcribe_words = transcribe_words
+        self.emit = emit
+        self.sample_rate = sample_rate
+        self.hop_frames = max(1, int(hop * sample_rate))
+        self._window = np.zeros(int(max_window * sample_rate), dtype=np.float32)
+        self._fill = 0
+        self._offset = 0  # stream frame of _window[0]
+        self._new_frames = 0
+        self._hypothesis = []  # uncommitted words from the last decode
+        self._partial = ""
+        self._committed = ""
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.decodes = 0
+        self.error = None
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def feed(self, block):
+        """Queue captured audio (``(n,)`` or ``(n, channels)``); never blocks."""
+        if block.ndim > 1:
+            block = block[:, 0]
+        self._queue.put(np.array(block, dtype=np.float32, copy=True))
+
+    def finish(self):
+        """Commit whatever is left and stop the decoder thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    # ------------------------------------------------------------ worker
+    def _run(self):
+        done = False
+        while not done:
+            block = self._queue.get()
+            try:
+                # Take everything that arrived while the last decode ran
+                while block is not None:
+                    self._append(block)
+                    try:
+                        block = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                done = block is None
+                if done:
+                    if self._fill:
+                        self._decode(force=True)
+                elif self._new_frames >= self.hop_frames:
+                    self._decode()
+            except Exception:
+                self.error = traceback.format_exc()
+                print(f"[ERROR] Streaming decode failed:\n{self.error}")
+                self._trim(self._fill)
+                self._hypothesis = []
+
+    def _append(self, block):
+        while len(block):
+            room = len(self._window) - self._fill
+            if room == 0:
+                # Window full without agreement: commit it as heard
+                self._decode(force=True)
+                continue
+            n = min(room, len(block))
+            self._window[self._fill:self._fill + n] = block[:n]
+            self._fill += n
+            self._new_frames += n
+            block = block[n:]
+
+    def _trim(self, frames):
+        frames = min(max(frames, 0), self._fill)
+        if frames == 0:
+            return
+        remaining = self._fill - frames
+        self._window[:remaining] = self._window[frames:self._fill]
+        self._fill = remaining
+        self._offset += frames
+
+    def _decode(self, force=False):
+        self.decodes += 1
+        self._new_frames = 0
+        start = self._offset / self.sample_rate
+        prompt = self._committed.strip() or None
+        words = [
+            (start + s, start + e, w)
+            for s, e, w in self.transcribe_words(self._window[:self._fill], prompt)
+        ]
+        n = len(words) if force else agreed_prefix(self._hypothesis, words)
+        commit, self._hypothesis = words[:n], words[n:]
+        if commit:
+            text = "".join(w for _, _, w in commit).strip()
+            self._committed = (self._committed + " " + text)[-PROMPT_CHARS:]
+            self.emit("final", commit[0][0], commit[-1][1], text)
+
+        partial = "".join(w for _, _, w in self._hypothesis).strip()
+        if partial != self._partial:
+            self._partial = partial
+            if self._hypothesis:
+                self.emit("partial", self._hypothesis[0][0], self._hypothesis[-1][1], partial)
+            else:
+                self.emit("partial", start, start, "")
+
+        if force:
+            self._trim(self._fill)
+        elif commit:
+            self._trim(int(round(commit[-1][1] * self.sample_rate)) - self._offset)
+        elif not words:
+            self._trim(self._fill - int(SILENCE_KEEP_SECONDS * self.sample_rate))
@@ -0,0 +1,9 @@
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+# The voice fixture is shared by every tool's tests
+sys.path.insert(0, os.path.join(HERE, "..", "..", "testing"))
+
+from voice_fixture import voice  # noqa: F401
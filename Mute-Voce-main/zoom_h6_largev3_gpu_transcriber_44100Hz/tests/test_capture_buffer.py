@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from capture_buffer import ChunkRing
+
+
+def test_chunks_wrap_around_the_ring():
+    ring = ChunkRing(100, slots=3)
+    stream = np.arange(1050, dtype=np.float32)
+    chunks = []
+    # Odd block sizes so chunk edges fall inside blocks; stereo like the H6
+    for start in range(0, len(stream), 37):
+        block = stream[start:start + 37]
+        for chunk, first in ring.push(np.stack([block, -block], axis=1)):
+            chunks.append((chunk, first, chunk.copy()))
+
+    assert [first for _, first, _ in chunks] == list(range(0, 1000, 100))
+    assert ring.chunks == 10 and ring.frames == 1050
+    for _, first, copy in chunks:
+        assert np.array_equal(copy, stream[first:first + 100])
+    # Rows are reused: a chunk is overwritten slots - 1 chunks later
+    assert chunks[0][0] is not chunks[1][0]
+    assert np.shares_memory(chunks[0][0], chunks[3][0])
+    assert np.array_equal(chunks[-1][0], stream[900:1000])
+    assert np.array_equal(ring.pending(), stream[1000:])
+
+
+def test_block_spanning_several_chunks():
+    ring = ChunkRing(10, slots=2)
+    starts = [first for _, first in ring.push(np.ones(35, dtype=np.float32))]
+
+    assert starts == [0, 10, 20]
+    assert len(ring.pending()) == 5
+
+
+def test_needs_two_slots():
+    with pytest.raises(ValueError):
+        ChunkRing(10, slots=1)
@@ -0,0 +1,57 @@
+import numpy as np
+
+from endpointing import PRE_ROLL, TRAILING_SILENCE, Endpointer
+
+SR = 16000
+SLACK = 0.2  # webrtcvad onset/hangover plus 30 ms framing
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SR), dtype=np.float32)
+
+
+def run(endpointer, audio, block=1600):
+    segments = []
+    for start in range(0, len(audio), block):
+        segments.extend(endpointer.push(audio[start:start + block]))
+    return segments
+
+
+def test_cuts_after_trailing_silence_and_flushes_the_open_segment(voice):
+    audio = np.concatenate([silence(1.0), voice(2.0), silence(1.0), voice(1.0)])
+    endpointer = Endpointer(SR)
+
+    segments = run(endpointer, audio)
+
+    assert len(segments) == 1
+    segment, start = segments[0]
+    assert abs(start / SR - (1.0 - PRE_ROLL)) < SLACK
+    assert abs((start + len(segment)) / SR - (3.0 + TRAILING_SILENCE)) < SLACK
+    # The speech at the end of the stream is still open until flush()
+    segment, start = endpointer.flush()
+    assert abs(start / SR - (4.0 - PRE_ROLL)) < SLACK
+    assert abs((start + len(segment)) / SR - 5.0) < 0.05
+    assert endpointer.flush() is None
+
+
+def test_long_speech_is_cut_at_max_seconds(voice):
+    audio = np.concatenate([voice(5.0), silence(1.0)])
+    endpointer = Endpointer(SR, max_seconds=2.0)
+
+    segments = run(endpointer, audio)
+
+    starts = [start for _, start in segments]
+    lengths = [len(segment) for segment, _ in segments]
+    assert len(segments) == 3
+    assert lengths[:2] == [lengths[0]] * 2 and abs(lengths[0] / SR - 2.0) < 0.05
+    # Consecutive pieces are contiguous, so no audio is lost at the cut
+    assert starts[1] == starts[0] + lengths[0]
+    assert starts[2] == starts[1] + lengths[1]
+
+
+def test_short_noise_is_discarded(voice):
+    audio = np.concatenate([silence(1.0), voice(0.12), silence(1.5)])
+    endpointer = Endpointer(SR)
+
+    assert run(endpointer, audio) == []
+    assert endpointer.flush() is None
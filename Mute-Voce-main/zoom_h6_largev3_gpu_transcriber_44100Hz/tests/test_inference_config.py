@@ -0,0 +1,30 @@
+import inference_config
+
+
+class FakeModel:
+    def __init__(self, size):
+        self.size = size
+        self.calls = 0
+
+
+def test_cpu_sizes_are_warmed_up_before_measuring(monkeypatch):
+    measured = []
+
+    def fake_rtf(model, audio):
+        model.calls += 1
+        # The first decode pays one-off start-up costs
+        rtf = {"tiny": 0.1, "base": 0.3, "small": 0.7}[model.size]
+        if model.calls == 1:
+            rtf += 1.0
+        else:
+            measured.append((model.size, len(audio)))
+        return rtf
+
+    monkeypatch.setattr(inference_config, "load_model", lambda size, *a: FakeModel(size))
+    monkeypatch.setattr(inference_config, "measure_rtf", fake_rtf)
+    audio = inference_config.benchmark_audio(seconds=3)
+
+    model, size, rtf = inference_config._pick_cpu_model("int8", 1, 4, 0.5, audio)
+
+    assert (size, rtf) == ("base", 0.3)
+    assert measured == [("tiny", len(audio)), ("base", len(audio)), ("small", len(audio))]
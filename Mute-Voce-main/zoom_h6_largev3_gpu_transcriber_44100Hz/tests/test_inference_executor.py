@@ -0,0 +1,62 @@
+import threading
+
+import numpy as np
+
+from inference_executor import InferenceExecutor
+
+SR = 100
+
+
+def fake_transcribe(audio):
+    """One segment per run of equal samples (each submitted chunk is constant)."""
+    edges = np.flatnonzero(np.diff(audio)) + 1
+    bounds = np.concatenate([[0], edges, [len(audio)]])
+    return [{"start": a / SR, "end": b / SR, "text": str(int(audio[a]))} for a, b in zip(bounds, bounds[1:])]
+
+
+def test_merged_segments_keep_their_own_stream_times():
+    release = threading.Event()
+    started = threading.Event()
+    emitted = []
+
+    def transcribe(audio):
+        started.set()
+        release.wait(5)
+        return fake_transcribe(audio)
+
+    def emit(job, segments):
+        for segment in segments:
+            emitted.append((segment["text"], job.stream_time(segment["start"]),
+                            job.stream_time(segment["end"], end=True)))
+
+    executor = InferenceExecutor(transcribe, emit, SR, max_pending=1, policy="merge")
+    # VAD segments: 2 s each, with gaps between them on the stream clock
+    offsets = [0.0, 5.0, 20.0, 31.5]
+    executor.submit(np.full(2 * SR, 0, dtype=np.float32), offsets[0])
+    assert started.wait(5)  # the first job is running, the rest queue up
+    for n, offset in enumerate(offsets[1:], start=1):
+        executor.submit(np.full(2 * SR, n, dtype=np.float32), offset)
+    assert executor.stats()["merged"] == 2
+    release.set()
+    executor.close()
+
+    assert emitted == [(str(n), offset, offset + 2.0) for n, offset in enumerate(offsets)]
+
+
+def test_failed_jobs_carry_their_error():
+    emitted = []
+
+    def transcribe(audio):
+        if audio[0]:
+            raise RuntimeError("out of memory")
+        return None  # silent
+
+    executor = InferenceExecutor(transcribe, lambda job, result: emitted.append((job, result)), SR)
+    executor.submit(np.zeros(SR, dtype=np.float32), 0.0)
+    executor.submit(np.ones(SR, dtype=np.float32), 1.0)
+    executor.close()
+
+    (silent, silent_result), (failed, failed_result) = emitted
+    assert silent_result is None and silent.error is None
+    assert failed_result is None and isinstance(failed.error, RuntimeError)
+    assert executor.stats()["failed"] == 1
@@ -0,0 +1,51 @@
+import time
+
+import numpy as np
+
+from streaming_decode import StreamingDecoder, agreed_prefix
+
+SR = 100  # any rate works; the fake transcriber only reads the frame-number ramp
+WORDS = [(0.5 * i + 0.1, 0.5 * i + 0.4, f" w{i}") for i in range(8)]  # speech ends at 4 s
+UNSURE = 0.6  # the newest word within this much of the window end is misheard
+
+
+def fake_transcribe_words(audio, prompt):
+    """Words fully inside the window; the audio is a ramp of stream frame numbers."""
+    offset = audio[0] / SR
+    end = offset + len(audio) / SR
+    words = [(s - offset, e - offset, w) for s, e, w in WORDS if s >= offset and e <= end]
+    if words and words[-1][1] > end - offset - UNSURE:
+        words[-1] = (words[-1][0], words[-1][1], " uh")
+    return words
+
+
+def test_commits_words_once_consecutive_decodes_agree():
+    events = []
+    decoder = StreamingDecoder(
+        fake_transcribe_words, lambda *event: events.append(event), SR, hop=1.0
+    ).start()
+    ramp = np.arange(5 * SR, dtype=np.float32)
+    for second in range(5):
+        decoder.feed(ramp[second * SR:(second + 1) * SR])
+        deadline = time.monotonic() + 5
+        while decoder.decodes <= second and time.monotonic() < deadline:
+            time.sleep(0.001)
+    decoder.finish()
+
+    assert decoder.error is None
+    finals = [(start, end, text) for kind, start, end, text in events if kind == "final"]
+    # Nothing is committed after the first decode: it has no previous hypothesis
+    assert events[0] == ("partial", 0.1, 0.9, "w0 uh")
+    assert finals[0] == (0.1, 0.4, "w0")
+    assert " ".join(text for _, _, text in finals) == " ".join(w.strip() for _, _, w in WORDS)
+    assert all(a[1] <= b[0] for a, b in zip(finals, finals[1:]))
+    # Misheard words only ever appear in partials
+    assert any("uh" in text for kind, _, _, text in events if kind == "partial")
+
+
+def test_agreement_ignores_case_and_punctuation():
+    previous = [(0, 1, " Hello,"), (1, 2, " world"), (2, 3, " again")]
+    current = [(0, 1, " hello"), (1, 2, " World."), (2, 3, " a"), (3, 4, " gain")]
+
+    assert agreed_prefix(previous, current) == 2
+    assert agreed_prefix([], current) == 0